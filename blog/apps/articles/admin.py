@@ -1,7 +1,9 @@
+from django import forms
 from django.contrib import admin
 from django.utils.translation import gettext_lazy as _
 
 from .models import Article, Category, Tag, Like, Favorite
+from .tagging import parse_tag_names, resolve_tags, set_article_tags
 
 # Register your models here.
 
@@ -24,8 +26,21 @@ class TagAdmin(admin.ModelAdmin):
     date_hierarchy = "created_at"
 
 
+class ArticleAdminForm(forms.ModelForm):
+    new_tags = forms.CharField(
+        label=_("新标签"),
+        required=False,
+        help_text=_("多个标签用逗号分隔，不存在的标签会自动创建"),
+    )
+
+    class Meta:
+        model = Article
+        fields = "__all__"
+
+
 @admin.register(Article)
 class ArticleAdmin(admin.ModelAdmin):
+    form = ArticleAdminForm
     list_display = (
         "title",
         "author",
@@ -50,10 +65,17 @@ class ArticleAdmin(admin.ModelAdmin):
     raw_id_fields = ("author",)
     fieldsets = (
         (None, {"fields": ("title", "slug", "author", "content")}),
-        (_("分类和标签"), {"fields": ("category", "tags")}),
+        (_("分类和标签"), {"fields": ("category", "tags", "new_tags")}),
         (_("状态"), {"fields": ("status", "visibility", "published_at")}),
     )
 
+    def save_related(self, request, form, formsets, change):
+        # 标签由 set_article_tags 按差异写入，不使用表单默认的 tags.set()
+        tags = list(form.cleaned_data.pop("tags", []))
+        super().save_related(request, form, formsets, change)
+        new_tags = parse_tag_names(form.cleaned_data.get("new_tags", ""))
+        set_article_tags(form.instance, tags + resolve_tags(new_tags))
+
 
 @admin.register(Like)
 class LikeAdmin(admin.ModelAdmin):
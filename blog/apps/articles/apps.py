@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ArticlesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.articles"
+
+    def ready(self):
+        # 注册信号处理器
+        from . import signals  # noqa: F401
@@ -0,0 +1,123 @@
+"""
+文章卡片片段缓存
+
+文章列表和首页的每张卡片中，标题、作者、发布时间、分类、标签和摘要对所有访问者都相同，
+且包含多个 {% url %} 反向解析。这部分按文章渲染一次后缓存，列表页用一次 get_many
+读取本页全部卡片，只渲染未命中的卡片；点赞/收藏状态、计数和编辑按钮等
+与用户有关或经常变化的部分仍在列表模板中渲染。
+
+缓存键包含文章的 updated_at 和该文章的卡片版本号，文章保存后自动使用新的键，
+旧的键等待过期；单篇文章的标签关联变化不修改 updated_at，更新该文章的卡片版本号；
+分类或标签改名、用户改名影响多篇文章，通过递增 article_cards 命名空间的版本号使
+全部卡片失效（见 signals.py）。
+"""
+
+import time
+
+from django.db import transaction
+from django.db.models import prefetch_related_objects
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from utils.cache import (
+    NAMESPACE_VERSION_KEY,
+    invalidate_namespace,
+    namespace_version,
+    safe_cache,
+)
+
+CACHE_NAMESPACE = "article_cards"
+# 单篇文章的卡片版本号
+ARTICLE_VERSION_KEY = "article_card_version_{}"
+# 依赖键中的 updated_at 和命名空间版本号失效，过期时间只用于回收不再使用的键
+CACHE_TIMEOUT = 60 * 60 * 24
+# 卡片样式：(模板, 渲染需要预加载的关联)
+CARD_VARIANTS = {
+    "list": ("articles/list_card.html", ("tags", "author", "category")),
+    "home": ("articles/home_card.html", ("tags", "category")),
+}
+
+
+def card_key(version, variant, article, article_version=0):
+    return (
+        f"{CACHE_NAMESPACE}:v{version}:{variant}:{article.pk}:"
+        f"{article_version}:{article.updated_at.timestamp()}"
+    )
+
+
+def _new_version():
+    return time.time_ns() // 1000
+
+
+def _versions(articles):
+    """一次 get_many 读取命名空间和各文章的卡片版本号，缺失的版本号以当前时间初始化"""
+    namespace_key = NAMESPACE_VERSION_KEY.format(CACHE_NAMESPACE)
+    keys = {article.pk: ARTICLE_VERSION_KEY.format(article.pk) for article in articles}
+    values = safe_cache.get_many([namespace_key, *keys.values()])
+    missing = [key for key in keys.values() if key not in values]
+    if missing:
+        version = _new_version()
+        for key in missing:
+            safe_cache.add(key, version, timeout=None)
+        values.update(safe_cache.get_many(missing))
+    version = values.get(namespace_key)
+    if version is None:
+        version = namespace_version(CACHE_NAMESPACE)
+    return version, {pk: values.get(key, 0) for pk, key in keys.items()}
+
+
+def attach_cards(articles, variant="list"):
+    """
+    为文章设置 card_html 属性（一次 get_many，只渲染未命中的卡片）
+
+    Args:
+        articles: 文章列表或分页对象
+        variant: 卡片样式，见 CARD_VARIANTS
+
+    Returns:
+        渲染的卡片数量
+    """
+    articles = list(articles)
+    if not articles:
+        return 0
+    template, lookups = CARD_VARIANTS[variant]
+    version, article_versions = _versions(articles)
+    keys = {
+        article.pk: card_key(version, variant, article, article_versions[article.pk])
+        for article in articles
+    }
+    cached = safe_cache.get_many(keys.values())
+
+    missing = [article for article in articles if keys[article.pk] not in cached]
+    if missing:
+        # 只为未命中的文章加载标签等关联，已加载的关联不会重复查询
+        prefetch_related_objects(missing, *lookups)
+        rendered = {
+            keys[article.pk]: render_to_string(template, {"article": article})
+            for article in missing
+        }
+        safe_cache.set_many(rendered, CACHE_TIMEOUT)
+        cached.update(rendered)
+
+    for article in articles:
+        article.card_html = mark_safe(cached[keys[article.pk]])
+    return len(missing)
+
+
+def invalidate_cards():
+    """使全部卡片失效，事务提交后再失效一次"""
+    invalidate_namespace(CACHE_NAMESPACE)
+    transaction.on_commit(lambda: invalidate_namespace(CACHE_NAMESPACE))
+
+
+def _bump_articles(keys):
+    version = _new_version()
+    safe_cache.set_many({key: version for key in keys}, timeout=None)
+
+
+def invalidate_article_cards(article_ids):
+    """使指定文章的卡片失效，事务提交后再失效一次"""
+    keys = [ARTICLE_VERSION_KEY.format(pk) for pk in set(article_ids)]
+    if keys:
+        _bump_articles(keys)
+        transaction.on_commit(lambda: _bump_articles(keys))
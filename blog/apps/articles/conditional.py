@@ -0,0 +1,202 @@
+"""
+文章页面的条件请求（ETag / Last-Modified）
+
+文章详情、文章列表以及对应的API在渲染模板或序列化之前先计算验证器，
+请求带有匹配的 If-None-Match / If-Modified-Since 时直接返回304。
+
+详情页的ETag由以下部分组成：
+
+- 文章的 updated_at（标题、正文、分类、状态等通过 save 修改的字段）
+- 文章的变化时间：评论、点赞、收藏、标签、相关文章和浏览量写回不会修改 updated_at，
+  由信号调用 touch_articles 记录到缓存（article_changed_<ID>）
+- 共用数据的变化时间：分类、标签改名和用户改名会影响很多页面，
+  由 touch_article_pages 记录（article_pages_changed）
+- 当前用户（导航栏显示用户名和头像，页面上有点赞/收藏状态和编辑按钮）
+
+列表页使用一条聚合查询（最大 updated_at 和文章数量），加上列表的变化时间
+（任意文章被 touch 时更新）、查询参数和当前用户。
+
+Last-Modified 只发送给匿名用户：登录状态变化不会改变时间，不能只按时间判断。
+缓存中的变化时间丢失时以当前时间重新初始化，只会让客户端多下载一次；
+缓存不可用时每次都使用当前时间，不返回304。
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.contrib import messages
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.http import http_date
+
+from utils.cache import safe_cache
+
+# 单篇文章 updated_at 之外的变化时间
+ARTICLE_CHANGED_KEY = "article_changed_{}"
+# 任意文章列表内容的变化时间
+LISTS_CHANGED_KEY = "article_lists_changed"
+# 分类、标签、作者等多个页面共用数据的变化时间
+PAGES_CHANGED_KEY = "article_pages_changed"
+
+OPTIONS = {
+    "ENABLED": True,
+    # 修改模板等会改变页面但不改变数据的发布后修改此值，使客户端的缓存失效
+    "VERSION": "1",
+}
+
+
+def get_options():
+    return {**OPTIONS, **getattr(settings, "CONDITIONAL_GET", {})}
+
+
+def _touch(keys):
+    now = time.time()
+    safe_cache.set_many({key: now for key in keys}, timeout=None)
+
+
+def _touch_on_commit(keys):
+    _touch(keys)
+    # 事务提交前并发请求可能按旧数据生成了新的ETag，提交后再更新一次
+    transaction.on_commit(lambda: _touch(keys))
+
+
+def touch_articles(article_ids):
+    """记录文章（及文章列表）发生了 updated_at 之外的变化"""
+    keys = [ARTICLE_CHANGED_KEY.format(pk) for pk in set(article_ids)]
+    if keys:
+        _touch_on_commit(keys + [LISTS_CHANGED_KEY])
+
+
+def touch_article_pages():
+    """记录全部文章页面共用的数据发生了变化"""
+    _touch_on_commit([PAGES_CHANGED_KEY, LISTS_CHANGED_KEY])
+
+
+def _changed_at(*keys):
+    """读取变化时间，缺失的键以当前时间初始化"""
+    values = safe_cache.get_many(keys)
+    missing = [key for key in keys if key not in values]
+    now = time.time()
+    if missing:
+        for key in missing:
+            safe_cache.add(key, now, timeout=None)
+        values.update(safe_cache.get_many(missing))
+    return [values.get(key, now) for key in keys]
+
+
+def _viewer(user):
+    """影响页面内容的当前用户信息"""
+    if not user.is_authenticated:
+        return ("anonymous",)
+    return (
+        user.pk,
+        user.username,
+        getattr(user, "avatar_version", ""),
+        user.is_staff,
+    )
+
+
+def _etag(*parts):
+    digest = hashlib.sha1(repr((get_options()["VERSION"],) + parts).encode())
+    return f'"{digest.hexdigest()}"'
+
+
+def _last_modified(user, *timestamps):
+    if user.is_authenticated:
+        return None
+    return int(max(timestamps))
+
+
+def article_validators(article, user, *extra):
+    """
+    计算文章详情的验证器
+
+    Args:
+        article: 文章
+        user: 当前用户
+        extra: 其他影响内容的参数，如评论页码、响应格式
+
+    Returns:
+        (ETag, Last-Modified时间戳)，登录用户的时间戳为 None
+    """
+    article_changed, pages_changed = _changed_at(
+        ARTICLE_CHANGED_KEY.format(article.pk), PAGES_CHANGED_KEY
+    )
+    updated = article.updated_at.timestamp()
+    etag = _etag(
+        "article",
+        article.pk,
+        updated,
+        article_changed,
+        pages_changed,
+        _viewer(user),
+        extra,
+    )
+    return etag, _last_modified(user, updated, article_changed, pages_changed)
+
+
+def list_validators(queryset, user, *extra):
+    """
+    计算文章列表的验证器（一条聚合查询）
+
+    Args:
+        queryset: 过滤后、分页前的文章查询集
+        user: 当前用户
+        extra: 其他影响内容的参数，如查询参数
+
+    Returns:
+        (ETag, Last-Modified时间戳)，登录用户的时间戳为 None
+    """
+    summary = queryset.order_by().aggregate(
+        latest=Max("updated_at"), total=Count("pk", distinct=True)
+    )
+    lists_changed, pages_changed = _changed_at(LISTS_CHANGED_KEY, PAGES_CHANGED_KEY)
+    latest = summary["latest"].timestamp() if summary["latest"] else 0.0
+    etag = _etag(
+        "list",
+        latest,
+        summary["total"],
+        lists_changed,
+        pages_changed,
+        _viewer(user),
+        extra,
+    )
+    return etag, _last_modified(user, latest, lists_changed, pages_changed)
+
+
+def not_modified(request, etag, last_modified=None):
+    """
+    请求的验证器匹配时返回304响应，否则返回 None
+
+    只处理 GET/HEAD 请求；有待显示的消息时照常渲染，避免消息被缓存的页面吞掉。
+    """
+    if not get_options()["ENABLED"] or request.method not in ("GET", "HEAD"):
+        return None
+    if len(messages.get_messages(request)):
+        return None
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified=None):
+    """为响应设置验证器，要求客户端每次使用缓存前重新验证"""
+    if not get_options()["ENABLED"] or response.status_code not in (200, 304):
+        return response
+    response.headers["ETag"] = etag
+    if last_modified is not None:
+        response.headers["Last-Modified"] = http_date(last_modified)
+        patch_cache_control(response, no_cache=True)
+    else:
+        # 内容与登录用户有关，只允许浏览器缓存
+        patch_cache_control(response, no_cache=True, private=True)
+    # 网页通过会话登录，API还可以通过JWT登录
+    patch_vary_headers(response, ("Cookie", "Authorization"))
+    return response
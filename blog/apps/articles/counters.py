@@ -0,0 +1,163 @@
+"""
+文章浏览量缓冲计数模块
+
+配置 ARTICLE_VIEWS_REDIS_URL 时，浏览量先用INCR累加到Redis（article_views:{id}），
+并把文章ID加入集合记录脏数据，由定时任务 utils.celery.tasks.process_article_views
+批量使用F()原子增量写回数据库，避免每次浏览都对文章表执行一次读-改-写。
+
+计数必须由Web进程和Celery进程共享，因此使用独立的Redis连接，而不是进程内的缓存；
+未配置或Redis不可用时直接对数据库执行原子增量，浏览量不会丢失。
+"""
+
+import logging
+import threading
+
+import redis
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, PositiveIntegerField, Value, When
+
+logger = logging.getLogger(__name__)
+
+# 单篇文章的缓冲浏览量键
+VIEW_COUNT_KEY = "blog:article_views:{}"
+# 有待写回浏览量的文章ID集合键
+DIRTY_VIEWS_KEY = "blog:article_views:dirty"
+# 每条UPDATE语句处理的文章数量上限
+FLUSH_BATCH_SIZE = 500
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def _redis_client():
+    """返回浏览量缓冲使用的Redis客户端，未配置时返回None"""
+    url = getattr(settings, "ARTICLE_VIEWS_REDIS_URL", "")
+    if not url:
+        return None
+    client = _clients.get(url)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(url)
+            if client is None:
+                client = _clients[url] = redis.Redis.from_url(
+                    url, socket_connect_timeout=1, socket_timeout=1
+                )
+    return client
+
+
+def _write_views(article_id, count):
+    """
+    直接把浏览量写入数据库
+
+    不使页面缓存和ETag失效，否则每次浏览都会使文章页面重新生成；
+    页面上的浏览量在文章下次变化时更新
+    """
+    from utils.stats.models import ArticleStats
+
+    from .models import Article
+
+    with transaction.atomic():
+        Article.objects.filter(pk=article_id).update(  # type: ignore
+            views_count=F("views_count") + count
+        )
+        ArticleStats.objects.filter(article_id=article_id).update(  # type: ignore
+            views_count=F("views_count") + count
+        )
+
+
+def record_view(article_id, count=1):
+    """
+    记录文章浏览量
+
+    Args:
+        article_id: 文章ID
+        count: 增加的浏览量
+    """
+    client = _redis_client()
+    if client is not None:
+        try:
+            pipe = client.pipeline()
+            pipe.incrby(VIEW_COUNT_KEY.format(article_id), count)
+            pipe.sadd(DIRTY_VIEWS_KEY, article_id)
+            pipe.execute()
+            return
+        except redis.RedisError:
+            logger.warning("浏览量缓冲不可用，直接写入数据库", exc_info=True)
+    _write_views(article_id, count)
+
+
+def drain_views():
+    """
+    取出所有待写回的浏览量并清零
+
+    Returns:
+        {article_id: count} 字典，未配置缓冲时为空
+    """
+    client = _redis_client()
+    counts = {}
+    if client is None:
+        return counts
+    while True:
+        article_ids = client.spop(DIRTY_VIEWS_KEY, FLUSH_BATCH_SIZE)
+        if not article_ids:
+            break
+        article_ids = [int(article_id) for article_id in article_ids]
+        pipe = client.pipeline()
+        for article_id in article_ids:
+            pipe.getdel(VIEW_COUNT_KEY.format(article_id))
+        for article_id, value in zip(article_ids, pipe.execute()):
+            if value:
+                counts[article_id] = int(value)
+    return counts
+
+
+def _increments(field, batch):
+    """按文章ID生成浏览量增量的CASE表达式"""
+    return Case(
+        *[When(**{field: article_id}, then=Value(n)) for article_id, n in batch],
+        default=Value(0),
+        output_field=PositiveIntegerField(),
+    )
+
+
+def flush_views():
+    """
+    将缓冲的浏览量批量写回数据库
+
+    Returns:
+        更新的文章数量
+    """
+    from utils.stats.models import ArticleStats
+
+    from .conditional import touch_articles
+    from .models import Article
+
+    counts = drain_views()
+    if not counts:
+        return 0
+
+    items = sorted(counts.items())
+    updated = 0
+    for start in range(0, len(items), FLUSH_BATCH_SIZE):
+        batch = items[start : start + FLUSH_BATCH_SIZE]
+        article_ids = [article_id for article_id, _ in batch]
+        try:
+            with transaction.atomic():
+                rows = Article.objects.filter(pk__in=article_ids).update(  # type: ignore
+                    views_count=F("views_count") + _increments("pk", batch)
+                )
+                # 同步文章统计中的浏览量
+                ArticleStats.objects.filter(article_id__in=article_ids).update(  # type: ignore
+                    views_count=F("views_count") + _increments("article_id", batch)
+                )
+            updated += rows
+            # 浏览量变化不修改 updated_at，记录文章页面的变化
+            touch_articles(article_ids)
+        except Exception:
+            # 写回失败时把浏览量放回缓存，等待下次重试
+            logger.exception("写回文章浏览量失败，已放回缓存")
+            for article_id, n in items[start:]:
+                record_view(article_id, n)
+            raise
+    return updated
@@ -0,0 +1,25 @@
+"""
+重建相关文章索引
+
+用法：
+    python manage.py rebuild_related_articles
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.articles.related import rebuild_related_articles
+
+
+class Command(BaseCommand):
+    help = "根据标签、分类和发布时间重新计算所有已发布文章的相关文章"
+
+    def handle(self, *args, **options):
+        start = time.time()
+        count = rebuild_related_articles()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"重建完成，写入 {count} 条相关文章记录，耗时 {time.time() - start:.2f} 秒"
+            )
+        )
@@ -0,0 +1,98 @@
+"""
+批量预渲染文章Markdown内容
+
+用法：
+    python manage.py render_articles
+    python manage.py render_articles --workers 8 --force
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.articles.models import Article, ArticleRender
+from apps.articles.rendering import content_hash, render_payload
+
+
+class Command(BaseCommand):
+    help = "并行渲染所有文章的Markdown内容并保存渲染结果"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="渲染进程数，默认为CPU核数",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=200,
+            help="每批写入数据库的文章数量",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="忽略内容哈希，重新渲染所有文章",
+        )
+
+    def handle(self, *args, **options):
+        workers = max(1, options["workers"])
+        batch_size = max(1, options["batch_size"])
+        force = options["force"]
+
+        # 已有渲染结果的内容哈希，用于跳过未变化的文章
+        existing = dict(
+            ArticleRender.objects.values_list("article_id", "content_hash")  # type: ignore
+        )
+
+        pending = []
+        for article_id, content in Article.objects.values_list(  # type: ignore
+            "id", "content"
+        ).iterator(chunk_size=batch_size):
+            if force or existing.get(article_id) != content_hash(content):
+                pending.append((article_id, content))
+
+        total = len(pending)
+        if not total:
+            self.stdout.write(self.style.SUCCESS("所有文章的渲染结果均为最新"))
+            return
+
+        self.stdout.write(f"需要渲染 {total} 篇文章，使用 {workers} 个进程")
+
+        rendered = 0
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            batch = []
+            for result in executor.map(
+                render_payload, pending, chunksize=max(1, batch_size // workers)
+            ):
+                batch.append(result)
+                if len(batch) >= batch_size:
+                    self._save_batch(batch)
+                    rendered += len(batch)
+                    self.stdout.write(f"已渲染 {rendered}/{total}")
+                    batch = []
+            if batch:
+                self._save_batch(batch)
+                rendered += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"渲染完成，共 {rendered} 篇文章"))
+
+    def _save_batch(self, batch):
+        """替换一批文章的渲染结果"""
+        article_ids = [article_id for article_id, _, _, _ in batch]
+        with transaction.atomic():
+            ArticleRender.objects.filter(article_id__in=article_ids).delete()  # type: ignore
+            ArticleRender.objects.bulk_create(  # type: ignore
+                [
+                    ArticleRender(
+                        article_id=article_id,
+                        content_hash=digest,
+                        html=html,
+                        toc=toc,
+                    )
+                    for article_id, digest, html, toc in batch
+                ]
+            )
@@ -0,0 +1,49 @@
+"""
+回填文章摘要、字数和阅读时间
+
+用法：
+    python manage.py summarize_articles
+    python manage.py summarize_articles --batch-size 1000
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.articles.models import Article
+from apps.articles.summary import SUMMARY_FIELDS
+
+
+class Command(BaseCommand):
+    help = "根据正文重新计算所有文章的摘要、字数和阅读时间"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="每批写入数据库的文章数量",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options["batch_size"])
+        total = 0
+        batch = []
+        for article in Article.objects.only("id", "content").iterator(  # type: ignore
+            chunk_size=batch_size
+        ):
+            article.refresh_summary()
+            batch.append(article)
+            if len(batch) >= batch_size:
+                total += self._save_batch(batch, batch_size)
+                self.stdout.write(f"已处理 {total} 篇文章")
+                batch = []
+        if batch:
+            total += self._save_batch(batch, batch_size)
+
+        self.stdout.write(self.style.SUCCESS(f"处理完成，共 {total} 篇文章"))
+
+    def _save_batch(self, batch, batch_size):
+        # bulk_update 不触发信号，不会重建搜索索引和渲染结果
+        Article.objects.bulk_update(  # type: ignore
+            batch, SUMMARY_FIELDS, batch_size=batch_size
+        )
+        return len(batch)
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.20 on 2026-10-18 19:17
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        (
+            "articles",
+            "0005_alter_article_created_at_alter_article_published_at_and_more",
+        ),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArticleRender",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "content_hash",
+                    models.CharField(max_length=64, verbose_name="内容哈希"),
+                ),
+                ("html", models.TextField(verbose_name="渲染HTML")),
+                ("toc", models.TextField(blank=True, verbose_name="目录HTML")),
+                (
+                    "rendered_at",
+                    models.DateTimeField(auto_now=True, verbose_name="渲染时间"),
+                ),
+                (
+                    "article",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="render",
+                        to="articles.article",
+                        verbose_name="文章",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "文章渲染结果",
+                "verbose_name_plural": "文章渲染结果",
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.20 on 2026-10-18 19:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("articles", "0006_articlerender"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="article",
+            name="excerpt",
+            field=models.CharField(
+                blank=True, default="", max_length=255, verbose_name="摘要"
+            ),
+        ),
+        migrations.AddField(
+            model_name="article",
+            name="reading_time",
+            field=models.PositiveSmallIntegerField(
+                default=0, verbose_name="阅读时间（分钟）"
+            ),
+        ),
+        migrations.AddField(
+            model_name="article",
+            name="word_count",
+            field=models.PositiveIntegerField(default=0, verbose_name="字数"),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 4.2.20 on 2026-10-18 20:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("articles", "0007_article_summary"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RelatedArticle",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("rank", models.PositiveSmallIntegerField(verbose_name="排名")),
+                ("score", models.FloatField(verbose_name="相似度")),
+                (
+                    "article",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="related_links",
+                        to="articles.article",
+                        verbose_name="文章",
+                    ),
+                ),
+                (
+                    "related",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="articles.article",
+                        verbose_name="相关文章",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "相关文章",
+                "verbose_name_plural": "相关文章",
+                "ordering": ["article", "rank"],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="relatedarticle",
+            constraint=models.UniqueConstraint(
+                fields=("article", "rank"), name="related_article_rank_uniq"
+            ),
+        ),
+    ]
@@ -4,6 +4,10 @@ from django.utils.translation import gettext_lazy as _
 from django.urls import reverse
 from django.conf import settings
 
+from utils.slugs import allocate_slug
+
+from .summary import SUMMARY_FIELDS, summarize
+
 # Create your models here.
 
 
@@ -42,14 +46,12 @@ class Tag(models.Model):
         return str(self.name)
 
     def save(self, *args, **kwargs):
-        # 如果没有设置slug，使用ID
-        if not self.slug and self.pk:
-            self.slug = str(self.pk)
-        super().save(*args, **kwargs)
-        # 如果创建后仍然没有slug（第一次保存），再次保存以设置slug
+        # 如果没有设置slug，插入前分配唯一slug，创建只需一次写入
         if not self.slug:
-            self.slug = str(self.pk)
-            super().save(update_fields=["slug"])
+            self.slug = allocate_slug(
+                self.name, self._meta.get_field("slug").max_length
+            )
+        super().save(*args, **kwargs)
 
 
 class Article(models.Model):
@@ -106,6 +108,10 @@ class Article(models.Model):
         _("发布时间"), null=True, blank=True, db_index=True
     )
     views_count = models.PositiveIntegerField(_("浏览量"), default=0, db_index=True)
+    # 以下字段在保存时由正文计算（见 summary.py），列表页无需读取正文
+    excerpt = models.CharField(_("摘要"), max_length=255, blank=True, default="")
+    word_count = models.PositiveIntegerField(_("字数"), default=0)
+    reading_time = models.PositiveSmallIntegerField(_("阅读时间（分钟）"), default=0)
 
     class Meta:
         verbose_name = _("文章")
@@ -125,19 +131,32 @@ class Article(models.Model):
     def save(self, *args, **kwargs):
         if self.status == "published" and not self.published_at:
             self.published_at = timezone.now()
-        # 如果没有设置slug，使用ID
-        if not self.slug and self.pk:
-            self.slug = str(self.pk)
-        super().save(*args, **kwargs)
-        # 如果创建后仍然没有slug（第一次保存），再次保存以设置slug
+        # 正文变化时重新计算摘要、字数和阅读时间
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or "content" in update_fields:
+            self.refresh_summary()
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, *SUMMARY_FIELDS}
+        # 如果没有设置slug，插入前分配唯一slug，创建只需一次写入
         if not self.slug:
-            self.slug = str(self.pk)
-            super().save(update_fields=["slug"])
+            self.slug = allocate_slug(
+                self.title, self._meta.get_field("slug").max_length
+            )
+            if update_fields is not None:
+                kwargs["update_fields"] = {*kwargs["update_fields"], "slug"}
+        super().save(*args, **kwargs)
+
+    def refresh_summary(self):
+        """根据正文计算摘要、字数和阅读时间"""
+        for field, value in summarize(self.content).items():
+            setattr(self, field, value)
 
     def increase_views(self):
-        """增加文章浏览量"""
+        """增加文章浏览量，配置了浏览量缓冲时由定时任务批量写回数据库"""
+        from .counters import record_view
+
+        record_view(self.pk)
         self.views_count += 1
-        self.save(update_fields=["views_count"])
 
 
 class Like(models.Model):
@@ -196,3 +215,57 @@ class Favorite(models.Model):
     def __str__(self):
         # 使用str()方法获取关联对象的属性，避免类型检查错误
         return f"{str(self.user)} 收藏了 {str(self.article)}"
+
+
+class ArticleRender(models.Model):
+    """文章渲染结果模型，缓存Markdown渲染后的HTML和目录"""
+
+    article = models.OneToOneField(
+        Article,
+        on_delete=models.CASCADE,
+        related_name="render",
+        verbose_name=_("文章"),
+    )
+    content_hash = models.CharField(_("内容哈希"), max_length=64)
+    html = models.TextField(_("渲染HTML"))
+    toc = models.TextField(_("目录HTML"), blank=True)
+    rendered_at = models.DateTimeField(_("渲染时间"), auto_now=True)
+
+    class Meta:
+        verbose_name = _("文章渲染结果")
+        verbose_name_plural = _("文章渲染结果")
+
+    def __str__(self):
+        return f"{str(self.article)} 的渲染结果"
+
+
+class RelatedArticle(models.Model):
+    """相关文章索引，每篇已发布文章保存得分最高的若干篇相关文章（见 related.py）"""
+
+    article = models.ForeignKey(
+        Article,
+        on_delete=models.CASCADE,
+        related_name="related_links",
+        verbose_name=_("文章"),
+    )
+    related = models.ForeignKey(
+        Article,
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name=_("相关文章"),
+    )
+    rank = models.PositiveSmallIntegerField(_("排名"))
+    score = models.FloatField(_("相似度"))
+
+    class Meta:
+        verbose_name = _("相关文章")
+        verbose_name_plural = _("相关文章")
+        ordering = ["article", "rank"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["article", "rank"], name="related_article_rank_uniq"
+            )
+        ]
+
+    def __str__(self):
+        return f"{str(self.article)} -> {str(self.related)}"
@@ -0,0 +1,63 @@
+"""
+文章页面的匿名整页缓存标签
+
+首页和文章列表带有 LISTS_TAG，文章详情带有该文章的标签，两者都带有 PAGES_TAG：
+
+- 文章保存或删除、标签变化：该文章的详情页和所有列表页失效
+- 评论审核通过（或已审核的评论修改、删除）：该文章的详情页和所有列表页失效
+- 分类、标签增删改和用户改名：所有文章页面失效
+
+缓存命中时不执行视图，浏览量由 count_cached_view 写入计数缓存。匿名访问没有会话，
+同一IP在 VIEW_DEDUP_TIMEOUT 内重复访问同一文章只计一次浏览量，与登录用户的会话标记一致。
+"""
+
+from django.core.cache import cache
+
+from utils.cache import CACHE_ERRORS
+from utils.page_cache import invalidate_page_tags
+
+LISTS_TAG = "page:article_lists"
+PAGES_TAG = "page:articles"
+# 匿名访问浏览量的去重键和去重时间（秒）
+VIEW_DEDUP_KEY = "article_viewed:{}:{}"
+VIEW_DEDUP_TIMEOUT = 60 * 30
+
+
+def article_tag(article_id):
+    return f"page:article:{article_id}"
+
+
+def invalidate_article_pages(article_ids):
+    """使文章的详情页和文章列表页失效"""
+    tags = [article_tag(pk) for pk in set(article_ids)]
+    if tags:
+        invalidate_page_tags(LISTS_TAG, *tags)
+
+
+def invalidate_all_article_pages():
+    """使全部文章页面失效"""
+    invalidate_page_tags(PAGES_TAG)
+
+
+def _client_ip(request):
+    forwarded_for = request.META.get("HTTP_X_FORWARDED_FOR")
+    if forwarded_for:
+        return forwarded_for.split(",")[0].strip()
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def is_new_anonymous_view(request, article_id):
+    """匿名访问是否应计入浏览量，同一IP在去重时间内只计一次；缓存不可用时计数"""
+    key = VIEW_DEDUP_KEY.format(article_id, _client_ip(request))
+    try:
+        return cache.add(key, 1, VIEW_DEDUP_TIMEOUT)
+    except CACHE_ERRORS:
+        return True
+
+
+def count_cached_view(request, meta):
+    """详情页缓存命中时统计浏览量"""
+    from .counters import record_view
+
+    if "article_id" in meta and is_new_anonymous_view(request, meta["article_id"]):
+        record_view(meta["article_id"])
@@ -0,0 +1,372 @@
+"""
+相关文章索引
+
+为每篇已发布的公开文章预先计算最相似的若干篇文章，保存到 RelatedArticle 表中，
+文章详情页和API按 (article, rank) 索引一次查询读取，不再在请求中按分类或标签联表查询。
+
+相似度 = 标签权重 × 加权Jaccard（共同标签 / 全部标签，标签权重为 IDF，越少见的标签越重要）
+       + 分类权重 × 是否同一分类
+       + 时间权重 × 发布时间接近程度（相差 RECENCY_HALF_LIFE_DAYS 天时为 0.5）
+
+没有共同标签也不在同一分类的文章不作为候选。
+
+文章的标签、分类、状态、可见性或发布时间变化时（见 signals.py）增量更新：
+只读取该文章及其候选文章的特征，重新计算该文章的相关文章，并把它插入候选文章的
+相关文章或从中移除（见 update_related_articles）；Celery 定时任务每天全量重建一次。
+"""
+
+import heapq
+import logging
+import math
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+
+from .conditional import touch_article_pages, touch_articles
+from .models import Article, RelatedArticle
+
+logger = logging.getLogger(__name__)
+
+OPTIONS = {
+    "ASYNC": True,  # 通过Celery任务异步计算
+    "TOP_K": 5,  # 每篇文章保存的相关文章数量
+    "TAG_WEIGHT": 0.6,
+    "CATEGORY_WEIGHT": 0.3,
+    "RECENCY_WEIGHT": 0.1,
+    "RECENCY_HALF_LIFE_DAYS": 180,
+}
+# 批量写入的行数
+BULK_SIZE = 1000
+
+
+def get_options():
+    return {**OPTIONS, **getattr(settings, "RELATED_ARTICLES", {})}
+
+
+def _visible():
+    return Article.objects.filter(  # type: ignore
+        status="published", visibility="public"
+    )
+
+
+class ArticleFeatures:
+    """已发布公开文章的分类、发布时间和标签，以及按标签、分类的倒排索引"""
+
+    def __init__(self):
+        self.category = {}
+        self.published = {}
+        self.tags = defaultdict(set)
+        self.by_tag = defaultdict(set)
+        self.by_category = defaultdict(set)
+        self.idf = {}
+
+    @classmethod
+    def load(cls, article_ids=None):
+        """
+        读取特征
+
+        Args:
+            article_ids: 为None时读取全部文章（两条查询）；否则只读取这些文章及其候选文章
+                （有共同标签或同一分类），IDF按全部文章统计。此时只有这些文章的
+                neighbors() 是完整的
+        """
+        features = cls()
+        links = Article.tags.through.objects
+        visible = _visible()
+        if article_ids is None:
+            articles = visible
+        else:
+            article_ids = list(article_ids)
+            categories = set(
+                visible.filter(pk__in=article_ids)
+                .exclude(category=None)
+                .values_list("category_id", flat=True)
+            )
+            tags = links.filter(article_id__in=article_ids, article__in=visible).values(
+                "tag_id"
+            )
+            articles = visible.filter(
+                Q(pk__in=article_ids)
+                | Q(category_id__in=categories)
+                | Q(pk__in=links.filter(tag_id__in=tags).values("article_id"))
+            )
+
+        for pk, category_id, published_at in articles.values_list(
+            "pk", "category_id", "published_at"
+        ):
+            features.category[pk] = category_id
+            features.published[pk] = published_at
+            if category_id is not None:
+                features.by_category[category_id].add(pk)
+        for pk, tag_id in links.filter(article__in=articles).values_list(
+            "article_id", "tag_id"
+        ):
+            features.tags[pk].add(tag_id)
+            features.by_tag[tag_id].add(pk)
+
+        if article_ids is None:
+            total = len(features.category)
+            counts = {tag_id: len(pks) for tag_id, pks in features.by_tag.items()}
+        else:
+            total = visible.count()
+            counts = dict(
+                links.filter(article__in=visible, tag_id__in=list(features.by_tag))
+                .order_by()
+                .values("tag_id")
+                .annotate(n=Count("id"))
+                .values_list("tag_id", "n")
+            )
+        features.idf = {tag_id: math.log(1 + total / n) for tag_id, n in counts.items()}
+        return features
+
+    def neighbors(self, pk):
+        """与文章有共同标签或同一分类的文章"""
+        result = set()
+        for tag_id in self.tags.get(pk, ()):
+            result |= self.by_tag[tag_id]
+        category_id = self.category.get(pk)
+        if category_id is not None:
+            result |= self.by_category[category_id]
+        result.discard(pk)
+        return result
+
+    def tag_similarity(self, a, b):
+        """加权Jaccard相似度"""
+        tags_a, tags_b = self.tags.get(a, set()), self.tags.get(b, set())
+        shared = tags_a & tags_b
+        if not shared:
+            return 0.0
+        idf = self.idf
+        return sum(idf[t] for t in shared) / sum(idf[t] for t in tags_a | tags_b)
+
+    def recency(self, a, b, half_life):
+        """发布时间越接近越高，取值 (0, 1]"""
+        date_a, date_b = self.published.get(a), self.published.get(b)
+        if date_a is None or date_b is None:
+            return 0.0
+        days = abs((date_a - date_b).total_seconds()) / 86400
+        return 0.5 ** (days / half_life)
+
+
+def _candidate_scores(pk, features, options):
+    """文章与每篇候选文章的得分 [(得分, 候选文章ID)]，得分对两篇文章是对称的"""
+    if pk not in features.category:
+        return []
+    category_id = features.category[pk]
+    scored = []
+    for other in features.neighbors(pk):
+        score = options["TAG_WEIGHT"] * features.tag_similarity(pk, other)
+        if category_id is not None and features.category[other] == category_id:
+            score += options["CATEGORY_WEIGHT"]
+        score += options["RECENCY_WEIGHT"] * features.recency(
+            pk, other, options["RECENCY_HALF_LIFE_DAYS"]
+        )
+        scored.append((score, other))
+    return scored
+
+
+def _top(scored, top_k):
+    # 得分相同时较新的文章（ID较大）优先
+    return [(other, score) for score, other in heapq.nlargest(top_k, scored)]
+
+
+def score_related(pk, features, options=None):
+    """
+    计算一篇文章的相关文章
+
+    Returns:
+        [(相关文章ID, 得分), ...]，按得分从高到低排列，最多 TOP_K 项
+    """
+    options = options or get_options()
+    return _top(_candidate_scores(pk, features, options), options["TOP_K"])
+
+
+def _chunks(values, size=BULK_SIZE):
+    values = sorted(values)
+    for start in range(0, len(values), size):
+        yield values[start : start + size]
+
+
+def _save(lists, full=False):
+    """
+    替换这些文章的相关文章记录，full 时替换整张表
+
+    Args:
+        lists: {文章ID: [(相关文章ID, 得分), ...]}
+    """
+    rows = [
+        RelatedArticle(article_id=pk, related_id=other, rank=rank, score=score)
+        for pk, related in lists.items()
+        for rank, (other, score) in enumerate(related)
+    ]
+    with transaction.atomic():
+        if full:
+            RelatedArticle.objects.all().delete()  # type: ignore
+        else:
+            for chunk in _chunks(lists):
+                RelatedArticle.objects.filter(article_id__in=chunk).delete()  # type: ignore
+        RelatedArticle.objects.bulk_create(rows, batch_size=BULK_SIZE)  # type: ignore
+    if full:
+        touch_article_pages()
+    else:
+        touch_articles(lists)
+    return len(rows)
+
+
+def _current_lists(article_ids):
+    """读取这些文章当前的相关文章 {文章ID: [(相关文章ID, 得分), ...]}"""
+    lists = defaultdict(list)
+    for chunk in _chunks(article_ids):
+        for pk, other, score in (
+            RelatedArticle.objects.filter(article_id__in=chunk)  # type: ignore
+            .order_by("article_id", "rank")
+            .values_list("article_id", "related_id", "score")
+        ):
+            lists[pk].append((other, score))
+    return lists
+
+
+def rebuild_related_articles():
+    """
+    全量重建相关文章索引
+
+    Returns:
+        写入的相关文章记录数
+    """
+    features = ArticleFeatures.load()
+    options = get_options()
+    lists = {pk: score_related(pk, features, options) for pk in features.category}
+    return _save(lists, full=True)
+
+
+def rescore_related_articles(article_ids):
+    """
+    重新计算这些文章自己的相关文章（如它们列出的文章被删除）
+
+    Returns:
+        重新计算的文章数量
+    """
+    article_ids = set(article_ids)
+    if not article_ids:
+        return 0
+    options = get_options()
+    features = ArticleFeatures.load(article_ids)
+    _save({pk: score_related(pk, features, options) for pk in article_ids})
+    return len(article_ids)
+
+
+def update_related_articles(article_ids):
+    """
+    文章的标签、分类、状态、可见性或发布时间变化后增量更新相关文章索引
+
+    - 只读取变化的文章及其候选文章的特征，重新计算变化的文章的相关文章
+    - 候选文章的相关文章中插入变化的文章：得分进入前 TOP_K 时挤掉最后一名，
+      不对候选文章重新计算
+    - 原来列出变化的文章、而现在它的得分下降或不再是候选的文章，
+      无法只移除它（不知道下一名是谁），只对这些文章重新计算
+
+    IDF随文章数量变化，其他文章之间得分的微小偏差由每天的全量重建修正。
+
+    Returns:
+        相关文章发生变化的文章数量
+    """
+    changed = set(article_ids)
+    if not changed:
+        return 0
+    options = get_options()
+    features = ArticleFeatures.load(changed)
+    lists = {}
+    # 候选文章 -> {变化的文章: 得分}
+    offers = defaultdict(dict)
+    for pk in changed:
+        scored = _candidate_scores(pk, features, options)
+        lists[pk] = _top(scored, options["TOP_K"])
+        for score, other in scored:
+            if other not in changed:
+                offers[other][pk] = score
+
+    holders = set(
+        RelatedArticle.objects.filter(  # type: ignore
+            related_id__in=changed
+        ).values_list("article_id", flat=True)
+    )
+    holders -= changed
+    current = _current_lists(holders | set(offers))
+    rescore = set()
+    for pk in holders | set(offers):
+        old = current.get(pk, [])
+        offer = offers.get(pk, {})
+        if any(
+            other in changed and offer.get(other, 0.0) < score for other, score in old
+        ):
+            rescore.add(pk)
+            continue
+        merged = {other: score for other, score in old if other not in changed}
+        merged.update(offer)
+        new = _top(
+            [(score, other) for other, score in merged.items()], options["TOP_K"]
+        )
+        if new != old:
+            lists[pk] = new
+
+    if rescore:
+        features = ArticleFeatures.load(rescore)
+        for pk in rescore:
+            lists[pk] = score_related(pk, features, options)
+    _save(lists)
+    return len(lists)
+
+
+def schedule_related_update(article_ids, rescore_only=False):
+    """
+    事务提交后更新相关文章索引，ASYNC 时交给Celery任务
+
+    Args:
+        article_ids: 文章ID
+        rescore_only: 这些文章本身没有变化，只重新计算它们自己的相关文章
+    """
+    article_ids = sorted(set(article_ids))
+    if not article_ids:
+        return
+
+    def dispatch():
+        if get_options()["ASYNC"]:
+            from utils.celery.tasks import update_related_articles_task
+
+            try:
+                update_related_articles_task.delay(article_ids, rescore_only)
+                return
+            except Exception:
+                logger.exception("相关文章更新任务提交失败，改为同步计算")
+        if rescore_only:
+            rescore_related_articles(article_ids)
+        else:
+            update_related_articles(article_ids)
+
+    transaction.on_commit(dispatch)
+
+
+def get_related_articles(article):
+    """
+    读取文章的相关文章（一次查询）
+
+    Returns:
+        文章列表，每篇文章带有 related_score 属性
+    """
+    links = (
+        RelatedArticle.objects.filter(  # type: ignore
+            article_id=article.pk,
+            related__status="published",
+            related__visibility="public",
+        )
+        .select_related("related")
+        .defer("related__content")
+        .order_by("rank")
+    )
+    result = []
+    for link in links:
+        link.related.related_score = link.score
+        result.append(link.related)
+    return result
@@ -0,0 +1,100 @@
+"""
+文章Markdown渲染模块
+
+Markdown渲染（extra / codehilite / toc）是文章详情页最主要的CPU开销，
+这里把渲染结果（HTML + 目录）按文章ID和内容哈希持久化到 ArticleRender 表中，
+文章保存时预先渲染，详情页直接读取，不再在请求中运行Markdown流水线。
+"""
+
+import hashlib
+
+import markdown
+from markdown.extensions.toc import TocExtension
+from django.utils.text import slugify
+
+
+def content_hash(content):
+    """计算文章内容的哈希值，用于判断渲染结果是否过期"""
+    return hashlib.sha256((content or "").encode("utf-8")).hexdigest()
+
+
+def render_markdown(content):
+    """
+    将Markdown文本渲染为HTML
+
+    Args:
+        content: Markdown原文
+
+    Returns:
+        (html, toc) 元组
+    """
+    md = markdown.Markdown(
+        extensions=[
+            "markdown.extensions.extra",
+            "markdown.extensions.codehilite",
+            TocExtension(slugify=slugify),
+        ]
+    )
+    html = md.convert(content or "")
+    toc = getattr(md, "toc", "")
+    return html, toc
+
+
+def render_payload(payload):
+    """
+    渲染单篇文章内容，供多进程回填使用
+
+    Args:
+        payload: (article_id, content) 元组
+
+    Returns:
+        (article_id, content_hash, html, toc) 元组
+    """
+    article_id, content = payload
+    html, toc = render_markdown(content)
+    return article_id, content_hash(content), html, toc
+
+
+def render_article(article, force=False):
+    """
+    渲染文章并保存渲染结果，内容未变化时直接返回已有结果
+
+    Args:
+        article: 文章对象
+        force: 是否忽略内容哈希强制重新渲染
+
+    Returns:
+        ArticleRender 对象
+    """
+    from .models import ArticleRender
+
+    digest = content_hash(article.content)
+    if not force:
+        existing = ArticleRender.objects.filter(article_id=article.pk).first()  # type: ignore
+        if existing and existing.content_hash == digest:
+            return existing
+
+    html, toc = render_markdown(article.content)
+    render, _created = ArticleRender.objects.update_or_create(  # type: ignore
+        article_id=article.pk,
+        defaults={"content_hash": digest, "html": html, "toc": toc},
+    )
+    return render
+
+
+def get_rendered_content(article):
+    """
+    获取文章的渲染结果，缺失或内容已变化时重新渲染
+
+    调用方应使用 select_related("render") 加载文章，命中时不产生额外查询。
+    """
+    from .models import ArticleRender
+
+    try:
+        render = article.render
+    except ArticleRender.DoesNotExist:
+        render = None
+
+    if render is None or render.content_hash != content_hash(article.content):
+        render = render_article(article, force=True)
+    return render
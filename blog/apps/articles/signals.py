@@ -0,0 +1,184 @@
+"""
+文章应用信号处理
+"""
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_init,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+
+from .cards import invalidate_article_cards, invalidate_cards
+from .conditional import touch_article_pages, touch_articles
+from .models import Article, Category, Favorite, Like, RelatedArticle, Tag
+from .page_cache import invalidate_all_article_pages, invalidate_article_pages
+from .reactions import invalidate_reactions
+from .related import schedule_related_update
+from .rendering import render_article
+from .taxonomy import invalidate_taxonomy_summary
+
+# 影响分类/标签汇总的文章字段
+TAXONOMY_FIELDS = {"category", "status", "visibility"}
+# 影响相关文章的字段
+RELATED_FIELDS = {"category", "status", "visibility", "published_at"}
+RELATED_ATTNAMES = ("category_id", "status", "visibility", "published_at")
+
+
+@receiver(post_save, sender=Article)
+def refresh_article_render(sender, instance, update_fields=None, **kwargs):
+    """文章保存后预先渲染Markdown内容，内容未变化时跳过"""
+    # 只更新了与内容无关的字段（如浏览量）时无需重新渲染
+    if update_fields is not None and "content" not in update_fields:
+        return
+    render_article(instance)
+
+
+@receiver(post_save, sender=Article)
+@receiver(post_delete, sender=Article)
+def article_taxonomy_changed(sender, instance, update_fields=None, **kwargs):
+    """文章的分类、状态或可见性可能变化时，使分类/标签汇总失效"""
+    # 只更新了浏览量等无关字段时不失效
+    if update_fields is not None and not TAXONOMY_FIELDS & set(update_fields):
+        return
+    invalidate_taxonomy_summary()
+
+
+@receiver(m2m_changed, sender=Article.tags.through)
+def article_tags_changed(sender, action, **kwargs):
+    """文章标签变化时，使分类/标签汇总失效"""
+    if action in ("post_add", "post_remove", "post_clear"):
+        invalidate_taxonomy_summary()
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def taxonomy_changed(sender, **kwargs):
+    """分类或标签增删改时，使分类/标签汇总失效"""
+    invalidate_taxonomy_summary()
+
+
+@receiver(post_save, sender=Like)
+@receiver(post_delete, sender=Like)
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+def reactions_changed(sender, instance, **kwargs):
+    """点赞或收藏变化时，使该用户的点赞/收藏状态缓存失效"""
+    user_id = instance.user_id
+    invalidate_reactions(user_id)
+    # 事务提交前并发请求可能又缓存了旧数据，提交后再失效一次
+    transaction.on_commit(lambda: invalidate_reactions(user_id))
+
+
+def _related_state(instance):
+    """影响相关文章的字段值，有字段被延迟加载时返回None"""
+    values = instance.__dict__
+    if any(name not in values for name in RELATED_ATTNAMES):
+        return None
+    return tuple(values[name] for name in RELATED_ATTNAMES)
+
+
+@receiver(post_init, sender=Article)
+def remember_related_state(sender, instance, **kwargs):
+    """记录文章加载时影响相关文章的字段，用于判断保存时是否真的变化"""
+    instance._related_state = _related_state(instance) if instance.pk else None
+
+
+@receiver(post_save, sender=Article)
+def article_related_changed(sender, instance, created, update_fields=None, **kwargs):
+    """文章的分类、状态、可见性或发布时间变化时，更新相关文章索引"""
+    if update_fields is not None and not RELATED_FIELDS & set(update_fields):
+        return
+    state = _related_state(instance)
+    if created or state is None or state != instance._related_state:
+        schedule_related_update([instance.pk])
+    instance._related_state = state
+
+
+@receiver(m2m_changed, sender=Article.tags.through)
+def article_tags_related_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """文章标签变化时，更新相关文章索引"""
+    if reverse and action == "pre_clear":
+        # 从标签一侧清空时 post_clear 不提供文章ID，先记录关联的文章
+        instance._related_article_ids = list(
+            instance.articles.values_list("pk", flat=True)
+        )
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        schedule_related_update([instance.pk])
+    elif action == "post_clear":
+        schedule_related_update(getattr(instance, "_related_article_ids", []))
+    else:
+        schedule_related_update(pk_set)
+
+
+@receiver(pre_delete, sender=Article)
+def article_related_deleting(sender, instance, **kwargs):
+    """删除文章前记录把它列为相关文章的文章，删除后重新计算"""
+    schedule_related_update(
+        RelatedArticle.objects.filter(related=instance).values_list(  # type: ignore
+            "article_id", flat=True
+        ),
+        rescore_only=True,
+    )
+
+
+@receiver(post_save, sender=Like)
+@receiver(post_delete, sender=Like)
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+def reaction_page_changed(sender, instance, **kwargs):
+    """点赞或收藏变化时，文章页面的计数和状态随之变化"""
+    touch_articles([instance.article_id])
+
+
+@receiver(m2m_changed, sender=Article.tags.through)
+def article_tags_page_changed(sender, instance, action, reverse, **kwargs):
+    """文章标签变化不修改 updated_at，记录文章页面的变化"""
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if reverse:
+        # 从标签一侧修改，受影响的文章可能很多
+        invalidate_cards()
+        touch_article_pages()
+        invalidate_all_article_pages()
+    else:
+        invalidate_article_cards([instance.pk])
+        touch_articles([instance.pk])
+        invalidate_article_pages([instance.pk])
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def taxonomy_page_changed(sender, **kwargs):
+    """分类或标签增删改时，所有文章页面的侧边栏和名称可能变化"""
+    touch_article_pages()
+    invalidate_all_article_pages()
+    invalidate_cards()
+
+
+@receiver(post_save, sender=get_user_model())
+def author_page_changed(sender, instance, created, update_fields=None, **kwargs):
+    """用户改名后，文章页面上的作者和评论者名称随之变化"""
+    # 登录只更新 last_login，无需处理
+    if created or (update_fields is not None and "username" not in update_fields):
+        return
+    touch_article_pages()
+    invalidate_all_article_pages()
+    invalidate_cards()
+
+
+@receiver(post_save, sender=Article)
+@receiver(post_delete, sender=Article)
+def article_page_changed(sender, instance, **kwargs):
+    """文章发布、修改或删除时，使匿名用户的文章页面缓存失效"""
+    invalidate_article_pages([instance.pk])
@@ -0,0 +1,113 @@
+"""
+文章摘要模块
+
+文章保存时从Markdown原文计算纯文本摘要、字数和预计阅读时间并保存到文章表中，
+列表页和API列表直接读取，不再在每次渲染卡片时对整篇正文执行一串正则替换，
+列表查询也可以 defer("content") 不读取正文。
+
+Markdown去格式只扫描一遍原文：逐行处理，跳过代码块和分隔线，
+每行用一个合并后的正则去掉行首标记和行内标记。
+"""
+
+import math
+import re
+
+# 摘要的最大长度（字符）
+EXCERPT_LENGTH = 200
+# 阅读速度：每分钟汉字数和英文单词数
+CJK_CHARS_PER_MINUTE = 400
+WORDS_PER_MINUTE = 200
+# 文章保存时一起更新的字段
+SUMMARY_FIELDS = ("excerpt", "word_count", "reading_time")
+
+# 代码块的开始/结束行
+_FENCE = re.compile(r"^\s*(```|~~~)")
+# 分隔线
+_RULE = re.compile(r"^\s{0,3}([-*_])(\s*\1){2,}\s*$")
+# 行首的标题、引用、列表标记
+_LINE_PREFIX = re.compile(r"^\s{0,3}(?:#{1,6}\s+|(?:>\s?)+|[*+-]\s+|\d+[.)]\s+)")
+# 行内标记：图片、链接、HTML标签、强调和行内代码符号
+_INLINE = re.compile(
+    r"!\[[^\]]*\]\([^)]*\)"
+    r"|\[([^\]]+)\]\([^)]*\)"
+    r"|<[^>\n]+>"
+    r"|\*\*|~~|[*`]|\b__?|__?\b"
+)
+# 计数：汉字按字计，其他文字按单词计
+_CJK_RANGE = r"\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff"
+_COUNTABLE = re.compile(rf"([{_CJK_RANGE}])|[^\W_{_CJK_RANGE}]+")
+
+
+def _inline(match):
+    # 链接保留文字，其余标记删除
+    return match.group(1) or ""
+
+
+def strip_markdown(text):
+    """
+    将Markdown文本转换为纯文本
+
+    Returns:
+        去掉格式后的文本，段落之间用一个换行分隔
+    """
+    lines = []
+    in_code = False
+    for line in (text or "").splitlines():
+        if _FENCE.match(line):
+            in_code = not in_code
+            continue
+        if in_code or _RULE.match(line):
+            continue
+        line = _INLINE.sub(_inline, _LINE_PREFIX.sub("", line)).strip()
+        if line:
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def make_excerpt(plain, length=EXCERPT_LENGTH):
+    """截取纯文本摘要，段落合并为一行"""
+    plain = " ".join(plain.split())
+    if len(plain) <= length:
+        return plain
+    return plain[:length].rstrip() + "..."
+
+
+def _counts(plain):
+    """返回 (汉字数, 单词数)"""
+    cjk = words = 0
+    for match in _COUNTABLE.finditer(plain):
+        if match.group(1):
+            cjk += 1
+        else:
+            words += 1
+    return cjk, words
+
+
+def count_words(plain):
+    """统计字数：汉字按字计，英文和数字按单词计"""
+    return sum(_counts(plain))
+
+
+def _minutes(cjk, words):
+    return max(1, math.ceil(cjk / CJK_CHARS_PER_MINUTE + words / WORDS_PER_MINUTE))
+
+
+def reading_time(plain):
+    """预计阅读时间（分钟），至少为1分钟"""
+    return _minutes(*_counts(plain))
+
+
+def summarize(content):
+    """
+    计算文章摘要信息
+
+    Returns:
+        {"excerpt": ..., "word_count": ..., "reading_time": ...}
+    """
+    plain = strip_markdown(content)
+    cjk, words = _counts(plain)
+    return {
+        "excerpt": make_excerpt(plain),
+        "word_count": cjk + words,
+        "reading_time": _minutes(cjk, words),
+    }
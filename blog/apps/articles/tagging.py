@@ -0,0 +1,125 @@
+"""
+标签解析与关联
+
+文章保存时把用户输入的标签名解析为标签对象并更新文章的标签关联，
+网页视图、后台和API共用：
+
+- resolve_tags: 一条查询读取已有标签（名称不区分大小写），缺少的标签预先分配唯一slug后
+  bulk_create 一次写入（不再逐个 get_or_create 再 save 一次设置slug）。
+- set_article_tags: 读取文章当前的标签ID，与目标标签比较，
+  只插入新增的关联、删除移除的关联，各一条语句。
+"""
+
+import json
+
+from django.db import transaction
+from django.db.models import Q
+
+from utils.slugs import allocate_slug
+
+from .models import Tag
+from .taxonomy import invalidate_taxonomy_summary
+
+# 标签名称的最大长度，与 Tag.name 一致
+MAX_TAG_LENGTH = 50
+
+
+def parse_tag_names(tags_input):
+    """
+    解析标签输入框的内容
+
+    支持Tagify输出的JSON格式（[{"value": "标签"}, ...]）和逗号分隔的文本。
+
+    Returns:
+        去重后的标签名称列表，保持输入顺序
+    """
+    if not tags_input:
+        return []
+    try:
+        tags_data = json.loads(tags_input)
+        names = [tag.get("value", "") for tag in tags_data]
+    except (json.JSONDecodeError, TypeError, AttributeError):
+        names = tags_input.split(",")
+    return clean_tag_names(names)
+
+
+def _tag_key(name):
+    """标签名称的比较键，名称只有大小写不同时视为同一标签"""
+    return name.casefold()
+
+
+def clean_tag_names(names):
+    """去除空白、空名称和重复名称（不区分大小写），保持顺序"""
+    result = {}
+    for name in names:
+        name = str(name).strip()[:MAX_TAG_LENGTH]
+        if name:
+            result.setdefault(_tag_key(name), name)
+    return list(result.values())
+
+
+def resolve_tags(names):
+    """
+    把标签名称解析为标签对象，不存在的标签一次性创建
+
+    Args:
+        names: 标签名称列表
+
+    Returns:
+        标签列表，顺序与 names 一致
+    """
+    names = clean_tag_names(names)
+    if not names:
+        return []
+    # 不区分大小写匹配已有标签，与 MySQL 默认排序规则下的查询结果一致
+    lookup = Q()
+    for name in names:
+        lookup |= Q(name__iexact=name)
+    existing = {}
+    for tag in Tag.objects.filter(lookup).order_by("pk"):  # type: ignore
+        # 同名标签有多个时使用最早创建的
+        existing.setdefault(_tag_key(tag.name), tag)
+
+    missing = [name for name in names if _tag_key(name) not in existing]
+    if missing:
+        slug_length = Tag._meta.get_field("slug").max_length
+        slugs = {name: allocate_slug(name, slug_length) for name in missing}
+        created = Tag.objects.bulk_create(  # type: ignore
+            [Tag(name=name, slug=slugs[name]) for name in missing]
+        )
+        if not all(tag.pk for tag in created):
+            # 数据库不支持 bulk_create 返回主键时重新读取
+            created = Tag.objects.filter(slug__in=slugs.values())  # type: ignore
+        existing.update((_tag_key(tag.name), tag) for tag in created)
+        # bulk_create 不发送 post_save 信号
+        invalidate_taxonomy_summary()
+    return [existing[_tag_key(name)] for name in names]
+
+
+def set_article_tags(article, tags):
+    """
+    把文章的标签设置为 tags，只写入有变化的关联
+
+    通过 tags.add/remove 写入，一次插入、一次删除，并发送 m2m_changed 信号
+    （分类/标签汇总和搜索索引依赖该信号）。
+
+    Args:
+        article: 已保存的文章
+        tags: 标签对象或标签ID的列表
+    """
+    target = {getattr(tag, "pk", tag) for tag in tags}
+    current = set(article.tags.values_list("pk", flat=True))
+    to_remove = current - target
+    to_add = target - current
+    if not to_remove and not to_add:
+        return
+    with transaction.atomic():
+        if to_remove:
+            article.tags.remove(*to_remove)
+        if to_add:
+            article.tags.add(*to_add)
+
+
+def save_article_tags(article, names):
+    """解析标签名称并设置为文章的标签"""
+    set_article_tags(article, resolve_tags(names))
@@ -0,0 +1,63 @@
+"""
+分类和标签侧边栏汇总模块
+
+文章列表、首页和文章表单的侧边栏都需要分类列表、标签列表以及各自的
+已发布文章数量。这里把它们汇总成一个缓存对象，每类各用一条分组查询计算，
+只在文章、分类或标签发生变化时（见 signals.py）失效，视图统一通过
+taxonomy_context 获取。
+"""
+
+from django.db.models import Count, Q
+
+from utils.cache import delete_on_commit, get_or_set
+
+# 汇总数据的缓存键
+TAXONOMY_CACHE_KEY = "taxonomy_summary"
+# 依赖信号失效，过期时间只作为兜底
+TAXONOMY_CACHE_TIMEOUT = 60 * 60
+
+# 计入数量的文章条件：已发布且公开
+PUBLISHED_FILTER = Q(articles__status="published", articles__visibility="public")
+
+
+def build_taxonomy_summary():
+    """
+    从数据库计算分类和标签汇总
+
+    Returns:
+        {"categories": [...], "tags": [...]}，每项为包含 id、name、slug、
+        article_count 的字典；标签只包含至少关联一篇已发布文章的标签
+    """
+    from .models import Category, Tag
+
+    categories = list(
+        Category.objects.annotate(  # type: ignore
+            article_count=Count("articles", filter=PUBLISHED_FILTER)
+        ).values("id", "name", "slug", "article_count")
+    )
+    tags = list(
+        Tag.objects.annotate(  # type: ignore
+            article_count=Count("articles", filter=PUBLISHED_FILTER)
+        )
+        .filter(article_count__gt=0)
+        .values("id", "name", "slug", "article_count")
+    )
+    return {"categories": categories, "tags": tags}
+
+
+def get_taxonomy_summary():
+    """获取分类和标签汇总，优先读取缓存"""
+    return get_or_set(
+        TAXONOMY_CACHE_KEY, build_taxonomy_summary, TAXONOMY_CACHE_TIMEOUT
+    )
+
+
+def taxonomy_context():
+    """返回侧边栏使用的模板上下文（categories 和 tags）"""
+    summary = get_taxonomy_summary()
+    return {"categories": summary["categories"], "tags": summary["tags"]}
+
+
+def invalidate_taxonomy_summary():
+    """使汇总缓存失效"""
+    delete_on_commit(TAXONOMY_CACHE_KEY)
@@ -1,9 +1,34 @@
-from django.test import TestCase, Client
+from io import StringIO
+from unittest import mock
+
+import redis
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 
-from .models import Article, Category, Tag, Like, Favorite
+from .models import (
+    Article,
+    ArticleRender,
+    Category,
+    Tag,
+    Like,
+    Favorite,
+    RelatedArticle,
+)
+from .cards import attach_cards
+from .conditional import article_validators
+from .counters import drain_views, record_view
+from .reactions import attach_reactions, load_reactions
+from .related import ArticleFeatures, get_related_articles
+from .tagging import parse_tag_names, resolve_tags, set_article_tags
+from .rendering import content_hash
+from .taxonomy import get_taxonomy_summary
+from utils.celery.tasks import process_article_views, rebuild_related_articles_task
 
 User = get_user_model()
 
@@ -363,3 +388,1046 @@ class LikeFavoriteTest(TestCase):
         Favorite.objects.create(user=self.user, article=self.article)
         response = self.client.get(url)
         self.assertContains(response, "测试文章")
+
+    def test_my_favorites_ordered_by_favorite_time(self):
+        """收藏夹按收藏时间排序，而不是文章的创建时间"""
+        newer = Article.objects.create(
+            title="较新的文章",
+            content="内容",
+            author=self.user,
+            status="published",
+            visibility="public",
+        )
+        Favorite.objects.create(user=self.user, article=newer)
+        Favorite.objects.create(user=self.user, article=self.article)
+        self.client.login(username="testuser", password="testpassword")
+        response = self.client.get(reverse("articles:my_favorites"))
+        self.assertEqual(response.context["articles"], [self.article, newer])
+
+
+class ArticleRenderTest(TestCase):
+    """文章Markdown预渲染测试"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpassword"
+        )
+        self.article = Article.objects.create(
+            title="渲染文章",
+            content="# 标题\n\n正文内容",
+            author=self.user,
+            status="published",
+            visibility="public",
+        )
+
+    def test_render_created_on_save(self):
+        """测试保存文章时生成渲染结果"""
+        render = ArticleRender.objects.get(article=self.article)
+        self.assertEqual(render.content_hash, content_hash(self.article.content))
+        self.assertIn("<h1", render.html)
+        self.assertIn("标题", render.toc)
+
+    def test_render_refreshed_when_content_changes(self):
+        """测试内容变化时刷新渲染结果"""
+        self.article.content = "## 新标题"
+        self.article.save()
+        render = ArticleRender.objects.get(article=self.article)
+        self.assertEqual(render.content_hash, content_hash("## 新标题"))
+        self.assertIn("<h2", render.html)
+
+    def test_detail_view_uses_stored_render(self):
+        """测试详情页直接使用已保存的渲染结果"""
+        ArticleRender.objects.filter(article=self.article).update(
+            html="<p>预渲染内容</p>"
+        )
+        url = reverse("articles:article_detail", args=[self.article.slug])
+        with mock.patch("apps.articles.rendering.render_markdown") as render_markdown:
+            response = self.client.get(url)
+        render_markdown.assert_not_called()
+        self.assertContains(response, "预渲染内容")
+
+    def test_render_articles_command(self):
+        """测试批量渲染命令"""
+        ArticleRender.objects.all().delete()
+        call_command("render_articles", workers=1, stdout=StringIO())
+        render = ArticleRender.objects.get(article=self.article)
+        self.assertEqual(render.content_hash, content_hash(self.article.content))
+
+
+class FakeViewsRedis:
+    """浏览量缓冲使用的Redis命令的内存实现"""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.values = {}
+        self.sets = {}
+        self.commands = []
+
+    def pipeline(self):
+        self.commands = []
+        return self
+
+    def incrby(self, key, amount):
+        self.commands.append(
+            lambda: self.values.__setitem__(key, self.values.get(key, 0) + amount)
+        )
+
+    def sadd(self, key, member):
+        self.commands.append(lambda: self.sets.setdefault(key, set()).add(str(member)))
+
+    def getdel(self, key):
+        self.commands.append(lambda: self.values.pop(key, None))
+
+    def execute(self):
+        if self.fail:
+            raise redis.ConnectionError("redis down")
+        return [command() for command in self.commands]
+
+    def spop(self, key, count):
+        members = self.sets.get(key, set())
+        return [members.pop() for _ in range(min(count, len(members)))]
+
+
+class ArticleViewCounterTest(TestCase):
+    """文章浏览量缓冲计数测试"""
+
+    def setUp(self):
+        cache.clear()
+        self.redis = FakeViewsRedis()
+        patcher = mock.patch(
+            "apps.articles.counters._redis_client", side_effect=lambda: self.redis
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpassword"
+        )
+        self.article = Article.objects.create(
+            title="计数文章",
+            content="计数文章内容",
+            author=self.user,
+            status="published",
+            visibility="public",
+        )
+
+    def test_views_buffered_until_flush(self):
+        """测试浏览量先写入缓存，定时任务批量写回数据库"""
+        self.article.increase_views()
+        self.article.increase_views()
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.views_count, 0)
+
+        self.assertEqual(process_article_views(), 1)
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.views_count, 2)
+
+        # 已写回的浏览量不会被重复累加
+        self.assertEqual(process_article_views(), 0)
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.views_count, 2)
+
+    def test_flush_only_touches_dirty_articles(self):
+        """测试只写回有新增浏览量的文章"""
+        other = Article.objects.create(
+            title="其他文章", content="其他内容", author=self.user
+        )
+        record_view(other.pk, 3)
+        self.assertEqual(drain_views(), {other.pk: 3})
+        self.assertEqual(drain_views(), {})
+
+    def test_views_written_directly_without_buffer(self):
+        """测试未配置浏览量缓冲时直接写入数据库，不依赖进程内状态"""
+        self.redis = None
+        self.article.increase_views()
+        self.article.increase_views()
+        self.assertEqual(self.article.views_count, 2)
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.views_count, 2)
+        self.assertEqual(process_article_views(), 0)
+
+    def test_buffer_unavailable_writes_directly(self):
+        """测试Redis不可用时浏览量直接写入数据库"""
+        self.redis.fail = True
+        record_view(self.article.pk, 2)
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.views_count, 2)
+
+
+class TaxonomySummaryTest(TestCase):
+    """分类/标签侧边栏汇总测试"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpassword"
+        )
+        self.category = Category.objects.create(name="分类", slug="category")
+        self.tag = Tag.objects.create(name="标签", slug="tag")
+        self.article = Article.objects.create(
+            title="文章",
+            content="内容",
+            author=self.user,
+            category=self.category,
+            status="published",
+            visibility="public",
+        )
+        self.article.tags.add(self.tag)
+        # 草稿不计入数量
+        draft = Article.objects.create(
+            title="草稿", content="内容", author=self.user, category=self.category
+        )
+        draft.tags.add(Tag.objects.create(name="草稿标签", slug="draft-tag"))
+
+    def test_summary_counts_published_articles(self):
+        """汇总只统计已发布且公开的文章"""
+        summary = get_taxonomy_summary()
+        self.assertEqual(
+            [(c["slug"], c["article_count"]) for c in summary["categories"]],
+            [("category", 1)],
+        )
+        self.assertEqual(
+            [(t["slug"], t["article_count"]) for t in summary["tags"]], [("tag", 1)]
+        )
+
+    def test_summary_is_cached(self):
+        """汇总缓存后不再查询数据库"""
+        get_taxonomy_summary()
+        with self.assertNumQueries(0):
+            get_taxonomy_summary()
+
+    def test_invalidated_on_changes(self):
+        """文章、分类或标签变化时汇总失效"""
+        get_taxonomy_summary()
+        Category.objects.create(name="新分类", slug="new-category")
+        self.assertEqual(len(get_taxonomy_summary()["categories"]), 2)
+
+        self.article.tags.remove(self.tag)
+        self.assertEqual(get_taxonomy_summary()["tags"], [])
+
+        self.article.status = "draft"
+        self.article.save()
+        self.assertEqual(get_taxonomy_summary()["categories"][-1]["article_count"], 0)
+
+    def test_view_count_update_keeps_cache(self):
+        """只更新浏览量时汇总不失效"""
+        get_taxonomy_summary()
+        self.article.views_count = 10
+        self.article.save(update_fields=["views_count"])
+        with self.assertNumQueries(0):
+            get_taxonomy_summary()
+
+    def test_sidebar_rendered_from_summary(self):
+        """侧边栏使用汇总中的数量"""
+        response = self.client.get(reverse("articles:article_list"))
+        self.assertContains(response, "分类")
+        with self.assertNumQueries(0):
+            get_taxonomy_summary()
+
+
+class KeysetPaginationTest(TestCase):
+    """文章列表键集分页测试"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpassword"
+        )
+        # 发布时间相同的文章按ID排序，验证游标不会漏掉或重复
+        published_at = timezone.now()
+        self.articles = [
+            Article.objects.create(
+                title=f"文章{i}",
+                content="内容",
+                author=self.user,
+                status="published",
+                visibility="public",
+                published_at=published_at,
+            )
+            for i in range(25)
+        ]
+        self.expected = [a.pk for a in reversed(self.articles)]
+
+    def test_cursor_pages(self):
+        """按游标向后翻页再向前翻页"""
+        url = reverse("articles:article_list")
+        seen = []
+        pages = []
+        response = self.client.get(url)
+        while True:
+            page = response.context["articles"]
+            self.assertIsNone(page.paginator)
+            pages.append([a.pk for a in page])
+            seen.extend(pages[-1])
+            if not page.has_next():
+                break
+            response = self.client.get(f"{url}?{page.next_query}")
+        self.assertEqual(seen, self.expected)
+        self.assertEqual([len(p) for p in pages], [10, 10, 5])
+
+        previous = self.client.get(f"{url}?{page.previous_query}").context["articles"]
+        self.assertEqual([a.pk for a in previous], pages[1])
+
+    def test_page_number_still_supported(self):
+        """带page参数时使用页码分页"""
+        response = self.client.get(reverse("articles:article_list"), {"page": 3})
+        page = response.context["articles"]
+        self.assertEqual(page.number, 3)
+        self.assertEqual([a.pk for a in page], self.expected[20:])
+
+    def test_invalid_cursor_falls_back(self):
+        """无效的游标显示第一页"""
+        response = self.client.get(
+            reverse("articles:article_list"), {"cursor": "not-a-cursor"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [a.pk for a in response.context["articles"]], self.expected[:10]
+        )
+
+    def test_api_cursor_pages(self):
+        """API默认使用页码分页（包含count），带cursor参数时使用游标分页"""
+        url = reverse("article-list")
+        data = self.client.get(url).json()
+        self.assertEqual(data["count"], 25)
+        self.assertIn("page=2", data["next"])
+
+        data = self.client.get(url, {"cursor": ""}).json()
+        self.assertNotIn("count", data)
+        self.assertIsNone(data["previous"])
+        self.assertEqual([a["id"] for a in data["results"]], self.expected[:10])
+
+        data = self.client.get(data["next"]).json()
+        self.assertEqual([a["id"] for a in data["results"]], self.expected[10:20])
+        self.assertIsNotNone(data["previous"])
+
+        self.assertEqual(self.client.get(url, {"count": 1}).json()["count"], 25)
+        self.assertEqual(self.client.get(url, {"page": 2}).json()["count"], 25)
+        self.assertEqual(self.client.get(url, {"cursor": "bad"}).status_code, 404)
+
+
+class ArticleSummaryTest(TestCase):
+    """文章摘要、字数和阅读时间测试"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpassword"
+        )
+        self.article = Article.objects.create(
+            title="摘要测试",
+            content="# 标题\n\n这是**粗体**和[链接](https://example.com)。\n\n"
+            "```python\nprint('code')\n```\n\n- 列表 hello world",
+            author=self.user,
+            status="published",
+            visibility="public",
+        )
+
+    def test_summary_computed_on_save(self):
+        """保存时去除Markdown格式并计算字数和阅读时间"""
+        self.assertEqual(self.article.excerpt, "标题 这是粗体和链接。 列表 hello world")
+        self.assertEqual(self.article.word_count, 13)
+        self.assertEqual(self.article.reading_time, 1)
+
+        self.article.content = "字" * 1000
+        self.article.save(update_fields=["content"])
+        article = Article.objects.get(pk=self.article.pk)
+        self.assertEqual(article.word_count, 1000)
+        self.assertEqual(article.reading_time, 3)
+        self.assertTrue(article.excerpt.endswith("..."))
+
+    def test_list_views_defer_content(self):
+        """列表页不读取正文，显示保存的摘要"""
+        response = self.client.get(reverse("articles:article_list"))
+        article = response.context["articles"][0]
+        self.assertIn("content", article.get_deferred_fields())
+        self.assertContains(response, "这是粗体和链接")
+
+        response = self.client.get(reverse("home"))
+        self.assertIn(
+            "content", response.context["latest_articles"][0].get_deferred_fields()
+        )
+
+    def test_api_list_returns_excerpt(self):
+        """API列表返回摘要和阅读时间"""
+        data = self.client.get(reverse("article-list")).json()["results"][0]
+        self.assertEqual(data["excerpt"], self.article.excerpt)
+        self.assertEqual(data["reading_time"], 1)
+        self.assertNotIn("content", data)
+
+    def test_backfill_command(self):
+        """回填命令为已有文章计算摘要"""
+        Article.objects.update(excerpt="", word_count=0, reading_time=0)
+        out = StringIO()
+        call_command("summarize_articles", stdout=out)
+        self.assertIn("共 1 篇文章", out.getvalue())
+        article = Article.objects.get(pk=self.article.pk)
+        self.assertEqual(article.excerpt, self.article.excerpt)
+        self.assertEqual(article.word_count, 13)
+
+
+class ArticleReactionsTest(TestCase):
+    """列表页点赞/收藏状态批量加载测试"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpassword"
+        )
+        self.articles = [
+            Article.objects.create(
+                title=f"文章{i}",
+                content="内容",
+                author=self.user,
+                status="published",
+                visibility="public",
+            )
+            for i in range(5)
+        ]
+        Like.objects.create(user=self.user, article=self.articles[0])
+        Like.objects.create(user=self.user, article=self.articles[1])
+        Favorite.objects.create(user=self.user, article=self.articles[2])
+
+    def test_two_queries_per_page(self):
+        """一页文章只执行两条查询，与文章数量无关"""
+        ids = [article.pk for article in self.articles]
+        with self.assertNumQueries(2):
+            liked, favorited = load_reactions(self.user, ids, timeout=None)
+        self.assertEqual(liked, {ids[0], ids[1]})
+        self.assertEqual(favorited, {ids[2]})
+
+    def test_cached_and_invalidated_on_toggle(self):
+        """结果按用户缓存，点赞变化后失效"""
+        ids = [article.pk for article in self.articles]
+        load_reactions(self.user, ids)
+        with self.assertNumQueries(0):
+            self.assertEqual(load_reactions(self.user, ids)[0], {ids[0], ids[1]})
+
+        Like.objects.filter(article=self.articles[0]).delete()
+        Like.objects.create(user=self.user, article=self.articles[4])
+        self.assertEqual(load_reactions(self.user, ids)[0], {ids[1], ids[4]})
+
+    def test_anonymous_user(self):
+        """未登录用户不查询"""
+        client_user = Client().get(reverse("home")).wsgi_request.user
+        with self.assertNumQueries(0):
+            articles = attach_reactions(list(self.articles), client_user)
+        self.assertFalse(any(article.user_liked for article in articles))
+
+    def test_list_page_shows_state(self):
+        """文章列表显示当前用户的点赞和收藏状态"""
+        self.client.login(username="testuser", password="testpassword")
+        response = self.client.get(reverse("articles:article_list"))
+        states = {
+            article.pk: (article.user_liked, article.user_favorited)
+            for article in response.context["articles"]
+        }
+        self.assertEqual(states[self.articles[0].pk], (True, False))
+        self.assertEqual(states[self.articles[2].pk], (False, True))
+        self.assertEqual(states[self.articles[3].pk], (False, False))
+        self.assertContains(response, "bi-heart-fill", count=2)
+
+        self.client.post(reverse("articles:toggle_like", args=[self.articles[0].slug]))
+        response = self.client.get(reverse("articles:article_list"))
+        self.assertContains(response, "bi-heart-fill", count=1)
+
+    def test_api_list_returns_state(self):
+        """API列表返回 is_liked 和 is_favorited"""
+        self.client.login(username="testuser", password="testpassword")
+        results = self.client.get(reverse("article-list")).json()["results"]
+        states = {
+            data["id"]: (data["is_liked"], data["is_favorited"]) for data in results
+        }
+        self.assertEqual(states[self.articles[1].pk], (True, False))
+        self.assertEqual(states[self.articles[2].pk], (False, True))
+
+        data = self.client.get(
+            reverse("article-detail", args=[self.articles[0].slug])
+        ).json()
+        self.assertTrue(data["is_liked"])
+
+
+class TagResolverTest(TestCase):
+    """标签批量解析与关联测试"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpassword"
+        )
+        self.python = Tag.objects.create(name="python", slug="python")
+        self.article = Article.objects.create(
+            title="标签测试",
+            content="内容",
+            author=self.user,
+            status="published",
+            visibility="public",
+        )
+
+    def test_parse_tag_names(self):
+        """支持Tagify的JSON格式和逗号分隔，去除空白和重复"""
+        self.assertEqual(parse_tag_names(" a, b ,,a"), ["a", "b"])
+        self.assertEqual(
+            parse_tag_names('[{"value": "标签"}, {"value": " "}]'), ["标签"]
+        )
+        self.assertEqual(parse_tag_names(""), [])
+
+    def test_resolve_tags_in_bulk(self):
+        """已有标签一条查询读取，缺少的标签一次创建并预先分配唯一slug"""
+        # 读取已有标签、批量插入
+        with self.assertNumQueries(2):
+            tags = resolve_tags(["python", "Python", "Django", "Django", "中文"])
+        self.assertEqual([tag.name for tag in tags], ["python", "Django", "中文"])
+        self.assertEqual(tags[0], self.python)
+        self.assertTrue(tags[1].slug.startswith("django-"))
+        self.assertEqual(len({tag.slug for tag in tags}), 3)
+        self.assertTrue(all(tag.pk for tag in tags))
+
+        with self.assertNumQueries(1):
+            self.assertEqual(resolve_tags(["Django"]), [tags[1]])
+
+    def test_resolve_tags_ignores_case(self):
+        """名称只有大小写不同时使用已有标签，不创建重复标签"""
+        web = Tag.objects.create(name="Web", slug="web")
+        with self.assertNumQueries(1):
+            tags = resolve_tags(["PYTHON", "web"])
+        self.assertEqual(tags, [self.python, web])
+        self.assertEqual(Tag.objects.count(), 2)
+
+    def test_set_article_tags_writes_diff(self):
+        """只插入新增的关联、删除移除的关联"""
+        django_tag, web = resolve_tags(["django", "web"])
+        set_article_tags(self.article, [self.python, django_tag])
+
+        with CaptureQueriesContext(connection) as ctx:
+            set_article_tags(self.article, [django_tag, web])
+        writes = [
+            query["sql"].split()[0]
+            for query in ctx.captured_queries
+            if '"articles_article_tags"' in query["sql"]
+            and not query["sql"].startswith("SELECT")
+        ]
+        self.assertEqual(writes, ["DELETE", "INSERT"])
+        self.assertEqual(
+            set(self.article.tags.values_list("name", flat=True)), {"django", "web"}
+        )
+        with self.assertNumQueries(1):
+            set_article_tags(self.article, [web.pk, django_tag.pk])
+
+    def test_views_and_api_share_resolver(self):
+        """网页表单和API都按名称解析标签"""
+        self.client.login(username="testuser", password="testpassword")
+        self.client.post(
+            reverse("articles:article_update", args=[self.article.slug]),
+            {
+                "title": "标签测试",
+                "content": "内容",
+                "status": "published",
+                "visibility": "public",
+                "tags_input": "python, 新标签",
+            },
+        )
+        self.assertEqual(
+            set(self.article.tags.values_list("name", flat=True)), {"python", "新标签"}
+        )
+        self.assertEqual(Tag.objects.filter(name="python").count(), 1)
+
+        response = self.client.patch(
+            reverse("article-detail", args=[self.article.slug]),
+            {"tag_names": ["python", "api"]},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            set(self.article.tags.values_list("name", flat=True)), {"python", "api"}
+        )
+
+
+class SlugAllocationTest(TestCase):
+    """slug在插入前分配，创建只需一次写入"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpassword"
+        )
+
+    def test_create_is_single_write(self):
+        """创建文章和标签时slug随INSERT一起写入，不再UPDATE"""
+        with CaptureQueriesContext(connection) as ctx:
+            article = Article.objects.create(
+                title="Hello World", content="内容", author=self.user
+            )
+            tag = Tag.objects.create(name="中文标签")
+        statements = [
+            query["sql"].split()[0]
+            for query in ctx.captured_queries
+            if not query["sql"].startswith("SELECT")
+            and (
+                '"articles_article" ' in query["sql"]
+                or '"articles_tag" ' in query["sql"]
+            )
+        ]
+        self.assertEqual(statements, ["INSERT", "INSERT"])
+        self.assertTrue(article.slug.startswith("hello-world-"))
+        self.assertTrue(tag.slug)
+        self.assertEqual(Article.objects.get(pk=article.pk).slug, article.slug)
+
+    def test_cjk_titles_get_distinct_slugs(self):
+        """slugify为空的中文标题也能得到互不相同的slug"""
+        slugs = {
+            Article.objects.create(title="测试", content="内容", author=self.user).slug
+            for _ in range(5)
+        }
+        self.assertEqual(len(slugs), 5)
+        self.assertTrue(all(slug.isalnum() for slug in slugs))
+
+    def test_api_create_and_rename(self):
+        """API创建时分配slug，修改标题后重新分配"""
+        self.client.login(username="testuser", password="testpassword")
+        response = self.client.post(
+            reverse("article-list"),
+            {"title": "API Article", "content": "内容"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 201)
+        article = Article.objects.get(title="API Article")
+        self.assertTrue(article.slug.startswith("api-article-"))
+
+        self.client.patch(
+            reverse("article-detail", args=[article.slug]),
+            {"title": "Renamed"},
+            content_type="application/json",
+        )
+        article.refresh_from_db()
+        self.assertTrue(article.slug.startswith("renamed-"))
+
+
+class RelatedArticlesTest(TestCase):
+    """相关文章索引测试"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpassword"
+        )
+        self.category = Category.objects.create(name="分类", slug="category")
+        self.other_category = Category.objects.create(name="其他", slug="other")
+        self.python = Tag.objects.create(name="python")
+        self.django = Tag.objects.create(name="django")
+        self.a = self._article("A", self.category, self.python, self.django)
+        self.b = self._article("B", self.category, self.python, self.django)
+        self.c = self._article("C", self.other_category, self.python)
+        self.d = self._article("D", self.other_category)
+        self.draft = self._article(
+            "草稿", self.category, self.python, self.django, status="draft"
+        )
+        rebuild_related_articles_task()
+
+    def _article(self, title, category, *tags, status="published"):
+        article = Article.objects.create(
+            title=title,
+            content="内容",
+            author=self.user,
+            category=category,
+            status=status,
+            visibility="public",
+        )
+        article.tags.add(*tags)
+        return article
+
+    def test_ranked_by_similarity(self):
+        """按标签和分类相似度排序，不包括无关文章和未发布文章"""
+        related = get_related_articles(self.a)
+        self.assertEqual(related, [self.b, self.c])
+        self.assertGreater(related[0].related_score, related[1].related_score)
+        self.assertEqual(get_related_articles(self.draft), [])
+        self.assertEqual(RelatedArticle.objects.filter(related=self.draft).count(), 0)
+
+    def test_single_query_lookup(self):
+        """详情页一次查询读取相关文章"""
+        with self.assertNumQueries(1):
+            get_related_articles(self.a)
+        response = self.client.get(
+            reverse("articles:article_detail", args=[self.a.slug])
+        )
+        self.assertEqual(list(response.context["related_articles"]), [self.b, self.c])
+
+    def test_incremental_update(self):
+        """标签、状态变化后增量更新受影响文章的相关文章"""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.d.tags.add(self.python)
+        self.assertIn(self.d, get_related_articles(self.a))
+        self.assertIn(self.a, get_related_articles(self.d))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.b.status = "draft"
+            self.b.save(update_fields=["status"])
+        self.assertNotIn(self.b, get_related_articles(self.a))
+        self.assertEqual(get_related_articles(self.b), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.c.delete()
+        self.assertEqual(get_related_articles(self.a), [self.d])
+
+    def _lists(self):
+        return list(
+            RelatedArticle.objects.order_by("article_id", "rank").values_list(
+                "article_id", "related_id"
+            )
+        )
+
+    def test_incremental_matches_rebuild(self):
+        """分类变化后的增量更新与全量重建结果相同"""
+        extra = [
+            self._article(f"E{i}", self.other_category, *([self.python] * (i % 2)))
+            for i in range(6)
+        ]
+        rebuild_related_articles_task()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.a.category = self.other_category
+            self.a.save()
+        incremental = self._lists()
+        rebuild_related_articles_task()
+        self.assertEqual(incremental, self._lists())
+
+        # 移出候选后，原来列出它的文章重新计算
+        with self.captureOnCommitCallbacks(execute=True):
+            extra[0].visibility = "private"
+            extra[0].save()
+        incremental = self._lists()
+        rebuild_related_articles_task()
+        self.assertEqual(incremental, self._lists())
+
+    def test_features_loaded_for_candidates_only(self):
+        """增量更新只读取变化的文章及其候选文章"""
+        features = ArticleFeatures.load([self.d.pk])
+        self.assertEqual(set(features.category), {self.c.pk, self.d.pk})
+        # IDF仍按全部文章统计
+        full = ArticleFeatures.load()
+        self.assertEqual(features.idf, {t: full.idf[t] for t in features.idf})
+
+    def test_unchanged_save_skips_update(self):
+        """只修改正文时不更新相关文章"""
+        with mock.patch("apps.articles.signals.schedule_related_update") as schedule:
+            self.a.content = "新的内容"
+            self.a.save()
+            schedule.assert_not_called()
+            self.a.category = self.other_category
+            self.a.save()
+            schedule.assert_called_once_with([self.a.pk])
+
+    def test_api_detail_returns_related(self):
+        """API详情返回相关文章"""
+        data = self.client.get(reverse("article-detail", args=[self.a.slug])).json()
+        self.assertEqual(
+            [item["slug"] for item in data["related_articles"]],
+            [self.b.slug, self.c.slug],
+        )
+
+
+class ConditionalGetTest(TestCase):
+    """条件请求测试"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpassword"
+        )
+        self.category = Category.objects.create(name="分类", slug="category")
+        self.article = Article.objects.create(
+            title="文章",
+            content="内容",
+            author=self.user,
+            category=self.category,
+            status="published",
+            visibility="public",
+        )
+        self.detail_url = reverse("articles:article_detail", args=[self.article.slug])
+        self.api_url = reverse("article-detail", args=[self.article.slug])
+
+    def _revalidate(self, url, response, **params):
+        return self.client.get(url, params, HTTP_IF_NONE_MATCH=response["ETag"])
+
+    def test_detail_not_modified(self):
+        """ETag匹配时返回304，评论和点赞后ETag变化"""
+        from apps.comments.models import Comment
+
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("no-cache", response["Cache-Control"])
+
+        with mock.patch("apps.articles.views.get_rendered_content") as rendered:
+            not_modified = self._revalidate(self.detail_url, response)
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified["ETag"], response["ETag"])
+        self.assertEqual(not_modified.content, b"")
+        rendered.assert_not_called()
+
+        # 不同的评论页内容不同
+        self.assertEqual(
+            self._revalidate(self.detail_url, response, comment_page=2).status_code,
+            200,
+        )
+
+        Comment.objects.create(
+            content="评论", author=self.user, article=self.article, is_approved=True
+        )
+        self.assertEqual(self._revalidate(self.detail_url, response).status_code, 200)
+
+        response = self.client.get(self.detail_url)
+        Like.objects.create(user=self.user, article=self.article)
+        self.assertEqual(self._revalidate(self.detail_url, response).status_code, 200)
+
+    def test_last_modified_for_anonymous_only(self):
+        """匿名用户可以使用 If-Modified-Since，登录用户的ETag与匿名用户不同"""
+        response = self.client.get(self.detail_url)
+        self.assertEqual(
+            self.client.get(
+                self.detail_url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+            ).status_code,
+            304,
+        )
+
+        self.client.login(username="testuser", password="testpassword")
+        self.assertEqual(self._revalidate(self.detail_url, response).status_code, 200)
+        response = self.client.get(self.detail_url)
+        self.assertNotIn("Last-Modified", response)
+        self.assertIn("private", response["Cache-Control"])
+        self.assertEqual(self._revalidate(self.detail_url, response).status_code, 304)
+
+    def test_article_changes_etag(self):
+        """文章保存、分类改名后ETag变化"""
+        etag, _ = article_validators(self.article, self.user)
+        self.assertEqual(article_validators(self.article, self.user)[0], etag)
+
+        self.article.title = "新标题"
+        self.article.save()
+        changed, _ = article_validators(self.article, self.user)
+        self.assertNotEqual(changed, etag)
+
+        self.category.name = "新分类"
+        self.category.save()
+        self.assertNotEqual(article_validators(self.article, self.user)[0], changed)
+
+    def test_list_not_modified(self):
+        """列表内容和查询参数不变时返回304，发布新文章后变化"""
+        url = reverse("articles:article_list")
+        response = self.client.get(url)
+        self.assertEqual(self._revalidate(url, response).status_code, 304)
+        self.assertEqual(self._revalidate(url, response, page=2).status_code, 200)
+
+        Article.objects.create(
+            title="新文章",
+            content="内容",
+            author=self.user,
+            status="published",
+            visibility="public",
+        )
+        self.assertEqual(self._revalidate(url, response).status_code, 200)
+
+    def test_api_not_modified(self):
+        """API详情和列表支持条件请求"""
+        response = self.client.get(self.api_url)
+        self.assertEqual(self._revalidate(self.api_url, response).status_code, 304)
+
+        list_url = reverse("article-list")
+        response = self.client.get(list_url)
+        self.assertEqual(self._revalidate(list_url, response).status_code, 304)
+
+        Favorite.objects.create(user=self.user, article=self.article)
+        self.assertEqual(self._revalidate(list_url, response).status_code, 200)
+
+
+@override_settings(PAGE_CACHE={"ENABLED": True})
+class AnonymousPageCacheTest(TestCase):
+    """匿名用户整页缓存测试"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpassword"
+        )
+        self.article = Article.objects.create(
+            title="缓存文章",
+            content="缓存文章内容",
+            author=self.user,
+            status="published",
+            visibility="public",
+        )
+        self.list_url = reverse("articles:article_list")
+        self.detail_url = reverse("articles:article_detail", args=[self.article.slug])
+        # 整页缓存命中时浏览量写入共享的缓冲，不查询数据库
+        patcher = mock.patch(
+            "apps.articles.counters._redis_client", return_value=FakeViewsRedis()
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _get_cached(self, url, **extra):
+        """请求页面，返回响应和查询的表（不包括访问日志）"""
+        with CaptureQueriesContext(connection) as queries:
+            response = Client().get(url, **extra)
+        self.assertEqual(response.status_code, 200)
+        sql = [
+            q["sql"]
+            for q in queries.captured_queries
+            if "logs_accesslog" not in q["sql"]
+        ]
+        return response, sql
+
+    def test_list_served_from_cache(self):
+        """第二次匿名请求不查询数据库，发布新文章后失效"""
+        self._get_cached(self.list_url)
+        response, sql = self._get_cached(self.list_url)
+        self.assertEqual(sql, [])
+        self.assertContains(response, "缓存文章")
+        self.assertNotIn("Set-Cookie", response)
+
+        Article.objects.create(
+            title="新发布的文章",
+            content="内容",
+            author=self.user,
+            status="published",
+            visibility="public",
+        )
+        response, sql = self._get_cached(self.list_url)
+        self.assertTrue(sql)
+        self.assertContains(response, "新发布的文章")
+
+    def test_detail_counts_cached_views(self):
+        """详情页缓存命中时仍统计浏览量，不创建会话，同一IP重复访问只计一次"""
+        self._get_cached(self.detail_url)
+        response, sql = self._get_cached(self.detail_url)
+        self.assertEqual(sql, [])
+        self.assertNotIn("sessionid", response.cookies)
+        self.assertEqual(drain_views(), {self.article.pk: 1})
+
+        self._get_cached(self.detail_url, REMOTE_ADDR="10.0.0.2")
+        self._get_cached(self.detail_url, REMOTE_ADDR="10.0.0.2")
+        self.assertEqual(drain_views(), {self.article.pk: 1})
+
+    def test_comment_approval_invalidates(self):
+        """待审核评论不使缓存失效，审核通过后失效"""
+        from apps.comments.models import Comment
+
+        self._get_cached(self.detail_url)
+        comment = Comment.objects.create(
+            content="新的评论", author=self.user, article=self.article
+        )
+        _, sql = self._get_cached(self.detail_url)
+        self.assertEqual(sql, [])
+
+        comment.is_approved = True
+        comment.save()
+        response, sql = self._get_cached(self.detail_url)
+        self.assertTrue(sql)
+        self.assertContains(response, "新的评论")
+
+    def test_admin_bulk_approve_invalidates(self):
+        """后台批量审核后缓存的详情页显示评论，取消审核后不再显示"""
+        from django.contrib.admin.sites import site
+        from django.test import RequestFactory
+
+        from apps.comments.admin import CommentAdmin
+        from apps.comments.models import Comment
+
+        Comment.objects.create(
+            content="批量审核的评论", author=self.user, article=self.article
+        )
+        response, _ = self._get_cached(self.detail_url)
+        self.assertNotContains(response, "批量审核的评论")
+        _, sql = self._get_cached(self.detail_url)
+        self.assertEqual(sql, [])
+
+        admin = CommentAdmin(Comment, site)
+        request = RequestFactory().post("/")
+        admin.approve_comments(request, Comment.objects.all())
+        response, _ = self._get_cached(self.detail_url)
+        self.assertContains(response, "批量审核的评论")
+
+        admin.disapprove_comments(request, Comment.objects.all())
+        response, _ = self._get_cached(self.detail_url)
+        self.assertNotContains(response, "批量审核的评论")
+
+    def test_logged_in_not_cached(self):
+        """登录用户不使用缓存的页面"""
+        self._get_cached(self.list_url)
+        self.client.login(username="testuser", password="testpassword")
+        response = self.client.get(self.list_url)
+        self.assertContains(response, "testuser")
+
+
+class ArticleCardCacheTest(TestCase):
+    """文章卡片片段缓存测试"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpassword"
+        )
+        self.category = Category.objects.create(name="分类", slug="category")
+        self.tag = Tag.objects.create(name="python")
+        self.articles = []
+        for i in range(3):
+            article = Article.objects.create(
+                title=f"卡片文章{i}",
+                content="内容",
+                author=self.user,
+                category=self.category,
+                status="published",
+                visibility="public",
+            )
+            article.tags.add(self.tag)
+            self.articles.append(article)
+
+    def _load(self):
+        return list(Article.objects.select_related("author", "category").order_by("pk"))
+
+    def test_cards_rendered_once(self):
+        """卡片只渲染一次，文章保存后只重新渲染该文章"""
+        self.assertEqual(attach_cards(self._load()), 3)
+        articles = self._load()
+        with self.assertNumQueries(0):
+            self.assertEqual(attach_cards(articles), 0)
+        self.assertIn("卡片文章0", articles[0].card_html)
+        self.assertIn("python", articles[0].card_html)
+
+        self.articles[1].title = "新标题"
+        self.articles[1].save()
+        articles = self._load()
+        self.assertEqual(attach_cards(articles), 1)
+        self.assertIn("新标题", articles[1].card_html)
+
+        # 首页卡片单独缓存
+        self.assertEqual(attach_cards(self._load(), "home"), 3)
+
+    def test_taxonomy_changes_invalidate(self):
+        """文章的标签变化后只重新渲染该文章的卡片，分类改名后全部重新渲染"""
+        attach_cards(self._load())
+        self.articles[0].tags.clear()
+        articles = self._load()
+        self.assertEqual(attach_cards(articles), 1)
+        self.assertNotIn("python", articles[0].card_html)
+
+        self.tag.articles.remove(self.articles[1])
+        self.assertEqual(attach_cards(self._load()), 3)
+
+        self.category.name = "新分类"
+        self.category.save()
+        articles = self._load()
+        self.assertEqual(attach_cards(articles), 3)
+        self.assertIn("新分类", articles[0].card_html)
+
+    def test_list_page_user_controls(self):
+        """列表页缓存的卡片不包含用户状态，点赞状态和编辑按钮每次渲染"""
+        Like.objects.create(user=self.user, article=self.articles[0])
+        url = reverse("articles:article_list")
+        response = self.client.get(url)
+        self.assertNotContains(response, "bi-heart-fill")
+        self.assertNotContains(response, "编辑")
+
+        self.client.login(username="testuser", password="testpassword")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertContains(response, "bi-heart-fill", count=1)
+        self.assertContains(response, "卡片文章2")
+        self.assertContains(response, "编辑")
+        # 卡片已缓存，不再读取标签
+        self.assertFalse(
+            any("articles_article_tags" in q["sql"] for q in queries.captured_queries)
+        )
@@ -1,22 +1,39 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
-import markdown
-from markdown.extensions.toc import TocExtension
-from django.utils.text import slugify
 from django.contrib.auth.decorators import login_required
 from django.utils import timezone
 from django.contrib import messages
 from django.utils.translation import gettext_lazy as _
-import json
-import uuid
-import re
-from django.db import models
-from typing import Any, Optional, cast  # 添加类型提示导入
-from django.views.decorators.cache import cache_page
 from django.conf import settings
-from django.core.cache import cache
 
+from .cards import attach_cards
+from .conditional import (
+    article_validators,
+    list_validators,
+    not_modified,
+    set_validators,
+)
 from .models import Article, Category, Tag, Like, Favorite
+from .page_cache import (
+    LISTS_TAG,
+    PAGES_TAG,
+    article_tag,
+    count_cached_view,
+    is_new_anonymous_view,
+)
+from .reactions import attach_reactions, load_reactions
+from .related import get_related_articles
+from .rendering import get_rendered_content
+from .tagging import parse_tag_names, save_article_tags
+from .taxonomy import taxonomy_context
+from utils.page_cache import (
+    add_page_tags,
+    cache_anonymous_page,
+    is_anonymous_request,
+    set_page_meta,
+)
+from utils.pagination import paginate
+from utils.stats.counters import get_count
 from django import forms
 
 # Create your views here.
@@ -55,15 +72,16 @@ class ArticleForm(forms.ModelForm):
         }
 
 
-# 移除文章列表的缓存装饰器，确保用户登录状态变化时页面正确更新
+# 只缓存匿名请求的整页，登录用户每次渲染，登录状态不会进入缓存
+@cache_anonymous_page(LISTS_TAG, PAGES_TAG)
 def article_list(request, category_slug=None, tag_id=None):
     """文章列表视图，支持分类和标签过滤"""
     # 忽略类型检查器的Django ORM错误
-    # 使用select_related加载author和category，减少数据库查询
+    # 使用select_related加载author、category和统计计数，减少数据库查询
     articles = (
-        Article.objects.select_related("author", "category")
-        .prefetch_related("tags")
+        Article.objects.select_related("author", "category", "stats")
         .filter(status="published", visibility="public")
+        .defer("content")  # 列表显示保存的摘要，不读取正文
     )  # type: ignore
 
     category = None
@@ -77,26 +95,23 @@ def article_list(request, category_slug=None, tag_id=None):
         tag = get_object_or_404(Tag, id=tag_id)
         articles = articles.filter(tags__in=[tag])
 
-    # 分页
-    paginator = Paginator(articles, 10)  # 每页显示10篇文章
-    page = request.GET.get("page")
-    try:
-        articles = paginator.page(page)
-    except PageNotAnInteger:
-        # 如果page参数不是整数，显示第一页
-        articles = paginator.page(1)
-    except EmptyPage:
-        # 如果page参数超出范围，显示最后一页
-        articles = paginator.page(paginator.num_pages)
-
-    # 获取所有分类和标签，用于侧边栏
-    categories = Category.objects.all()  # type: ignore
-    # 只获取至少关联了一篇文章的标签
-    tags = Tag.objects.annotate(articles_count=models.Count("articles")).filter(  # type: ignore
-        articles_count__gt=0
+    # 列表内容未变化时直接返回304，不分页也不渲染模板
+    etag, last_modified = list_validators(
+        articles, request.user, category_slug, tag_id, sorted(request.GET.lists())
     )
+    response = not_modified(request, etag, last_modified)
+    if response is not None:
+        return response
 
-    return render(
+    # 键集分页，按(发布时间, ID)定位，翻页代价与页码无关；带page参数时仍按页码分页
+    page = request.GET.get("page")
+    articles = paginate(request, articles, ("-published_at", "-id"), per_page=10)
+    # 卡片中与用户无关的部分读取缓存（一次get_many），标签只为未命中的卡片加载
+    attach_cards(articles)
+    # 当前用户对本页文章的点赞/收藏状态，两条IN查询
+    attach_reactions(articles, request.user)
+
+    response = render(
         request,
         "articles/list.html",
         {
@@ -104,10 +119,10 @@ def article_list(request, category_slug=None, tag_id=None):
             "category": category,
             "tag": tag,
             "page": page,
-            "categories": categories,
-            "tags": tags,
+            **taxonomy_context(),
         },
     )
+    return set_validators(response, etag, last_modified)
 
 
 @login_required
@@ -116,9 +131,9 @@ def my_published_articles(request):
     # 获取当前用户的已发布文章，不论可见性
     # 使用select_related加载category，减少数据库查询
     articles = (
-        Article.objects.select_related("category")
-        .prefetch_related("tags")
+        Article.objects.select_related("category", "stats")
         .filter(author=request.user, status="published")
+        .defer("content")
     )  # type: ignore
 
     # 分页
@@ -132,13 +147,8 @@ def my_published_articles(request):
     except EmptyPage:
         # 如果page参数超出范围，显示最后一页
         articles = paginator.page(paginator.num_pages)
-
-    # 获取所有分类和标签，用于侧边栏
-    categories = Category.objects.all()  # type: ignore
-    # 只获取至少关联了一篇文章的标签
-    tags = Tag.objects.annotate(articles_count=models.Count("articles")).filter(  # type: ignore
-        articles_count__gt=0
-    )
+    attach_cards(articles)
+    attach_reactions(articles, request.user)
 
     return render(
         request,
@@ -146,8 +156,7 @@ def my_published_articles(request):
         {
             "articles": articles,
             "page": page,
-            "categories": categories,
-            "tags": tags,
+            **taxonomy_context(),
             "is_my_articles": True,  # 用于模板中区分是否是我的文章视图
             "view_type": "published",  # 用于区分是已发布文章视图
         },
@@ -160,9 +169,9 @@ def my_draft_articles(request):
     # 获取当前用户的草稿文章
     # 使用select_related加载category，减少数据库查询
     articles = (
-        Article.objects.select_related("category")
-        .prefetch_related("tags")
+        Article.objects.select_related("category", "stats")
         .filter(author=request.user, status="draft")
+        .defer("content")
     )  # type: ignore
 
     # 分页
@@ -176,13 +185,8 @@ def my_draft_articles(request):
     except EmptyPage:
         # 如果page参数超出范围，显示最后一页
         articles = paginator.page(paginator.num_pages)
-
-    # 获取所有分类和标签，用于侧边栏
-    categories = Category.objects.all()  # type: ignore
-    # 只获取至少关联了一篇文章的标签
-    tags = Tag.objects.annotate(articles_count=models.Count("articles")).filter(  # type: ignore
-        articles_count__gt=0
-    )
+    attach_cards(articles)
+    attach_reactions(articles, request.user)
 
     return render(
         request,
@@ -190,52 +194,25 @@ def my_draft_articles(request):
         {
             "articles": articles,
             "page": page,
-            "categories": categories,
-            "tags": tags,
+            **taxonomy_context(),
             "is_my_articles": True,  # 用于模板中区分是否是我的文章视图
             "view_type": "draft",  # 用于区分是草稿文章视图
         },
     )
 
 
-def generate_unique_slug(tag_name):
-    """生成唯一的标签slug，确保中文标签也能有有效的slug"""
-    # 尝试使用slugify处理
-    tag_slug = slugify(tag_name)
-
-    # 如果slugify后为空（例如纯中文标签），则使用随机字符串
-    if not tag_slug:
-        # 提取首字母或数字作为前缀
-        prefix = "".join(re.findall(r"[a-zA-Z0-9]", tag_name))
-        if not prefix:
-            prefix = "tag"  # 如果没有提取到任何字母或数字，使用默认前缀
-
-        # 添加随机字符串作为后缀
-        random_suffix = str(uuid.uuid4())[:8]
-        tag_slug = f"{prefix}-{random_suffix}"
-
-    # 检查是否已存在相同的slug
-    counter = 1
-    original_slug = tag_slug
-    while Tag.objects.filter(slug=tag_slug).exists():  # type: ignore
-        # 如果已存在，添加数字后缀
-        tag_slug = f"{original_slug}-{counter}"
-        counter += 1
-
-    return tag_slug
-
-
+@cache_anonymous_page(PAGES_TAG, on_hit=count_cached_view)
 def article_detail(request, article_slug):
     """文章详情视图"""
-    # 使用select_related预加载author和category，使用prefetch_related预加载tags和评论
+    # 使用select_related预加载author和category，使用prefetch_related预加载tags
+    # 评论由评论树单独加载
     article = get_object_or_404(
-        Article.objects.select_related("author", "category").prefetch_related(
-            "tags",
-            "comments__author",  # 预加载评论及评论作者
-            "comments__replies__author",  # 预加载评论回复及回复作者
-        ),
+        Article.objects.select_related(
+            "author", "category", "render", "stats"
+        ).prefetch_related("tags"),
         slug=article_slug,
     )
+    add_page_tags(request, article_tag(article.pk))
 
     # 检查是否是文章作者，如果不是，则只能查看已发布且公开的文章
     if article.author != request.user:
@@ -244,58 +221,47 @@ def article_detail(request, article_slug):
             return redirect("articles:article_list")
 
     # 增加文章浏览量
-    # 使用session避免刷新页面重复增加浏览量
     session_key = f"viewed_article_{article.pk}"
-    if not request.session.get(session_key, False):
+    if is_anonymous_request(request):
+        # 没有会话的匿名访问按IP去重计数，不创建会话，页面可以整页缓存；
+        # 缓存命中时由 count_cached_view 计数
+        if is_new_anonymous_view(request, article.pk):
+            article.increase_views()
+        set_page_meta(request, article_id=article.pk)
+    elif not request.session.get(session_key, False):
+        # 使用session避免刷新页面重复增加浏览量
         article.increase_views()
         # 设置session标记，使得在一段时间内不重复计数
         request.session[session_key] = True
         # 设置过期时间为30分钟
         request.session.set_expiry(1800)
 
-    # 使用Markdown渲染文章内容
-    md = markdown.Markdown(
-        extensions=[
-            "markdown.extensions.extra",
-            "markdown.extensions.codehilite",
-            TocExtension(slugify=slugify),
-        ]
-    )
-    article.content = md.convert(article.content)
+    try:
+        comment_page = max(int(request.GET.get("comment_page", 1)), 1)
+    except ValueError:
+        comment_page = 1
+
+    # 文章、评论和点赞收藏等未变化时直接返回304，不渲染正文、评论和模板
+    etag, last_modified = article_validators(article, request.user, comment_page)
+    response = not_modified(request, etag, last_modified)
+    if response is not None:
+        return response
+
+    # 读取预先渲染好的Markdown内容，内容变化或缺失时才重新渲染
+    rendered = get_rendered_content(article)
+    article.content = rendered.html
 
     # 为文章添加目录属性 - 使用类型忽略注解
     # 在Python中，动态添加的属性不会被类型检查器识别，使用setattr避免这个问题
-    toc_value = ""
-    if hasattr(md, "toc"):  # type: ignore
-        toc_value = md.toc  # type: ignore
-    setattr(article, "toc", toc_value)
-
-    # 获取相关文章（同一分类或有共同标签的文章）
-    if article.category:
-        # 使用select_related预加载作者数据
-        related_articles = (
-            Article.objects.select_related("author")
-            .filter(  # type: ignore
-                category=article.category, status="published", visibility="public"
-            )
-            .exclude(pk=article.pk)[:5]
-        )
-    else:
-        # 如果没有分类，尝试通过标签获取相关文章
-        related_articles = (
-            Article.objects.filter(  # type: ignore
-                tags__in=article.tags.all(), status="published", visibility="public"
-            )
-            .exclude(pk=article.pk)
-            .distinct()[:5]
-        )
+    setattr(article, "toc", rendered.toc)
 
-    # 获取文章评论列表
-    from apps.comments.models import Comment
+    # 读取预先计算的相关文章（按标签、分类和发布时间的相似度排序），一次查询
+    related_articles = get_related_articles(article)
 
-    comments = Comment.objects.filter(  # type: ignore
-        article=article, parent=None, is_approved=True
-    ).select_related("author")
+    # 获取文章评论树：一次查询读取全部已审核评论，按顶级评论分页
+    from apps.comments.tree import load_comment_tree
+
+    comments = load_comment_tree(article, page=comment_page)
 
     # 为评论创建表单
     from apps.comments.views import CommentForm
@@ -303,15 +269,11 @@ def article_detail(request, article_slug):
     comment_form = CommentForm()
 
     # 检查当前用户是否已经点赞和收藏
-    user_liked = False
-    user_favorited = False
-    if request.user.is_authenticated:
-        user_liked = Like.objects.filter(user=request.user, article=article).exists()  # type: ignore
-        user_favorited = Favorite.objects.filter(  # type: ignore
-            user=request.user, article=article
-        ).exists()
+    liked, favorited = load_reactions(request.user, [article.pk])
+    user_liked = article.pk in liked
+    user_favorited = article.pk in favorited
 
-    return render(
+    response = render(
         request,
         "articles/detail.html",
         {
@@ -323,30 +285,29 @@ def article_detail(request, article_slug):
             "comment_form": comment_form,
         },
     )
+    return set_validators(response, etag, last_modified)
 
 
-# 移除首页的缓存装饰器，确保每次请求都获取最新的登录状态
+# 只缓存匿名请求的整页
+@cache_anonymous_page(LISTS_TAG, PAGES_TAG)
 def home(request):
     """首页视图，展示最新发布的文章"""
     # 获取已发布且公开的文章，按发布时间排序
-    latest_articles = Article.objects.filter(  # type: ignore
-        status="published", visibility="public"
-    ).order_by("-published_at")[:8]  # 显示最新的8篇文章
-
-    # 获取所有分类和标签，用于侧边栏
-    categories = Category.objects.all()  # type: ignore
-    # 只获取至少关联了一篇文章的标签
-    tags = Tag.objects.annotate(articles_count=models.Count("articles")).filter(  # type: ignore
-        articles_count__gt=0
+    latest_articles = (
+        Article.objects.select_related("category", "stats")
+        .filter(status="published", visibility="public")  # type: ignore
+        .defer("content")  # 卡片显示保存的摘要，不读取正文
+        .order_by("-published_at")[:8]  # 显示最新的8篇文章
     )
+    attach_cards(latest_articles, "home")
+    attach_reactions(latest_articles, request.user)
 
     return render(
         request,
         "articles/home.html",
         {
             "latest_articles": latest_articles,
-            "categories": categories,
-            "tags": tags,
+            **taxonomy_context(),
         },
     )
 
@@ -363,48 +324,19 @@ def article_create(request):
             article.save()
 
             # 处理标签输入
-            tags_input = form.cleaned_data.get("tags_input", "")
-            if tags_input:
-                try:
-                    # 尝试解析可能的JSON格式
-                    tags_data = json.loads(tags_input)
-                    # 如果是Tagify输出的格式，提取标签值
-                    tag_names = [
-                        tag.get("value", "").strip()
-                        for tag in tags_data
-                        if tag.get("value", "").strip()
-                    ]
-                except (json.JSONDecodeError, TypeError, AttributeError):
-                    # 如果不是JSON或解析失败，按传统方式处理（逗号分隔）
-                    tag_names = [t.strip() for t in tags_input.split(",") if t.strip()]
-
-                # 为每个标签名称创建或获取标签实例
-                for tag_name in tag_names:
-                    # 获取或创建标签
-                    tag, created = Tag.objects.get_or_create(name=tag_name)  # type: ignore
-
-                    # 如果是新创建的标签，需要保存让其生成ID后自动设置slug
-                    if created:
-                        tag.save()
-
-                    # 添加标签到文章
-                    article.tags.add(tag)
+            save_article_tags(
+                article, parse_tag_names(form.cleaned_data.get("tags_input", ""))
+            )
 
             messages.success(request, _("文章创建成功！"))
             return redirect("articles:article_detail", article_slug=article.slug)
     else:
         form = ArticleForm()
 
-    categories = Category.objects.all()  # type: ignore
-    # 只获取至少关联了一篇文章的标签
-    tags = Tag.objects.annotate(articles_count=models.Count("articles")).filter(  # type: ignore
-        articles_count__gt=0
-    )
-
     return render(
         request,
         "articles/article_form.html",
-        {"form": form, "categories": categories, "tags": tags, "is_create": True},
+        {"form": form, "is_create": True, **taxonomy_context()},
     )
 
 
@@ -426,36 +358,10 @@ def article_update(request, article_slug):
                 article.published_at = timezone.now()
             article.save()
 
-            # 处理标签输入
+            # 处理标签输入，只写入有变化的标签关联
             tags_input = form.cleaned_data.get("tags_input", "")
             if tags_input:
-                # 先清除现有标签
-                article.tags.clear()
-
-                try:
-                    # 尝试解析可能的JSON格式
-                    tags_data = json.loads(tags_input)
-                    # 如果是Tagify输出的格式，提取标签值
-                    tag_names = [
-                        tag.get("value", "").strip()
-                        for tag in tags_data
-                        if tag.get("value", "").strip()
-                    ]
-                except (json.JSONDecodeError, TypeError, AttributeError):
-                    # 如果不是JSON或解析失败，按传统方式处理（逗号分隔）
-                    tag_names = [t.strip() for t in tags_input.split(",") if t.strip()]
-
-                # 为每个标签名称创建或获取标签实例
-                for tag_name in tag_names:
-                    # 获取或创建标签
-                    tag, created = Tag.objects.get_or_create(name=tag_name)  # type: ignore
-
-                    # 如果是新创建的标签，需要保存让其生成ID后自动设置slug
-                    if created:
-                        tag.save()
-
-                    # 添加标签到文章
-                    article.tags.add(tag)
+                save_article_tags(article, parse_tag_names(tags_input))
 
             messages.success(request, _("文章更新成功！"))
             return redirect("articles:article_detail", article_slug=article.slug)
@@ -464,20 +370,13 @@ def article_update(request, article_slug):
         existing_tags = ", ".join([tag.name for tag in article.tags.all()])
         form = ArticleForm(instance=article, initial={"tags_input": existing_tags})
 
-    categories = Category.objects.all()  # type: ignore
-    # 只获取至少关联了一篇文章的标签
-    tags = Tag.objects.annotate(articles_count=models.Count("articles")).filter(  # type: ignore
-        articles_count__gt=0
-    )
-
     return render(
         request,
         "articles/article_form.html",
         {
             "form": form,
             "article": article,
-            "categories": categories,
-            "tags": tags,
+            **taxonomy_context(),
             "is_create": False,
         },
     )
@@ -522,7 +421,7 @@ def toggle_like(request, article_slug):
     if request.headers.get("x-requested-with") == "XMLHttpRequest":
         from django.http import JsonResponse
 
-        likes_count = Like.objects.filter(article=article).count()  # type: ignore
+        likes_count = get_count(article.pk, "likes_count")
         return JsonResponse(
             {
                 "status": "success",
@@ -559,7 +458,7 @@ def toggle_favorite(request, article_slug):
     if request.headers.get("x-requested-with") == "XMLHttpRequest":
         from django.http import JsonResponse
 
-        favorites_count = Favorite.objects.filter(article=article).count()  # type: ignore
+        favorites_count = get_count(article.pk, "favorites_count")
         return JsonResponse(
             {
                 "status": "success",
@@ -594,44 +493,27 @@ def publish_article(request, article_slug):
 @login_required
 def my_favorites(request):
     """用户收藏夹视图，显示用户收藏的所有文章"""
-    # 获取用户收藏的所有文章
-    favorite_articles = (
-        Article.objects.filter(favorites__user=request.user)
-        .select_related("author", "category")
-        .prefetch_related("tags")
+    # 获取用户的所有收藏，按收藏时间排序
+    favorites = (
+        Favorite.objects.filter(user=request.user)
+        .select_related("article__author", "article__category", "article__stats")
+        .prefetch_related("article__tags")
+        .defer("article__content")
     )
 
-    # 对文章进行分页
-    paginator = Paginator(favorite_articles, 10)  # 每页显示 10 篇文章
-    page_number = request.GET.get("page", 1)
-
-    try:
-        page_obj = paginator.page(page_number)
-    except (PageNotAnInteger, EmptyPage):
-        page_obj = paginator.page(1)
-
-    # 为每篇文章添加点赞和收藏状态
-    for article in page_obj:
-        article.user_liked = (
-            True
-            if request.user.is_authenticated
-            and Like.objects.filter(user=request.user, article=article).exists()
-            else False
-        )
+    # 对收藏进行键集分页，带page参数时仍按页码分页
+    page_obj = paginate(request, favorites, ("-created_at", "-id"), per_page=10)
+    articles = [favorite.article for favorite in page_obj]
 
-        article.user_favorited = (
-            True
-            if request.user.is_authenticated
-            and Favorite.objects.filter(user=request.user, article=article).exists()
-            else False
-        )
+    # 为每篇文章添加点赞和收藏状态，两条IN查询
+    attach_reactions(articles, request.user)
 
     return render(
         request,
         "articles/favorites.html",
         {
             "page_obj": page_obj,
-            "articles": page_obj.object_list,
+            "articles": articles,
             "is_favorites": True,
         },
     )
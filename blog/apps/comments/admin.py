@@ -1,7 +1,10 @@
 from django.contrib import admin
 from django.utils.translation import gettext_lazy as _
 
+from utils.stats.counters import reconcile_articles
+
 from .models import Comment
+from .signals import comments_changed
 
 # Register your models here.
 
@@ -22,12 +25,19 @@ class CommentAdmin(admin.ModelAdmin):
 
     def approve_comments(self, request, queryset):
         """批量审核通过评论"""
+        # 批量更新不会触发信号，更新后重新计算评论数并使相关文章的缓存失效
+        article_ids = set(queryset.values_list("article_id", flat=True))
         queryset.update(is_approved=True)
+        reconcile_articles(article_ids)
+        comments_changed(article_ids)
 
     approve_comments.short_description = _("审核通过选中的评论")
 
     def disapprove_comments(self, request, queryset):
         """批量取消审核通过评论"""
+        article_ids = set(queryset.values_list("article_id", flat=True))
         queryset.update(is_approved=False)
+        reconcile_articles(article_ids)
+        comments_changed(article_ids)
 
     disapprove_comments.short_description = _("取消审核通过选中的评论")
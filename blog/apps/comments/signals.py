@@ -0,0 +1,43 @@
+"""
+评论应用信号处理
+
+评论或作者变化时使评论树缓存失效，并记录文章页面的变化（见 apps/articles/conditional.py）。
+"""
+
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.articles.conditional import touch_articles
+from apps.articles.page_cache import invalidate_article_pages
+from utils.cache import invalidate_namespace
+
+from .models import Comment
+from .tree import CACHE_NAMESPACE, invalidate_comment_tree
+
+User = get_user_model()
+
+
+def comments_changed(article_ids, pages=True):
+    """文章的评论发生变化：评论树缓存和ETag失效，pages 为真时页面缓存也失效"""
+    article_ids = set(article_ids)
+    for article_id in article_ids:
+        invalidate_comment_tree(article_id)
+    touch_articles(article_ids)
+    if pages:
+        invalidate_article_pages(article_ids)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, created=False, **kwargs):
+    # 新提交的待审核评论不显示，审核通过（或修改、删除）时才使页面缓存失效
+    comments_changed([instance.article_id], pages=instance.is_approved or not created)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    # 评论树缓存中保存了作者用户名，改名后全部失效；登录只更新 last_login，无需处理
+    if created or (update_fields is not None and "username" not in update_fields):
+        return
+    invalidate_namespace(CACHE_NAMESPACE)
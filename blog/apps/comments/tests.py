@@ -1,3 +1,4 @@
+from django.core.cache import cache
 from django.test import TestCase, Client
 from django.urls import reverse
 from django.contrib.auth import get_user_model
@@ -173,6 +174,38 @@ class CommentViewTest(TestCase):
         self.assertEqual(new_comment.article, self.article)
         self.assertTrue(new_comment.is_approved)  # 默认通过审核
 
+    def test_sensitive_comment_pending(self):
+        """包含敏感词的评论需要审核，网页和API使用同一匹配器；非管理员的API评论始终需要审核"""
+        from utils.models import SensitiveWord
+
+        SensitiveWord.objects.create(word="广告")
+        self.client.login(username="testuser", password="testpassword")
+        url = reverse("comments:add_comment", args=[self.article.slug])
+        self.client.post(url, {"content": "这是一条广告"})
+        self.assertFalse(Comment.objects.get(content="这是一条广告").is_approved)
+
+        response = self.client.post(
+            reverse("comment-list"),
+            {"article": self.article.pk, "content": "API广告"},
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertFalse(Comment.objects.get(content="API广告").is_approved)
+
+        self.client.post(
+            reverse("comment-list"), {"article": self.article.pk, "content": "正常评论"}
+        )
+        self.assertFalse(Comment.objects.get(content="正常评论").is_approved)
+
+        # 管理员的API评论同样经过敏感词匹配
+        self.client.login(username="adminuser", password="adminpassword")
+        for content in ("管理员的广告评论", "管理员的正常评论"):
+            self.client.post(
+                reverse("comment-list"),
+                {"article": self.article.pk, "content": content},
+            )
+        self.assertFalse(Comment.objects.get(content="管理员的广告评论").is_approved)
+        self.assertTrue(Comment.objects.get(content="管理员的正常评论").is_approved)
+
     def test_add_reply(self):
         """测试添加回复"""
         url = reverse("comments:add_comment", args=[self.article.slug])
@@ -270,3 +303,146 @@ class CommentViewTest(TestCase):
 
         # 验证评论已被删除
         self.assertEqual(Comment.objects.filter(id=another_pending_id).count(), 0)
+
+
+class CommentTreeTest(TestCase):
+    """评论树加载测试"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpassword"
+        )
+        self.article = Article.objects.create(
+            title="测试文章",
+            content="测试文章内容",
+            author=self.user,
+            status="published",
+            visibility="public",
+        )
+        self.root = self.create_comment("顶级评论")
+        self.child = self.create_comment("回复", parent=self.root)
+        self.grandchild = self.create_comment("回复的回复", parent=self.child)
+        self.deep = self.create_comment("更深的回复", parent=self.grandchild)
+        # 未审核的评论及其回复都不显示
+        self.hidden = self.create_comment("未审核", parent=self.root, is_approved=False)
+        self.create_comment("未审核评论的回复", parent=self.hidden)
+
+    def create_comment(self, content, parent=None, is_approved=True):
+        return Comment.objects.create(
+            content=content,
+            author=self.user,
+            article=self.article,
+            parent=parent,
+            is_approved=is_approved,
+        )
+
+    def test_tree_loaded_in_one_query(self):
+        """一次查询读取评论树，遍历时不再查询"""
+        from .tree import load_comment_tree
+
+        with self.assertNumQueries(1):
+            tree = load_comment_tree(self.article, max_depth=None)
+            root = tree.threads[0]
+            self.assertEqual(root.children[0].children[0].children[0].pk, self.deep.pk)
+            self.assertEqual(root.children[0].parent.author.username, "testuser")
+        self.assertEqual([c.pk for c in root.children], [self.child.pk])
+        self.assertEqual(tree.total, 4)
+
+    def test_max_depth_flattens_replies(self):
+        """超过最大层数的回复平铺到最后一层"""
+        from .tree import load_comment_tree
+
+        root = load_comment_tree(self.article, max_depth=1).threads[0]
+        self.assertEqual(
+            [c.pk for c in root.children],
+            [self.child.pk, self.grandchild.pk, self.deep.pk],
+        )
+        self.assertEqual({c.depth for c in root.children}, {1})
+
+    def test_threads_paginated(self):
+        """顶级评论分页"""
+        from .tree import load_comment_tree
+
+        newer = self.create_comment("较新的评论")
+        tree = load_comment_tree(self.article, per_page=1)
+        self.assertEqual([c.pk for c in tree], [newer.pk])
+        self.assertTrue(tree.has_next())
+        tree = load_comment_tree(self.article, page=2, per_page=1)
+        self.assertEqual([c.pk for c in tree], [self.root.pk])
+        self.assertFalse(tree.has_next())
+
+    def test_detail_page_renders_tree(self):
+        """文章详情页渲染嵌套回复，查询数与回复数量无关"""
+        url = reverse("articles:article_detail", args=[self.article.slug])
+        response = self.client.get(url)
+        self.assertContains(response, "更深的回复")
+        self.assertNotContains(response, "未审核评论的回复")
+
+        expected = self.count_queries(url)
+        for i in range(5):
+            self.create_comment(f"新的回复{i}", parent=self.deep)
+        self.assertEqual(self.count_queries(url), expected)
+
+    def count_queries(self, url):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        return len(queries)
+
+    def test_api_nested_replies(self):
+        """API列表从评论树返回嵌套回复，不包含未审核的回复"""
+        response = self.client.get(
+            reverse("comment-list"), {"article": self.article.pk}
+        )
+        self.assertEqual(response.status_code, 200)
+        root = response.json()["results"][0]
+        self.assertEqual([r["id"] for r in root["replies"]], [self.child.pk])
+        self.assertEqual(
+            root["replies"][0]["replies"][0]["replies"][0]["id"], self.deep.pk
+        )
+
+    def test_tree_cached_and_invalidated(self):
+        """评论树缓存，评论变化或作者改名后失效"""
+        from .tree import load_comment_tree
+
+        load_comment_tree(self.article)
+        with self.assertNumQueries(0):
+            load_comment_tree(self.article)
+
+        reply = self.create_comment("新的回复", parent=self.root)
+        self.assertEqual(load_comment_tree(self.article).total, 5)
+
+        reply.delete()
+        self.assertEqual(load_comment_tree(self.article).total, 4)
+
+        self.user.username = "renamed"
+        self.user.save()
+        tree = load_comment_tree(self.article)
+        self.assertEqual(tree.threads[0].author.username, "renamed")
+
+    def test_cache_holds_plain_fields(self):
+        """缓存中只有模板需要的字段，不包括作者的密码和邮箱"""
+        from utils.cache import namespaced_key
+
+        from .tree import CACHE_NAMESPACE, load_comment_tree
+
+        load_comment_tree(self.article)
+        rows, _, _ = cache.get(namespaced_key(CACHE_NAMESPACE, self.article.pk))
+        self.assertTrue(all(isinstance(row, dict) for row in rows))
+        self.assertEqual(
+            set(rows[0]),
+            {
+                "id",
+                "parent_id",
+                "content",
+                "created_at",
+                "author_id",
+                "author_username",
+            },
+        )
+        self.assertNotIn(self.user.password, repr(rows))
+        self.assertNotIn(self.user.email, repr(rows))
@@ -0,0 +1,217 @@
+"""
+评论树加载
+
+一次查询读取文章的全部可见评论及作者，在内存中按 parent_id 组装为嵌套结构（O(n)），
+模板和API都从该结构渲染，不再逐个节点查询回复。
+
+组装后每条评论带有：
+    children: 子评论列表
+    depth: 嵌套深度，顶级评论为0
+
+文章的已审核评论列表缓存在 comments 命名空间下，评论变化时删除对应文章的缓存，
+用户改名时使整个命名空间失效（见 signals.py）。缓存中只保存模板需要的字段（dict），
+不保存模型实例，避免把作者的密码哈希、邮箱等写入缓存；读取后还原为未保存的模型实例，
+作者只有 id 和 username。
+"""
+
+from collections import defaultdict
+
+from django.contrib.auth import get_user_model
+from django.db.models import F, Q
+
+from utils.cache import delete_on_commit, get_or_set, namespaced_key
+
+from .models import Comment
+
+# 回复的最大嵌套层数，更深的回复平铺到最后一层
+MAX_DEPTH = 3
+# 文章详情页每页显示的顶级评论数量
+THREADS_PER_PAGE = 20
+# 评论的显示顺序，与 Comment.Meta.ordering 一致
+ORDERING = ("-created_at", "-id")
+# 已审核评论列表的缓存命名空间和有效时间
+CACHE_NAMESPACE = "comments"
+CACHE_TIMEOUT = 60 * 5
+# 缓存的评论字段
+CACHED_FIELDS = ("id", "parent_id", "content", "created_at", "author_id")
+
+
+def _descendants(node, by_parent):
+    """按显示顺序返回节点的全部后代"""
+    result = []
+    stack = list(reversed(by_parent.get(node.pk, [])))
+    while stack:
+        child = stack.pop()
+        result.append(child)
+        stack.extend(reversed(by_parent.get(child.pk, [])))
+    return result
+
+
+def assemble(roots, by_parent, max_depth=None):
+    """
+    从根节点开始组装评论树
+
+    Args:
+        roots: 根评论列表
+        by_parent: {父评论ID: [子评论, ...]}，子评论按显示顺序排列
+        max_depth: 回复最多嵌套的层数，None表示不限制
+    """
+    stack = [(root, 0) for root in roots]
+    while stack:
+        node, depth = stack.pop()
+        node.depth = depth
+        if max_depth is not None and depth + 1 >= max_depth:
+            # 达到最大层数，后代全部平铺为该节点的子评论
+            node.children = _descendants(node, by_parent)
+            for child in node.children:
+                child.depth = depth + 1
+                child.children = []
+            continue
+        node.children = by_parent.get(node.pk, [])
+        stack.extend((child, depth + 1) for child in node.children)
+    return roots
+
+
+def _count_visible(by_parent):
+    """统计从顶级评论可以到达的评论数量（父评论未审核的回复不计入）"""
+    total = 0
+    stack = [None]
+    while stack:
+        children = by_parent.get(stack.pop(), [])
+        total += len(children)
+        stack.extend(child.pk for child in children)
+    return total
+
+
+def _index(comments):
+    """按父评论分组，并把父评论对象缓存到子评论上，避免访问 parent 时再次查询"""
+    by_id = {comment.pk: comment for comment in comments}
+    by_parent = defaultdict(list)
+    for comment in comments:
+        by_parent[comment.parent_id].append(comment)
+        parent = by_id.get(comment.parent_id)
+        if parent is not None:
+            comment.parent = parent
+    return by_parent
+
+
+def _cache_key(article_id):
+    return namespaced_key(CACHE_NAMESPACE, article_id)
+
+
+def _approved_comments(article):
+    """已审核评论的缓存数据"""
+    return list(
+        Comment.objects.filter(article=article, is_approved=True)  # type: ignore
+        .order_by(*ORDERING)
+        .values(*CACHED_FIELDS, author_username=F("author__username"))
+    )
+
+
+def _from_rows(rows, article):
+    """把缓存数据还原为评论实例"""
+    User = get_user_model()
+    comments = []
+    for row in rows:
+        row = dict(row)
+        author = User(id=row["author_id"], username=row.pop("author_username"))
+        comment = Comment(article_id=article.pk, is_approved=True, **row)
+        comment.author = author
+        # 模板需要文章的 slug，直接使用已有的文章对象
+        comment.article = article
+        comments.append(comment)
+    return comments
+
+
+def invalidate_comment_tree(article_id):
+    """使文章的评论缓存失效"""
+    delete_on_commit(_cache_key(article_id))
+
+
+class CommentTree:
+    """一篇文章的评论树（一页顶级评论）"""
+
+    def __init__(self, threads, total, page, has_next):
+        self.threads = threads
+        # 可见评论总数（包括回复）
+        self.total = total
+        self.page = page
+        self._has_next = has_next
+
+    def __iter__(self):
+        return iter(self.threads)
+
+    def __len__(self):
+        return len(self.threads)
+
+    def __bool__(self):
+        return bool(self.threads)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self.page > 1
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    def next_page_number(self):
+        return self.page + 1
+
+    def previous_page_number(self):
+        return self.page - 1
+
+
+def load_comment_tree(article, max_depth=MAX_DEPTH, page=1, per_page=THREADS_PER_PAGE):
+    """
+    读取文章的已审核评论树
+
+    Args:
+        article: 文章
+        max_depth: 回复最多嵌套的层数，None表示不限制
+        page: 顶级评论的页码，从1开始
+        per_page: 每页顶级评论数量，None表示不分页
+
+    Returns:
+        CommentTree
+    """
+    rows = get_or_set(
+        _cache_key(article.pk), lambda: _approved_comments(article), CACHE_TIMEOUT
+    )
+    by_parent = _index(_from_rows(rows, article))
+
+    roots = by_parent.get(None, [])
+    has_next = False
+    if per_page is not None:
+        start = (page - 1) * per_page
+        has_next = len(roots) > start + per_page
+        roots = roots[start : start + per_page]
+    return CommentTree(
+        assemble(roots, by_parent, max_depth), _count_visible(by_parent), page, has_next
+    )
+
+
+def attach_replies(comments, visible=Q(is_approved=True), max_depth=None):
+    """
+    为一组评论加载并挂接回复树（API列表使用）
+
+    用一次查询读取这些评论所属文章的可见评论，在内存中组装。
+    父评论不可见时，其回复也不显示。
+
+    Args:
+        comments: 评论列表
+        visible: 可见评论的过滤条件
+        max_depth: 回复最多嵌套的层数，None表示不限制
+    """
+    comments = list(comments)
+    if not comments:
+        return comments
+    article_ids = {comment.article_id for comment in comments}
+    loaded = list(
+        Comment.objects.filter(visible, article_id__in=article_ids)  # type: ignore
+        .select_related("author")
+        .order_by(*ORDERING)
+    )
+    by_parent = _index(loaded)
+    return assemble(comments, by_parent, max_depth)
@@ -7,7 +7,7 @@ from django.core.exceptions import ValidationError
 
 from apps.articles.models import Article
 from apps.comments.models import Comment
-from utils.models import SensitiveWord
+from utils.sensitive import find_sensitive_words
 from django import forms
 
 # Create your views here.
@@ -32,28 +32,10 @@ class CommentForm(forms.ModelForm):
         }
 
     def clean_content(self):
-        """检查评论内容是否包含敏感词"""
+        """检查评论内容是否包含敏感词，命中结果保存在 sensitive_matches 中"""
         content = self.cleaned_data.get("content")
-        if content:
-            try:
-                # 从数据库获取所有敏感词
-                sensitive_words = list(
-                    SensitiveWord.objects.values_list("word", flat=True)
-                )
-
-                found_words = []
-                for word in sensitive_words:
-                    if word in content:
-                        found_words.append(word)
-
-                # if found_words: # 不再抛出错误
-                #     raise ValidationError(
-                #         _("评论包含敏感词。您的评论将需要审核。"),
-                #         code="sensitive_word",
-                #         params={"words": ", ".join(found_words)},
-                #     )
-            except SensitiveWord.DoesNotExist:
-                pass
+        # 包含敏感词时不拒绝提交，由 add_comment 将评论设为待审核
+        self.sensitive_matches = find_sensitive_words(content) if content else []
         return content
 
 
@@ -68,7 +50,6 @@ def add_comment(request, article_slug):
             comment = form.save(commit=False)
             comment.author = request.user
             comment.article = article
-            content = form.cleaned_data.get("content")  # 获取内容用于检查
 
             # 处理回复
             parent_id = form.cleaned_data.get("parent_id")
@@ -77,18 +58,8 @@ def add_comment(request, article_slug):
                 comment.parent = parent_comment
 
             # -- 敏感词检查逻辑移到这里 --
-            contains_sensitive = False
-            if content:
-                try:
-                    sensitive_words = list(
-                        SensitiveWord.objects.values_list("word", flat=True)
-                    )
-                    for word in sensitive_words:
-                        if word in content:
-                            contains_sensitive = True
-                            break  # 找到一个就够了
-                except SensitiveWord.DoesNotExist:
-                    pass  # 如果模型不存在，则认为不包含敏感词
+            # 复用表单校验时的匹配结果，不再重复扫描
+            contains_sensitive = bool(form.sensitive_matches)
 
             # 根据是否包含敏感词设置审核状态
             if contains_sensitive:
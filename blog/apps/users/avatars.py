@@ -0,0 +1,189 @@
+"""
+头像处理模块
+
+上传的原图直接保存到 User.avatar，裁剪和缩放在Celery任务中进行，不占用请求时间。
+每个头像生成多种尺寸（AVATAR_SIZES），每种尺寸保存 WebP 和 JPEG（兼容不支持WebP的浏览器）
+两份，文件名由用户ID、原图内容哈希和尺寸决定：
+
+    avatars/<用户ID>/<版本>/<尺寸>.webp
+    avatars/<用户ID>/<版本>/<尺寸>.jpg
+
+处理完成后把版本号写入 User.avatar_version，模板通过 {% avatar %} 标签选择不小于显示尺寸的
+最小文件；版本号为空（尚未处理）时使用原图。
+
+大尺寸JPEG原图使用 draft 模式在解码时直接按 1/2、1/4、1/8 缩小，不完整解码整张图片。
+"""
+
+import hashlib
+import logging
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# 生成的尺寸（像素，正方形）
+AVATAR_SIZES = (40, 80, 300)
+# 输出格式：(扩展名, Pillow格式, 保存参数)，按优先级排列，最后一个为兼容格式
+AVATAR_FORMATS = (
+    ("webp", "WEBP", {"quality": 80, "method": 4}),
+    ("jpg", "JPEG", {"quality": 85, "optimize": True, "progressive": True}),
+)
+# 未上传头像时的默认头像，不生成多尺寸文件
+DEFAULT_AVATAR = "avatars/test.jpg"
+# 变体文件名
+VARIANT_NAME = "avatars/{user_id}/{version}/{size}.{ext}"
+
+
+def avatar_version(data):
+    """根据原图内容计算版本号"""
+    return hashlib.sha256(data).hexdigest()[:12]
+
+
+def variant_name(user_id, version, size, ext):
+    return VARIANT_NAME.format(user_id=user_id, version=version, size=size, ext=ext)
+
+
+def _open(data, size):
+    """打开图片，JPEG使用draft模式按不小于 size 的比例缩小解码"""
+    image = Image.open(BytesIO(data))
+    if image.format == "JPEG":
+        image.draft("RGB", (size, size))
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ("RGBA", "LA", "P"):
+        # 透明背景填充为白色
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+    return image.convert("RGB")
+
+
+def render_variants(data, sizes=AVATAR_SIZES):
+    """
+    生成头像的各个尺寸
+
+    Args:
+        data: 原图内容
+        sizes: 尺寸列表
+
+    Returns:
+        {(尺寸, 扩展名): 图片内容}
+    """
+    sizes = sorted(sizes, reverse=True)
+    image = _open(data, sizes[0])
+    # 先居中裁剪为最大尺寸，较小的尺寸由上一级缩小得到
+    current = ImageOps.fit(image, (sizes[0], sizes[0]), Image.Resampling.LANCZOS)
+    variants = {}
+    for size in sizes:
+        if current.width != size:
+            current = current.resize((size, size), Image.Resampling.LANCZOS)
+        for ext, image_format, options in AVATAR_FORMATS:
+            output = BytesIO()
+            current.save(output, format=image_format, **options)
+            variants[(size, ext)] = output.getvalue()
+    return variants
+
+
+def _replace(name, content):
+    # 文件名是确定的，已存在时先删除，避免存储自动改名
+    if default_storage.exists(name):
+        default_storage.delete(name)
+    default_storage.save(name, ContentFile(content))
+
+
+def delete_variants(user_id, version):
+    """删除某个版本的全部变体文件"""
+    for size in AVATAR_SIZES:
+        for ext, _, _ in AVATAR_FORMATS:
+            name = variant_name(user_id, version, size, ext)
+            if default_storage.exists(name):
+                default_storage.delete(name)
+
+
+def build_avatar(user_id, avatar_name):
+    """
+    读取原图并保存全部变体文件（不修改数据库，可在子进程中运行）
+
+    Returns:
+        (用户ID, 版本号)，没有可处理的原图时版本号为空字符串
+    """
+    if not avatar_name or avatar_name == DEFAULT_AVATAR:
+        return user_id, ""
+    with default_storage.open(avatar_name, "rb") as original:
+        data = original.read()
+    version = avatar_version(data)
+    for (size, ext), content in render_variants(data).items():
+        _replace(variant_name(user_id, version, size, ext), content)
+    return user_id, version
+
+
+def process_avatar(user_id, previous_version=""):
+    """
+    处理用户当前的头像，完成后更新 avatar_version 并删除旧版本的文件
+
+    Args:
+        user_id: 用户ID
+        previous_version: 更换头像前的版本号，处理完成后删除其文件
+
+    Returns:
+        新的版本号
+    """
+    from .models import User
+
+    user = User.objects.filter(pk=user_id).only("avatar", "avatar_version").first()
+    if user is None:
+        return ""
+    try:
+        _, version = build_avatar(user.pk, user.avatar.name if user.avatar else "")
+    except (OSError, Image.DecompressionBombError):
+        # 图片无法识别或损坏，继续使用原图
+        logger.exception("头像处理失败: user=%s", user_id)
+        return ""
+    # 只更新版本号，不触发 post_save 信号
+    User.objects.filter(pk=user.pk).update(avatar_version=version)
+    for old in {user.avatar_version, previous_version} - {"", version}:
+        delete_variants(user.pk, old)
+    return version
+
+
+def schedule_avatar_processing(user_id, previous_version=""):
+    """事务提交后处理头像，ASYNC 时交给Celery任务"""
+    options = getattr(settings, "AVATARS", {})
+
+    def dispatch():
+        if options.get("ASYNC", True):
+            from utils.celery.tasks import process_avatar_task
+
+            try:
+                process_avatar_task.delay(user_id, previous_version)
+                return
+            except Exception:
+                logger.exception("头像处理任务提交失败，改为同步处理")
+        process_avatar(user_id, previous_version)
+
+    transaction.on_commit(dispatch)
+
+
+def avatar_urls(user, size):
+    """
+    选择不小于 size 的最小尺寸
+
+    Returns:
+        {扩展名: URL}，头像尚未处理时为 {"jpg": 原图URL}，没有头像时为空字典
+    """
+    if not user.avatar:
+        return {}
+    version = getattr(user, "avatar_version", "")
+    if not version:
+        return {"jpg": user.avatar.url}
+    fitting = [s for s in AVATAR_SIZES if s >= size]
+    chosen = min(fitting) if fitting else max(AVATAR_SIZES)
+    return {
+        ext: default_storage.url(variant_name(user.pk, version, chosen, ext))
+        for ext, _, _ in AVATAR_FORMATS
+    }
@@ -0,0 +1,95 @@
+"""
+重新生成所有用户头像的各尺寸文件
+
+用法：
+    python manage.py regenerate_avatars
+    python manage.py regenerate_avatars --workers 8 --batch-size 200
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from apps.users.avatars import DEFAULT_AVATAR, build_avatar, delete_variants
+from apps.users.models import User
+
+
+def _build(payload):
+    """子进程中处理一个头像，失败时返回空版本号"""
+    user_id, avatar_name = payload
+    try:
+        return build_avatar(user_id, avatar_name)
+    except Exception:
+        return user_id, ""
+
+
+class Command(BaseCommand):
+    help = "使用多进程为所有用户头像重新生成各尺寸的WebP和JPEG文件"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="处理进程数，默认为CPU核数",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=200,
+            help="每批写入数据库的用户数量",
+        )
+
+    def handle(self, *args, **options):
+        workers = max(1, options["workers"])
+        batch_size = max(1, options["batch_size"])
+
+        users = (
+            User.objects.exclude(avatar="")
+            .exclude(avatar__isnull=True)
+            .exclude(avatar=DEFAULT_AVATAR)
+            .values_list("id", "avatar", "avatar_version")
+        )
+        previous = {}
+        pending = []
+        for user_id, avatar_name, version in users.iterator(chunk_size=batch_size):
+            previous[user_id] = version
+            pending.append((user_id, avatar_name))
+
+        total = len(pending)
+        if not total:
+            self.stdout.write(self.style.SUCCESS("没有需要处理的头像"))
+            return
+
+        self.stdout.write(f"需要处理 {total} 个头像，使用 {workers} 个进程")
+
+        processed = failed = 0
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            batch = []
+            for user_id, version in executor.map(
+                _build, pending, chunksize=max(1, batch_size // workers)
+            ):
+                if not version:
+                    failed += 1
+                    continue
+                batch.append(User(pk=user_id, avatar_version=version))
+                if len(batch) >= batch_size:
+                    processed += self._save_batch(batch, previous)
+                    self.stdout.write(f"已处理 {processed}/{total}")
+                    batch = []
+            if batch:
+                processed += self._save_batch(batch, previous)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"处理完成，共 {processed} 个头像，失败 {failed} 个")
+        )
+
+    def _save_batch(self, batch, previous):
+        """写入一批新版本号，并删除旧版本的文件"""
+        User.objects.bulk_update(batch, ["avatar_version"])
+        for user in batch:
+            old = previous.get(user.pk)
+            if old and old != user.avatar_version:
+                delete_variants(user.pk, old)
+        return len(batch)
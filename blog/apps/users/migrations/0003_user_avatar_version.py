@@ -0,0 +1,35 @@
+# Generated by Django 4.2.20 on 2026-10-18 20:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0002_emailverification"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="avatar_version",
+            field=models.CharField(
+                blank=True,
+                default="",
+                editable=False,
+                max_length=16,
+                verbose_name="头像版本",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="user",
+            name="avatar",
+            field=models.ImageField(
+                blank=True,
+                default="avatars/test.jpg",
+                null=True,
+                upload_to="avatars/",
+                verbose_name="头像",
+            ),
+        ),
+    ]
@@ -22,6 +22,8 @@ class User(AbstractUser):
     # 自定义字段
     bio = models.TextField(_('个人简介'), blank=True,null=True)
     avatar = models.ImageField(_('头像'), upload_to='avatars/', blank=True, null=True, default='avatars/test.jpg')
+    # 头像各尺寸文件的版本号（原图内容哈希），为空表示尚未处理，见 avatars.py
+    avatar_version = models.CharField(_('头像版本'), max_length=16, blank=True, default='', editable=False)
 
     # 如果需要更复杂的角色管理，可以添加自定义角色字段
     # 例如：is_editor, is_vip等
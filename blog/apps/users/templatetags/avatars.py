@@ -0,0 +1,27 @@
+from django import template
+
+from apps.users.avatars import avatar_urls
+
+register = template.Library()
+
+
+@register.inclusion_tag("users/avatar.html")
+def avatar(user, size=40, css_class="", style=""):
+    """
+    显示用户头像，按显示尺寸选择最合适的文件
+
+    浏览器支持WebP时使用WebP，高分屏使用两倍尺寸的文件。
+    例如：{% avatar request.user 30 style="width: 100%; height: 100%;" %}
+    """
+    urls = avatar_urls(user, size)
+    urls_2x = avatar_urls(user, size * 2)
+    return {
+        "username": user.username,
+        "size": size,
+        "css_class": css_class,
+        "style": style,
+        "webp": urls.get("webp"),
+        "webp_2x": urls_2x.get("webp"),
+        "jpg": urls.get("jpg"),
+        "jpg_2x": urls_2x.get("jpg"),
+    }
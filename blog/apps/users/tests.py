@@ -1,3 +1,109 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from io import BytesIO, StringIO
 
-# Create your tests here.
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from .avatars import AVATAR_SIZES, avatar_urls, render_variants, variant_name
+from .models import User
+
+
+def make_image(size=(640, 480), image_format="JPEG", color=(200, 30, 30)):
+    output = BytesIO()
+    Image.new("RGB", size, color).save(output, format=image_format)
+    return output.getvalue()
+
+
+class AvatarPipelineTest(TestCase):
+    """头像多尺寸处理测试"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpassword"
+        )
+        self.client.login(username="testuser", password="testpassword")
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def _upload(self, data, name="photo.jpg"):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse("users:change_avatar"),
+                {"avatar": SimpleUploadedFile(name, data, content_type="image/jpeg")},
+            )
+        self.user.refresh_from_db()
+
+    def test_render_variants(self):
+        """生成各尺寸的WebP和JPEG，宽图居中裁剪为正方形"""
+        variants = render_variants(make_image((3000, 2000)))
+        self.assertEqual(len(variants), len(AVATAR_SIZES) * 2)
+        for (size, ext), content in variants.items():
+            image = Image.open(BytesIO(content))
+            self.assertEqual(image.size, (size, size))
+            self.assertEqual(image.format, "WEBP" if ext == "webp" else "JPEG")
+
+        # 带透明通道的PNG
+        variants = render_variants(make_image((100, 120), "PNG"))
+        self.assertEqual(Image.open(BytesIO(variants[(40, "jpg")])).size, (40, 40))
+
+    def test_upload_processed_after_commit(self):
+        """上传后保存原图，提交后生成各尺寸文件并更新版本号"""
+        self._upload(make_image())
+        version = self.user.avatar_version
+        self.assertTrue(version)
+        for size in AVATAR_SIZES:
+            for ext in ("webp", "jpg"):
+                self.assertTrue(
+                    default_storage.exists(
+                        variant_name(self.user.pk, version, size, ext)
+                    )
+                )
+
+        # 更换头像后删除旧版本的文件
+        self._upload(make_image(color=(0, 0, 255)))
+        self.assertNotEqual(self.user.avatar_version, version)
+        self.assertFalse(
+            default_storage.exists(variant_name(self.user.pk, version, 40, "jpg"))
+        )
+
+    def test_template_picks_smallest_fitting_size(self):
+        """模板选择不小于显示尺寸的最小文件，尚未处理时使用原图"""
+        self.user.avatar = "avatars/original.jpg"
+        self.assertEqual(avatar_urls(self.user, 30), {"jpg": self.user.avatar.url})
+
+        self.user.avatar_version = "abc"
+        self.assertTrue(avatar_urls(self.user, 30)["jpg"].endswith("/abc/40.jpg"))
+        self.assertTrue(avatar_urls(self.user, 60)["webp"].endswith("/abc/80.webp"))
+        self.assertTrue(avatar_urls(self.user, 500)["jpg"].endswith("/abc/300.jpg"))
+
+        html = Template("{% load avatars %}{% avatar user 30 %}").render(
+            Context({"user": self.user})
+        )
+        self.assertIn('type="image/webp" srcset="/media/avatars/', html)
+        self.assertIn("/abc/40.webp 1x", html)
+        self.assertIn("/abc/80.jpg 2x", html)
+
+    def test_regenerate_command(self):
+        """管理命令多进程重新生成所有头像"""
+        self.user.avatar = default_storage.save("avatars/a.jpg", BytesIO(make_image()))
+        self.user.save()
+        out = StringIO()
+        call_command("regenerate_avatars", workers=1, stdout=out)
+        self.assertIn("共 1 个头像", out.getvalue())
+        self.user.refresh_from_db()
+        self.assertTrue(
+            default_storage.exists(
+                variant_name(self.user.pk, self.user.avatar_version, 300, "webp")
+            )
+        )
@@ -10,15 +10,15 @@ from django.urls import reverse_lazy, reverse
 from django.views.generic import DetailView, UpdateView
 from django.http import HttpResponseRedirect, Http404
 from django.utils import timezone
-from django.db.models import Q
 from django.core.paginator import Paginator, PageNotAnInteger, EmptyPage
 from django.contrib.auth import get_backends
 from django.contrib.auth.backends import ModelBackend
 
 from .forms import UserRegisterForm, UserLoginForm, UserProfileForm, UserAvatarForm
 from .models import User, EmailVerification
-from .utils import send_verification_email, crop_and_resize_image
-from apps.articles.models import Article
+from .avatars import schedule_avatar_processing
+from .utils import send_verification_email
+from utils.search.query import search_articles, search_users
 
 
 def register(request):
@@ -198,22 +198,19 @@ class UserProfileEditView(LoginRequiredMixin, UpdateView):
 
 @login_required
 def change_avatar(request):
-    """更改用户头像，并裁剪为正方形"""
+    """更改用户头像，裁剪为正方形并生成各尺寸的工作在后台任务中进行"""
     if request.method == "POST":
         form = UserAvatarForm(request.POST, request.FILES, instance=request.user)
         if form.is_valid():
             # 如果有新头像上传
             if "avatar" in request.FILES:
-                # 裁剪并调整图片大小
-                print(f"Processing avatar image: {request.FILES['avatar'].name}")
-                processed_image = crop_and_resize_image(request.FILES["avatar"])
-
-                # 将处理后的图片设置为用户头像
+                # 保存原图，处理完成前页面显示原图
+                previous_version = request.user.avatar_version
                 user = form.save(commit=False)
-                user.avatar = processed_image
+                user.avatar_version = ""
                 user.save()
+                schedule_avatar_processing(user.pk, previous_version)
 
-                print(f"Avatar updated successfully: {user.avatar.name}")
                 messages.success(request, _("头像更新成功！"))
             else:
                 form.save()
@@ -249,32 +246,13 @@ def search(request):
     articles = []
 
     if query:
-        # 根据搜索类型执行不同的查询
+        # 使用全文索引搜索，结果按相关度排序
         if search_type == "author" or search_type == "all":
-            # 搜索作者
-            authors = User.objects.filter(
-                Q(username__icontains=query)
-                | Q(first_name__icontains=query)
-                | Q(last_name__icontains=query)
-                | Q(bio__icontains=query)
-            ).distinct()
+            authors = search_users(query)
 
         if search_type == "article" or search_type == "all":
-            # 搜索文章（仅搜索已发布且公开的文章）
-            articles = Article.objects.filter(
-                Q(status="published", visibility="public")
-                & (Q(title__icontains=query) | Q(content__icontains=query))
-            ).distinct()
-
-            # 如果用户已登录，也包括他们自己的私密文章
-            if request.user.is_authenticated:
-                user_private_articles = Article.objects.filter(
-                    Q(status="published", visibility="private", author=request.user)
-                    & (Q(title__icontains=query) | Q(content__icontains=query))
-                ).distinct()
-
-                # 合并查询结果
-                articles = (articles | user_private_articles).distinct()
+            # 已发布且公开的文章，登录用户还包括自己的私密文章
+            articles = search_articles(query, request.user)
 
     # 对作者结果进行分页
     authors_paginator = Paginator(authors, 10)  # 每页10个作者
@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 
 from pathlib import Path
 import os
+import sys
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -26,6 +27,9 @@ SECRET_KEY = "django-insecure-mn1d=6%+9-$yyn4ju+0!nhs0k10%hf4mvqjz!%w$ymzpv&2fqq
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = True
 
+# 是否在运行测试（python manage.py test）
+TESTING = len(sys.argv) > 1 and sys.argv[1] == "test"
+
 ALLOWED_HOSTS = ["*"]
 
 
@@ -45,6 +49,9 @@ INSTALLED_APPS = [
     "apps.comments",
     "utils.logs",  # 访问日志应用
     "utils.api",  # API应用
+    "utils.stats",  # 统计应用
+    "utils.search",  # 全文搜索
+    "utils.benchmarks",  # 性能基准
     "utils",
     # 第三方应用
     "rest_framework",
@@ -73,6 +80,7 @@ MIDDLEWARE = [
     # 自定义中间件
     "config.middleware.HealthCheckMiddleware",  # 健康检查中间件，放在前面优先处理
     "utils.logs.middleware.AccessLogMiddleware",  # 访问日志中间件
+    "utils.logs.profiler.SamplingProfilerMiddleware",  # 采样请求剖析（默认关闭）
 ]
 
 ROOT_URLCONF = "config.urls"
@@ -244,7 +252,7 @@ REST_FRAMEWORK = {
     "DEFAULT_VERSION": "v1",
     "ALLOWED_VERSIONS": ["v1"],
     "VERSION_PARAM": "version",
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
+    "DEFAULT_PAGINATION_CLASS": "utils.api.pagination.KeysetPagination",
     "PAGE_SIZE": 10,
     "DEFAULT_SCHEMA_CLASS": "rest_framework.schemas.coreapi.AutoSchema",
     "DEFAULT_RENDERER_CLASSES": (
@@ -303,12 +311,40 @@ DEFAULT_FROM_EMAIL = ""
 SITE_URL = "http://127.0.0.1:8000"
 
 # 缓存配置
-CACHES = {
-    "default": {
-        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
-        "LOCATION": "unique-snowflake",
+# 设置 REDIS_CACHE_URL 时使用Redis作为各进程共享的缓存，应与Celery使用不同的库，
+# 如 redis://redis:6379/1；未设置或运行测试时使用进程内的本地内存缓存
+REDIS_CACHE_URL = os.environ.get("REDIS_CACHE_URL", "")
+# 缓存数据格式不兼容的升级时修改版本号，使旧的缓存全部失效
+CACHE_VERSION = int(os.environ.get("CACHE_VERSION", "1"))
+
+if REDIS_CACHE_URL and not TESTING:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_CACHE_URL,
+            "KEY_PREFIX": "blog",
+            "VERSION": CACHE_VERSION,
+            "OPTIONS": {
+                "socket_connect_timeout": 1,
+                "socket_timeout": 1,
+                "health_check_interval": 30,
+            },
+        }
     }
-}
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "unique-snowflake",
+            "VERSION": CACHE_VERSION,
+        }
+    }
+
+# 文章浏览量缓冲使用的Redis（多个进程共享计数，由定时任务批量写回数据库）；
+# 未设置时没有跨进程共享的计数，浏览量直接写入数据库
+ARTICLE_VIEWS_REDIS_URL = os.environ.get(
+    "ARTICLE_VIEWS_REDIS_URL", "" if TESTING else REDIS_CACHE_URL
+)
 
 # 缓存过期时间设置
 CACHE_TTL = 60 * 15  # 15分钟
@@ -369,6 +405,56 @@ LOGGING = {
     },
 }
 
+# 头像处理配置（见 apps/users/avatars.py）
+AVATARS = {
+    "ASYNC": not TESTING,  # 测试时同步处理
+}
+
+# GitHub客户端配置（见 utils/github_auth/client.py）
+GITHUB_CLIENT = {
+    "ASYNC": not TESTING,  # 测试时同步下载头像
+    "CONNECT_TIMEOUT": 3.05,  # 连接超时（秒）
+    "READ_TIMEOUT": 10,  # 读取超时（秒）
+    "MAX_AVATAR_BYTES": 2 * 1024 * 1024,  # 头像的最大字节数
+}
+
+# 文章页面条件请求配置（见 apps/articles/conditional.py）
+CONDITIONAL_GET = {
+    "ENABLED": True,
+    "VERSION": "1",  # 修改模板后递增，使客户端缓存的页面失效
+}
+
+# 匿名用户整页缓存配置（见 utils/page_cache.py）
+PAGE_CACHE = {
+    "ENABLED": not TESTING,  # 测试时关闭，需要时在测试中开启
+    "TIMEOUT": 60 * 10,  # 依赖发布、评论审核等事件失效，过期时间只作为兜底
+}
+
+# 相关文章索引配置（见 apps/articles/related.py）
+RELATED_ARTICLES = {
+    "ASYNC": not TESTING,  # 测试时同步计算
+    "TOP_K": 5,  # 每篇文章保存的相关文章数量
+}
+
+# 访问日志异步批量写入配置
+ACCESS_LOG_WRITER = {
+    "ASYNC": not TESTING,  # 测试时同步写入，保证测试结果可预期
+    "QUEUE_SIZE": 10000,  # 进程内队列最大长度
+    "BATCH_SIZE": 200,  # 每批写入的记录数
+    "FLUSH_INTERVAL": 2.0,  # 最长写入间隔（秒）
+    "OVERLOAD_THRESHOLD": 0.8,  # 队列使用率超过80%时开始采样
+    "OVERLOAD_SAMPLE_RATE": 0.1,  # 过载时只保留10%的记录
+}
+
+# 采样请求剖析配置（见 utils/logs/profiler.py），结果在 /logs/profiles/ 查看
+REQUEST_PROFILER = {
+    "ENABLED": os.environ.get("REQUEST_PROFILER", "") == "1",  # 关闭时没有任何开销
+    "SAMPLE_RATE": 0.01,  # 剖析1%的请求
+    "ROUTES": [],  # 总是剖析的路由，如 "articles:article_detail"
+    "INTERVAL": 0.005,  # 采样间隔（秒）
+    "RETENTION_DAYS": 7,  # 剖析记录保留天数
+}
+
 # Django Debug Toolbar配置
 INTERNAL_IPS = [
     "127.0.0.1",
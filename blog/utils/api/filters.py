@@ -0,0 +1,42 @@
+from django.db.models import Case, IntegerField, Value, When
+from rest_framework import filters
+from rest_framework.settings import api_settings
+
+from utils.search.models import SearchDocument
+from utils.search.query import ranked_ids
+
+
+class IndexedSearchFilter(filters.SearchFilter):
+    """
+    基于全文索引的搜索过滤器
+
+    视图通过 search_index_kind 指定索引类型，查询参数与 SearchFilter 相同（search），
+    不再对 search_fields 执行 icontains 全表扫描。未指定排序参数时按相关度排序，
+    因此应放在 OrderingFilter 之后。
+    """
+
+    # 单次搜索最多返回的结果数量
+    max_results = 1000
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, "").strip()
+        kind = getattr(view, "search_index_kind", None)
+        if not query or kind is None:
+            return super().filter_queryset(request, queryset, view)
+
+        # 在排序查询中按视图的查询集（已包含可见性过滤）限制文档，
+        # 不可见的命中不会占用 max_results 名额
+        documents = SearchDocument.objects.filter(  # type: ignore
+            kind=kind, object_id__in=queryset.order_by().values("pk")
+        )
+        ids = ranked_ids(kind, query, documents, limit=self.max_results)
+        queryset = queryset.filter(pk__in=ids)
+        if ids and not request.query_params.get(api_settings.ORDERING_PARAM):
+            # 按相关度排序
+            queryset = queryset.order_by(
+                Case(
+                    *[When(pk=pk, then=Value(rank)) for rank, pk in enumerate(ids)],
+                    output_field=IntegerField(),
+                )
+            )
+        return queryset
@@ -0,0 +1,116 @@
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from utils.pagination import InvalidCursor, keyset_page
+
+
+class KeysetPagination(PageNumberPagination):
+    """
+    键集（游标）分页
+
+    默认与 PageNumberPagination 相同，响应格式不变（包含 count）。视图通过
+    cursor_ordering 指定排序键（最后一个字段必须唯一）后，请求带 cursor 参数
+    （第一页为空值，如 ?cursor=）时使用键集分页；同时带有 page、ordering 或
+    search 参数时仍使用页码分页，保证自定义排序可用。
+
+    键集分页的响应格式为 {"next", "previous", "results"}，请求带 count=1 时额外返回 count。
+    """
+
+    cursor_query_param = "cursor"
+    cursor_query_description = (
+        "分页游标，取自上一次响应的 next / previous；为空时使用键集分页读取第一页"
+    )
+    count_query_param = "count"
+    count_query_description = "键集分页时为 1 则返回结果总数"
+
+    def _use_page_number(self, request, view):
+        if getattr(view, "cursor_ordering", None) is None:
+            return True
+        params = request.query_params
+        if self.cursor_query_param not in params:
+            return True
+        return any(
+            name in params
+            for name in (
+                self.page_query_param,
+                api_settings.ORDERING_PARAM,
+                api_settings.SEARCH_PARAM,
+            )
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_page = None
+        if self._use_page_number(request, view):
+            return super().paginate_queryset(queryset, request, view)
+
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        self.request = request
+        with_count = request.query_params.get(self.count_query_param) in ("1", "true")
+        try:
+            self.cursor_page = keyset_page(
+                queryset,
+                view.cursor_ordering,
+                request.query_params.get(self.cursor_query_param),
+                page_size,
+                with_count,
+            )
+        except InvalidCursor:
+            raise NotFound("无效的游标")
+        return list(self.cursor_page)
+
+    def _cursor_link(self, cursor):
+        if cursor is None:
+            return None
+        url = remove_query_param(
+            self.request.build_absolute_uri(), self.page_query_param
+        )
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_next_link(self):
+        if self.cursor_page is None:
+            return super().get_next_link()
+        return self._cursor_link(self.cursor_page.next_cursor)
+
+    def get_previous_link(self):
+        if self.cursor_page is None:
+            return super().get_previous_link()
+        return self._cursor_link(self.cursor_page.previous_cursor)
+
+    def get_paginated_response(self, data):
+        if self.cursor_page is None:
+            return super().get_paginated_response(data)
+        body = {
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        }
+        if self.cursor_page.count is not None:
+            body = {"count": self.cursor_page.count, **body}
+        return Response(body)
+
+    def get_schema_operation_parameters(self, view):
+        parameters = super().get_schema_operation_parameters(view)
+        if getattr(view, "cursor_ordering", None) is None:
+            return parameters
+        return parameters + [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": self.cursor_query_description,
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.count_query_param,
+                "required": False,
+                "in": "query",
+                "description": self.count_query_description,
+                "schema": {"type": "integer"},
+            },
+        ]
@@ -1,5 +1,8 @@
 from rest_framework import serializers
 from apps.articles.models import Article, Category, Tag
+from apps.articles.reactions import attach_reactions
+from apps.articles.related import get_related_articles
+from apps.articles.tagging import MAX_TAG_LENGTH, resolve_tags, set_article_tags
 
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -18,19 +21,61 @@ class TagSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 
+class ArticleStatField(serializers.ReadOnlyField):
+    """读取文章统计计数，统计行不存在时返回0"""
+
+    def get_attribute(self, instance):
+        stats = getattr(instance, 'stats', None)
+        return getattr(stats, self.source, 0) if stats is not None else 0
+
+
+class UserReactionField(serializers.ReadOnlyField):
+    """
+    当前用户是否已点赞/收藏（source 为 user_liked 或 user_favorited）
+
+    列表视图已为整页文章批量加载；单篇文章在这里加载。
+    """
+
+    def get_attribute(self, instance):
+        if not hasattr(instance, self.source):
+            request = self.context.get('request')
+            attach_reactions([instance], getattr(request, 'user', None))
+        return getattr(instance, self.source)
+
+
+class RelatedArticleSerializer(serializers.ModelSerializer):
+    """相关文章序列化器"""
+    score = serializers.FloatField(source='related_score', read_only=True)
+    
+    class Meta:
+        model = Article
+        fields = ['id', 'title', 'slug', 'excerpt', 'published_at', 'score']
+
+
 class ArticleListSerializer(serializers.ModelSerializer):
     """文章列表序列化器"""
     author = serializers.ReadOnlyField(source='author.username')
     category = CategorySerializer(read_only=True)
     tags = TagSerializer(many=True, read_only=True)
+    views_count = ArticleStatField()
+    likes_count = ArticleStatField()
+    favorites_count = ArticleStatField()
+    comments_count = ArticleStatField()
+    is_liked = UserReactionField(source='user_liked')
+    is_favorited = UserReactionField(source='user_favorited')
     
     class Meta:
         model = Article
         fields = [
-            'id', 'title', 'slug', 'author', 'category', 'tags', 
-            'status', 'visibility', 'created_at', 'published_at'
+            'id', 'title', 'slug', 'excerpt', 'author', 'category', 'tags', 
+            'status', 'visibility', 'created_at', 'published_at',
+            'word_count', 'reading_time',
+            'views_count', 'likes_count', 'favorites_count', 'comments_count',
+            'is_liked', 'is_favorited'
+        ]
+        read_only_fields = [
+            'id', 'slug', 'excerpt', 'created_at', 'published_at', 'word_count', 'reading_time'
         ]
-        read_only_fields = ['id', 'slug', 'created_at', 'published_at']
 
 
 class ArticleDetailSerializer(serializers.ModelSerializer):
@@ -38,14 +83,30 @@ class ArticleDetailSerializer(serializers.ModelSerializer):
     author = serializers.ReadOnlyField(source='author.username')
     category = CategorySerializer(read_only=True)
     tags = TagSerializer(many=True, read_only=True)
+    views_count = ArticleStatField()
+    likes_count = ArticleStatField()
+    favorites_count = ArticleStatField()
+    comments_count = ArticleStatField()
+    is_liked = UserReactionField(source='user_liked')
+    is_favorited = UserReactionField(source='user_favorited')
+    related_articles = serializers.SerializerMethodField()
     
     class Meta:
         model = Article
         fields = [
             'id', 'title', 'slug', 'content', 'author', 'category', 'tags', 
-            'status', 'visibility', 'created_at', 'updated_at', 'published_at'
+            'status', 'visibility', 'created_at', 'updated_at', 'published_at',
+            'word_count', 'reading_time',
+            'views_count', 'likes_count', 'favorites_count', 'comments_count',
+            'is_liked', 'is_favorited', 'related_articles'
+        ]
+        read_only_fields = [
+            'id', 'slug', 'created_at', 'updated_at', 'published_at', 'word_count', 'reading_time'
         ]
-        read_only_fields = ['id', 'slug', 'created_at', 'updated_at', 'published_at']
+    
+    def get_related_articles(self, obj):
+        """预先计算的相关文章"""
+        return RelatedArticleSerializer(get_related_articles(obj), many=True).data
 
 
 class ArticleCreateUpdateSerializer(serializers.ModelSerializer):
@@ -55,11 +116,16 @@ class ArticleCreateUpdateSerializer(serializers.ModelSerializer):
         child=serializers.IntegerField(),
         required=False
     )
+    # 按名称指定标签，不存在的标签自动创建
+    tag_names = serializers.ListField(
+        child=serializers.CharField(max_length=MAX_TAG_LENGTH),
+        required=False
+    )
     
     class Meta:
         model = Article
         fields = [
-            'title', 'content', 'category_id', 'tag_ids', 
+            'title', 'content', 'category_id', 'tag_ids', 'tag_names',
             'status', 'visibility'
         ]
     
@@ -75,14 +141,22 @@ class ArticleCreateUpdateSerializer(serializers.ModelSerializer):
     def validate_tag_ids(self, value):
         """验证标签ID列表"""
         if value:
-            existing_tags = Tag.objects.filter(id__in=value)
-            if len(existing_tags) != len(value):
+            existing_tags = Tag.objects.filter(id__in=value).count()
+            if existing_tags != len(set(value)):
                 raise serializers.ValidationError("部分标签不存在")
         return value
     
+    def _pop_tags(self, validated_data):
+        """取出标签ID和标签名称，都未提供时返回None"""
+        tag_ids = validated_data.pop('tag_ids', None)
+        tag_names = validated_data.pop('tag_names', None)
+        if tag_ids is None and tag_names is None:
+            return None
+        return list(tag_ids or []) + resolve_tags(tag_names or [])
+    
     def create(self, validated_data):
         """创建文章"""
-        tag_ids = validated_data.pop('tag_ids', [])
+        tags = self._pop_tags(validated_data)
         category_id = validated_data.pop('category_id', None)
         
         # 创建文章
@@ -92,14 +166,14 @@ class ArticleCreateUpdateSerializer(serializers.ModelSerializer):
         )
         
         # 添加标签
-        if tag_ids:
-            article.tags.set(tag_ids)
+        if tags:
+            set_article_tags(article, tags)
         
         return article
     
     def update(self, instance, validated_data):
         """更新文章"""
-        tag_ids = validated_data.pop('tag_ids', None)
+        tags = self._pop_tags(validated_data)
         category_id = validated_data.pop('category_id', None)
         
         # 更新文章字段
@@ -110,9 +184,10 @@ class ArticleCreateUpdateSerializer(serializers.ModelSerializer):
         if category_id is not None:
             instance.category_id = category_id
         
-        # 更新标签
-        if tag_ids is not None:
-            instance.tags.set(tag_ids)
-        
         instance.save()
+        
+        # 更新标签，只写入有变化的关联
+        if tags is not None:
+            set_article_tags(instance, tags)
+        
         return instance
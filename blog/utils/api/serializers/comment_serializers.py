@@ -1,9 +1,11 @@
+from django.db.models import Q
 from rest_framework import serializers
 from apps.comments.models import Comment
+from apps.comments.tree import attach_replies
 
 
 class RecursiveCommentSerializer(serializers.Serializer):
-    """递归评论序列化器，用于嵌套评论"""
+    """递归评论序列化器，用于嵌套评论（回复取自评论树，不再逐个查询）"""
     def to_representation(self, instance):
         serializer = CommentSerializer(instance, context=self.context)
         return serializer.data
@@ -13,7 +15,7 @@ class CommentSerializer(serializers.ModelSerializer):
     """评论序列化器"""
     author = serializers.ReadOnlyField(source='author.username')
     author_id = serializers.ReadOnlyField(source='author.id')
-    replies = RecursiveCommentSerializer(many=True, read_only=True)
+    replies = RecursiveCommentSerializer(source='children', many=True, read_only=True)
     
     class Meta:
         model = Comment
@@ -22,6 +24,13 @@ class CommentSerializer(serializers.ModelSerializer):
             'parent', 'replies', 'created_at', 'is_approved'
         ]
         read_only_fields = ['id', 'author', 'author_id', 'created_at', 'is_approved']
+    
+    def to_representation(self, instance):
+        # 列表视图已批量挂接回复；单条评论在这里用一次查询加载回复树
+        if not hasattr(instance, 'children'):
+            visible = self.context.get('visible_comments', Q(is_approved=True))
+            attach_replies([instance], visible)
+        return super().to_representation(instance)
 
 
 class CommentCreateSerializer(serializers.ModelSerializer):
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from apps.users.avatars import schedule_avatar_processing
 from apps.users.models import User
 
 
@@ -43,3 +44,13 @@ class UserUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['first_name', 'last_name', 'bio', 'avatar']
+    
+    def update(self, instance, validated_data):
+        """上传新头像时保存原图，各尺寸在后台任务中生成"""
+        previous_version = instance.avatar_version
+        if 'avatar' in validated_data:
+            instance.avatar_version = ''
+        instance = super().update(instance, validated_data)
+        if 'avatar' in validated_data and instance.avatar:
+            schedule_avatar_processing(instance.pk, previous_version)
+        return instance
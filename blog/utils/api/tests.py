@@ -1,3 +1,117 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
-# Create your tests here.
+from apps.articles.models import Article, Category, Tag
+from apps.comments.models import Comment
+from utils.api.views.article_views import ArticleViewSet
+from utils.api.views.comment_views import CommentViewSet
+
+User = get_user_model()
+
+
+class QueryBudgetTest(TestCase):
+    """API查询数量测试：查询数量不超过 query_budget，且与每页条数无关"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpassword"
+        )
+        self.category = Category.objects.create(name="分类", slug="category")
+        self.tags = [Tag.objects.create(name=f"标签{i}") for i in range(3)]
+
+    def _create(self, count):
+        for i in range(count):
+            article = Article.objects.create(
+                title=f"文章{i}",
+                content="内容",
+                author=self.user,
+                category=self.category,
+                status="published",
+                visibility="public",
+            )
+            article.tags.add(*self.tags)
+            parent = Comment.objects.create(
+                content="评论", author=self.user, article=article, is_approved=True
+            )
+            Comment.objects.create(
+                content="回复",
+                author=self.user,
+                article=article,
+                parent=parent,
+                is_approved=True,
+            )
+        return article
+
+    def _queries(self, url, **params):
+        """请求接口，返回查询数量（不包括访问日志）"""
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return len(
+            [q for q in queries.captured_queries if "logs_accesslog" not in q["sql"]]
+        )
+
+    def _article_queries(self):
+        return (
+            self._queries(reverse("article-list")),
+            self._queries(reverse("article-my-articles")),
+        )
+
+    def test_article_endpoints(self):
+        """文章列表和详情"""
+        self._create(2)
+        small = self._queries(reverse("article-list"))
+        self.client.force_login(self.user)
+        small_user = self._article_queries()
+        self.client.logout()
+
+        article = self._create(10)
+        self.assertEqual(self._queries(reverse("article-list")), small)
+        self.assertLessEqual(small, ArticleViewSet.query_budget["list"])
+        # 游标分页不执行 COUNT
+        self.assertEqual(self._queries(reverse("article-list"), cursor=""), small - 1)
+        self.assertLessEqual(
+            self._queries(reverse("article-detail", args=[article.slug])),
+            ArticleViewSet.query_budget["retrieve"],
+        )
+        # 标签过滤不产生重复文章
+        results = self.client.get(
+            reverse("article-list"), {"tag": self.tags[0].slug}
+        ).json()["results"]
+        self.assertEqual(len(results), len({item["id"] for item in results}))
+
+        # 登录用户：查询数量同样与文章数量无关
+        self.client.force_login(self.user)
+        self.assertEqual(self._article_queries(), small_user)
+
+    def test_comment_endpoints(self):
+        """评论列表、详情（包括回复）和待审核评论"""
+        self._create(2)
+        small = self._queries(reverse("comment-list"))
+        self._create(10)
+        self.assertEqual(self._queries(reverse("comment-list")), small)
+        self.assertLessEqual(small, CommentViewSet.query_budget["list"])
+        comment = Comment.objects.filter(parent=None).first()
+        self.assertLessEqual(
+            self._queries(reverse("comment-detail", args=[comment.pk])),
+            CommentViewSet.query_budget["retrieve"],
+        )
+
+        staff = User.objects.create_user(
+            username="staff",
+            email="staff@example.com",
+            password="testpassword",
+            is_staff=True,
+        )
+        Comment.objects.update(is_approved=False)
+        self.client.force_login(staff)
+        pending = self._queries(reverse("comment-pending"))
+        self._create(3)
+        Comment.objects.update(is_approved=False)
+        self.assertEqual(self._queries(reverse("comment-pending")), pending)
@@ -1,16 +1,21 @@
 from rest_framework import viewsets, permissions, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Q
+from django.db.models import Exists, OuterRef, Q
 from django.utils.text import slugify
-from django.utils import timezone
 
+from apps.articles.conditional import (
+    article_validators, list_validators, not_modified, set_validators
+)
 from apps.articles.models import Article, Category, Tag
+from apps.articles.reactions import attach_reactions
+from utils.slugs import allocate_slug
 from utils.api.serializers.article_serializers import (
     ArticleListSerializer, ArticleDetailSerializer, ArticleCreateUpdateSerializer,
     CategorySerializer, TagSerializer
 )
 from utils.api.permissions import IsOwnerOrReadOnly, IsAdminOrReadOnly
+from utils.api.filters import IndexedSearchFilter
 
 
 class CategoryViewSet(viewsets.ModelViewSet):
@@ -75,9 +80,7 @@ class TagViewSet(viewsets.ModelViewSet):
     lookup_field = 'slug'
     
     def perform_create(self, serializer):
-        """创建标签时自动生成slug"""
-        if not serializer.validated_data.get('slug'):
-            serializer.validated_data['slug'] = slugify(serializer.validated_data['name'])
+        """创建标签，未指定slug时在保存时分配唯一slug"""
         serializer.save()
 
 
@@ -106,49 +109,69 @@ class ArticleViewSet(viewsets.ModelViewSet):
     serializer_class = ArticleListSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly]
     lookup_field = 'slug'
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    # 搜索使用全文索引，放在排序之后以便默认按相关度排序
+    filter_backends = [filters.OrderingFilter, IndexedSearchFilter]
     search_fields = ['title', 'content']
+    search_index_kind = 'article'
     ordering_fields = ['created_at', 'published_at', 'title']
     ordering = ['-created_at']
+    # 键集分页的排序键
+    cursor_ordering = ('-created_at', '-id')
+    # 每个操作的查询数量上限，与每页条数无关（不含认证查询；登录用户另有点赞、收藏状态
+    # 最多两条，结果会缓存）：
+    # list 为条件请求的聚合、本页文章（含作者、分类、统计）和标签各一条，
+    # 页码分页或 count=1 时另加一条 COUNT；
+    # retrieve 为文章、标签和相关文章各一条；my_articles 为本页文章和标签各一条
+    query_budget = {'list': 4, 'retrieve': 3, 'my_articles': 3}
     
     def get_queryset(self):
-        """根据用户权限过滤文章"""
-        user = self.request.user
-        
-        # 基本查询：已发布且公开的文章
-        queryset = Article.objects.filter(status='published', visibility='public')
+        """
+        根据用户权限过滤文章
         
-        # 如果用户已登录，添加用户自己的私密文章
-        if user.is_authenticated:
-            user_articles = Article.objects.filter(author=user)
-            queryset = queryset | user_articles
+        可见范围合并为一个过滤条件（不再把两个查询集用 | 合并后 DISTINCT），
+        标签过滤使用 EXISTS 子查询，不产生重复行；作者、分类和统计与文章在同一查询中读取，
+        读取操作一次预加载整页文章的标签，查询数量与每页条数无关（见 query_budget）。
+        """
+        user = self.request.user
+        params = self.request.query_params
+        queryset = Article.objects.select_related('author', 'category', 'stats')
         
-        # 如果是管理员，显示所有文章
-        if user.is_authenticated and user.is_staff:
-            queryset = Article.objects.all()
+        # 管理员可以看到所有文章；其他用户看到已发布且公开的文章，以及自己的全部文章
+        if not (user.is_authenticated and user.is_staff):
+            visible = Q(status='published', visibility='public')
+            if user.is_authenticated:
+                visible |= Q(author=user)
+            queryset = queryset.filter(visible)
         
         # 分类过滤
-        category_slug = self.request.query_params.get('category')
+        category_slug = params.get('category')
         if category_slug:
             queryset = queryset.filter(category__slug=category_slug)
         
         # 标签过滤
-        tag_slug = self.request.query_params.get('tag')
+        tag_slug = params.get('tag')
         if tag_slug:
-            queryset = queryset.filter(tags__slug=tag_slug)
+            queryset = queryset.filter(Exists(
+                Article.tags.through.objects.filter(article_id=OuterRef('pk'), tag__slug=tag_slug)
+            ))
         
         # 作者过滤
-        author_id = self.request.query_params.get('author')
+        author_id = params.get('author')
         if author_id:
             queryset = queryset.filter(author_id=author_id)
         
-        # 状态过滤（仅对作者和管理员有效）
-        status_filter = self.request.query_params.get('status')
-        if status_filter and user.is_authenticated:
-            if status_filter == 'draft' and (user.is_staff or queryset.filter(author=user).exists()):
-                queryset = queryset.filter(Q(status='draft') & Q(author=user) | Q(status='draft') & Q(user.is_staff))
+        # 草稿过滤：管理员看到所有草稿，其他用户只看到自己的草稿
+        if params.get('status') == 'draft' and user.is_authenticated:
+            queryset = queryset.filter(status='draft')
+            if not user.is_staff:
+                queryset = queryset.filter(author=user)
         
-        return queryset.distinct()
+        if self.action == 'list':
+            # 列表返回保存的摘要，不读取正文
+            queryset = queryset.defer('content')
+        if self.action in ('list', 'retrieve'):
+            queryset = queryset.prefetch_related('tags')
+        return queryset
     
     def get_serializer_class(self):
         """根据操作选择序列化器"""
@@ -158,30 +181,58 @@ class ArticleViewSet(viewsets.ModelViewSet):
             return ArticleDetailSerializer
         return ArticleListSerializer
     
+    def list(self, request, *args, **kwargs):
+        """文章列表，内容未变化时返回304，不分页也不序列化"""
+        # 只过滤一次：搜索时 IndexedSearchFilter 在过滤时执行排序查询
+        queryset = self.filter_queryset(self.get_queryset())
+        etag, last_modified = list_validators(
+            queryset, request.user,
+            request.accepted_renderer.format, sorted(request.query_params.lists())
+        )
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            response = self.get_paginated_response(serializer.data)
+        else:
+            serializer = self.get_serializer(queryset, many=True)
+            response = Response(serializer.data)
+        return set_validators(response, etag, last_modified)
+    
+    def retrieve(self, request, *args, **kwargs):
+        """文章详情，内容未变化时返回304，不序列化"""
+        instance = self.get_object()
+        etag, last_modified = article_validators(
+            instance, request.user, request.accepted_renderer.format
+        )
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
+        serializer = self.get_serializer(instance)
+        return set_validators(Response(serializer.data), etag, last_modified)
+    
+    def paginate_queryset(self, queryset):
+        """为当前页的文章一次性加载当前用户的点赞和收藏状态"""
+        page = super().paginate_queryset(queryset)
+        if page is not None:
+            attach_reactions(page, self.request.user)
+        return page
+    
     def perform_create(self, serializer):
-        """创建文章时设置作者和slug"""
-        # 生成slug
-        title = serializer.validated_data.get('title')
-        slug = slugify(title)
-        
-        # 确保slug唯一
-        if Article.objects.filter(slug=slug).exists():
-            slug = f"{slug}-{timezone.now().strftime('%Y%m%d%H%M%S')}"
-        
-        # 保存文章
-        serializer.save(author=self.request.user, slug=slug)
+        """创建文章时设置作者，slug在保存时分配"""
+        serializer.save(author=self.request.user)
     
     def perform_update(self, serializer):
         """更新文章时可能需要更新slug"""
-        instance = self.get_object()
+        instance = serializer.instance
         title = serializer.validated_data.get('title')
         
-        # 如果标题变了，更新slug
+        # 如果标题变了，重新分配slug
         if title and title != instance.title:
-            slug = slugify(title)
-            if Article.objects.filter(slug=slug).exclude(id=instance.id).exists():
-                slug = f"{slug}-{timezone.now().strftime('%Y%m%d%H%M%S')}"
-            serializer.save(slug=slug)
+            slug_length = Article._meta.get_field('slug').max_length
+            serializer.save(slug=allocate_slug(title, slug_length))
         else:
             serializer.save()
     
@@ -191,7 +242,12 @@ class ArticleViewSet(viewsets.ModelViewSet):
         if not request.user.is_authenticated:
             return Response({"detail": "认证失败"}, status=status.HTTP_401_UNAUTHORIZED)
         
-        queryset = Article.objects.filter(author=request.user)
+        queryset = (
+            Article.objects.filter(author=request.user)
+            .select_related('author', 'category', 'stats')
+            .prefetch_related('tags')
+            .defer('content')
+        )
         
         # 状态过滤
         status_filter = request.query_params.get('status')
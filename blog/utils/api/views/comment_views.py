@@ -1,8 +1,11 @@
+from django.db.models import Q
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
 from apps.comments.models import Comment
+from apps.comments.tree import attach_replies
+from utils.sensitive import contains_sensitive_words
 from utils.api.serializers.comment_serializers import CommentSerializer, CommentCreateSerializer
 from utils.api.permissions import IsOwnerOrReadOnly, IsAdminOrStaffUser
 
@@ -31,22 +34,20 @@ class CommentViewSet(viewsets.ModelViewSet):
     """
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly]
+    # 键集分页的排序键
+    cursor_ordering = ('-created_at', '-id')
+    # 每个操作的查询数量上限，与每页条数和回复数量无关（不含认证查询）：
+    # list/pending 为本页评论和回复树各一条，retrieve 为评论和回复树各一条
+    query_budget = {'list': 3, 'retrieve': 2, 'pending': 3}
     
     def get_queryset(self):
-        """根据用户权限过滤评论"""
-        user = self.request.user
-        
-        # 基本查询：已批准的评论
-        queryset = Comment.objects.filter(is_approved=True)
-        
-        # 如果用户已登录，添加用户自己的未批准评论
-        if user.is_authenticated:
-            user_comments = Comment.objects.filter(author=user, is_approved=False)
-            queryset = queryset | user_comments
+        """
+        根据用户权限过滤评论
         
-        # 如果是管理员，显示所有评论
-        if user.is_authenticated and user.is_staff:
-            queryset = Comment.objects.all()
+        可见范围使用 visible_filter 一个过滤条件，不再用 | 合并两个查询集；
+        作者在同一查询中读取，回复树由 paginate_queryset 一次加载（见 query_budget）。
+        """
+        queryset = Comment.objects.filter(self.visible_filter())
         
         # 文章过滤
         article_id = self.request.query_params.get('article')
@@ -60,7 +61,28 @@ class CommentViewSet(viewsets.ModelViewSet):
         elif parent:
             queryset = queryset.filter(parent_id=parent)
         
-        return queryset.order_by('-created_at')
+        return queryset.select_related('author').order_by('-created_at')
+    
+    def visible_filter(self):
+        """当前用户可见的评论，与 get_queryset 的权限规则一致"""
+        user = self.request.user
+        if user.is_authenticated and user.is_staff:
+            return Q()
+        if user.is_authenticated:
+            return Q(is_approved=True) | Q(author=user)
+        return Q(is_approved=True)
+    
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['visible_comments'] = self.visible_filter()
+        return context
+    
+    def paginate_queryset(self, queryset):
+        """为当前页的评论一次性加载回复树"""
+        page = super().paginate_queryset(queryset)
+        if page is not None:
+            attach_replies(page, self.visible_filter())
+        return page
     
     def get_serializer_class(self):
         """根据操作选择序列化器"""
@@ -70,8 +92,9 @@ class CommentViewSet(viewsets.ModelViewSet):
     
     def perform_create(self, serializer):
         """创建评论时设置作者和审核状态"""
-        # 管理员发布的评论自动批准
-        is_approved = self.request.user.is_staff
+        # 非管理员的评论始终需要审核；管理员的评论与网页端一样，包含敏感词时也需要审核
+        content = serializer.validated_data.get('content', '')
+        is_approved = self.request.user.is_staff and not contains_sensitive_words(content)
         serializer.save(author=self.request.user, is_approved=is_approved)
     
     @action(detail=True, methods=['post'], permission_classes=[IsAdminOrStaffUser])
@@ -96,7 +119,7 @@ class CommentViewSet(viewsets.ModelViewSet):
         if not request.user.is_staff:
             return Response({"detail": "您没有权限执行此操作"}, status=status.HTTP_403_FORBIDDEN)
         
-        queryset = Comment.objects.filter(is_approved=False)
+        queryset = Comment.objects.filter(is_approved=False).select_related('author').order_by('-created_at')
         page = self.paginate_queryset(queryset)
         if page is not None:
             serializer = self.get_serializer(page, many=True)
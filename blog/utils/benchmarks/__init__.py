@@ -0,0 +1,11 @@
+"""
+性能基准
+
+在临时测试数据库中生成固定的数据集（dataset.py），依次请求全部网页和API接口
+（scenarios.py），记录查询数量、数据库时间和耗时，与提交到仓库的基线
+（baseline.json）比较，查询数量增加或耗时明显变长时报告回归（runner.py）。
+
+用法：
+    python manage.py benchmark
+    python manage.py benchmark --update-baseline
+"""
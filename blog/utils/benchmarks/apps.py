@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+from django.utils.translation import gettext_lazy as _
+
+
+class BenchmarksConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "utils.benchmarks"
+    verbose_name = _("性能基准")
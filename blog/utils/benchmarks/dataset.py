@@ -0,0 +1,176 @@
+"""
+基准数据集
+
+按固定的随机种子生成数据，同一规模每次生成的内容相同，查询数量可以与基线比较。
+数据通过模型的 save 写入，摘要、统计、搜索索引和相关文章等由信号照常生成。
+
+规模为 1 时包含 8 个用户（1 个管理员）、5 个分类、20 个标签、60 篇文章
+（其中 5 篇私密、5 篇草稿），以及评论（含回复和待审核评论）、点赞、收藏和访问日志。
+"""
+
+import random
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from apps.articles.models import Article, Category, Favorite, Like, Tag
+from apps.comments.models import Comment
+from utils.logs.models import AccessLog
+
+SEED = 20240601
+
+WORDS = (
+    "Django 缓存 查询 索引 模板 中间件 信号 分页 序列化 视图 Python MySQL Redis "
+    "Celery 异步 性能 数据库 事务 部署 日志 测试 搜索 接口 认证 权限 迁移 配置"
+).split()
+CODE_SAMPLES = (
+    (
+        "python",
+        "def fetch(pk):\n    return Article.objects.select_related('author').get(pk=pk)",
+    ),
+    ("sql", "SELECT id, title FROM articles_article WHERE status = 'published';"),
+    ("bash", "python manage.py migrate\npython manage.py runserver"),
+)
+
+
+def sentence(rng, min_words=6, max_words=16):
+    return " ".join(rng.choices(WORDS, k=rng.randint(min_words, max_words))) + "。"
+
+
+def markdown_body(rng, sections=3):
+    """生成包含标题、段落、列表、代码块和图片的Markdown正文"""
+    parts = []
+    for index in range(sections):
+        parts.append(f"## {rng.choice(WORDS)} 第{index + 1}节")
+        parts.extend(
+            " ".join(sentence(rng) for _ in range(rng.randint(2, 5)))
+            for _ in range(rng.randint(1, 3))
+        )
+        roll = rng.random()
+        if roll < 0.4:
+            language, code = rng.choice(CODE_SAMPLES)
+            parts.append(f"```{language}\n{code}\n```")
+        elif roll < 0.6:
+            parts.append("\n".join(f"- {sentence(rng, 3, 6)}" for _ in range(3)))
+        elif roll < 0.7:
+            parts.append(f"![示意图](/media/images/figure-{rng.randint(1, 50)}.png)")
+    return "\n\n".join(parts)
+
+
+def weighted_tags(rng, tags, count):
+    """按长尾分布（第 n 个标签的权重为 1/n）选择不重复的标签"""
+    weights = [1 / (rank + 1) for rank in range(len(tags))]
+    chosen = set()
+    while len(chosen) < min(count, len(tags)):
+        chosen.add(rng.choices(range(len(tags)), weights=weights)[0])
+    return [tags[index] for index in sorted(chosen)]
+
+
+def seed_dataset(scale=1, seed=SEED):
+    """
+    生成基准数据集
+
+    Args:
+        scale: 规模倍数，用户、文章、评论和日志数量随之增加
+        seed: 随机种子
+
+    Returns:
+        dict，包含场景需要的对象：staff、user、article、comment、category、tag、query
+    """
+    rng = random.Random(seed)
+    User = get_user_model()
+
+    staff = User.objects.create_user(
+        username="bench_staff",
+        email="staff@bench.local",
+        password="benchmark",
+        is_staff=True,
+    )
+    users = [staff] + [
+        User.objects.create_user(
+            username=f"bench_user{index}",
+            email=f"user{index}@bench.local",
+            password="benchmark",
+            bio=sentence(rng),
+        )
+        for index in range(7 * scale)
+    ]
+    categories = [
+        Category.objects.create(name=f"分类{index}", slug=f"category-{index}")
+        for index in range(5)
+    ]
+    tags = [Tag.objects.create(name=f"标签{index}") for index in range(20)]
+
+    articles = []
+    for index in range(60 * scale):
+        if index % 12 == 10:
+            status, visibility = "published", "private"
+        elif index % 12 == 11:
+            status, visibility = "draft", "public"
+        else:
+            status, visibility = "published", "public"
+        article = Article.objects.create(
+            title=f"{rng.choice(WORDS)} {rng.choice(WORDS)} 实践 {index}",
+            content=markdown_body(rng, rng.randint(2, 5)),
+            author=rng.choice(users[1:]),
+            category=rng.choice(categories),
+            status=status,
+            visibility=visibility,
+        )
+        article.tags.set(weighted_tags(rng, tags, rng.randint(1, 4)))
+        articles.append(article)
+    published = [
+        article
+        for article in articles
+        if article.status == "published" and article.visibility == "public"
+    ]
+
+    for article in published:
+        parents = []
+        for _ in range(rng.randint(0, 6)):
+            parent = rng.choice(parents) if parents and rng.random() < 0.4 else None
+            comment = Comment.objects.create(
+                content=sentence(rng),
+                author=rng.choice(users),
+                article=article,
+                parent=parent,
+                is_approved=rng.random() > 0.1,
+            )
+            parents.append(comment)
+        for user in rng.sample(users, rng.randint(0, len(users) // 2)):
+            Like.objects.create(user=user, article=article)
+        for user in rng.sample(users, rng.randint(0, len(users) // 3)):
+            Favorite.objects.create(user=user, article=article)
+
+    # 访问日志只用于日志仪表盘，直接批量写入
+    now = timezone.now()
+    paths = ["/", "/articles/"] + [article.get_absolute_url() for article in published]
+    AccessLog.objects.bulk_create(
+        AccessLog(
+            path=rng.choice(paths),
+            method="GET",
+            status_code=rng.choice((200, 200, 200, 304, 404)),
+            user=rng.choice(users + [None] * len(users)),
+            ip_address=f"10.0.{rng.randint(0, 255)}.{rng.randint(1, 254)}",
+            user_agent="benchmark",
+            response_time=round(rng.uniform(5, 300), 2),
+            timestamp=now - timedelta(minutes=index),
+        )
+        for index in range(300 * scale)
+    )
+
+    # 评论最多的公开文章作为详情页的代表
+    article = max(published, key=lambda item: (item.comments.count(), -item.pk))
+    user = article.author
+    if not Favorite.objects.filter(user=user).exists():
+        Favorite.objects.create(user=user, article=published[0])
+    return {
+        "staff": staff,
+        "user": user,
+        "article": article,
+        "comment": article.comments.filter(parent=None, is_approved=True).first(),
+        "category": article.category,
+        "tag": article.tags.first(),
+        "query": WORDS[0],
+    }
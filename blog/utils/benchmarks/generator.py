@@ -0,0 +1,465 @@
+"""
+大规模合成数据集生成
+
+按配置的数量生成用户、分类、标签、文章（Markdown正文）、嵌套评论、点赞、收藏和访问日志，
+用于在本地复现生产规模（如 10 万篇文章、1000 万条访问日志）并分析热点路径。
+
+- 使用 bulk_create 分块写入，每块在一个事务中；文章、评论、点赞和日志分块后由多个进程并行写入
+- 随机数按（种子, 阶段, 块序号）生成，同一种子生成的数据与进程数无关
+- 用户、文章和评论使用预先分配的主键（从表中现有的最大ID之后开始），
+  评论的父评论、标签关联等无需回读自增ID，也适用于不返回批量插入ID的 MySQL
+- 标签、作者、评论数、点赞数、浏览量和日志访问的文章均为长尾分布
+- 时间分布在 days 天内，相对间隔由种子决定，结束时间为开始生成的时间
+
+bulk_create 不触发信号，统计计数、搜索索引和相关文章由生成后执行的
+reconcile_article_stats、rebuild_search_index 和 rebuild_related_articles 重建。
+"""
+
+import itertools
+import json
+import random
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+from functools import lru_cache
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connections, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from apps.articles.models import Article, Category, Favorite, Like, Tag
+from apps.articles.summary import summarize
+from apps.comments.models import Comment
+from utils.logs.models import AccessLog
+
+from .dataset import WORDS, markdown_body, sentence
+
+DEFAULTS = {
+    "users": 1000,
+    "categories": 20,
+    "tags": 500,
+    "articles": 10000,
+    "comments": 5,  # 每篇公开文章的平均评论数
+    "likes": 3,  # 每篇公开文章的平均点赞数
+    "favorites": 1,  # 每篇公开文章的平均收藏数
+    "access_logs": 100000,
+    "days": 365,
+}
+CHUNK_SIZE = 2000
+# 文章状态
+PUBLIC, PRIVATE, DRAFT = 0, 1, 2
+STATUS_FIELDS = {
+    PUBLIC: ("published", "public"),
+    PRIVATE: ("published", "private"),
+    DRAFT: ("draft", "public"),
+}
+# 单篇文章评论、点赞数的上限（相对平均值的倍数）
+LONG_TAIL_CAP = 50
+USER_AGENTS = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/124.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_4) AppleWebKit/605.1.15 Version/17.4 Safari/605.1.15",
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 17_4 like Mac OS X) AppleWebKit/605.1.15 Mobile/15E148",
+    "Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)",
+    "python-requests/2.31.0",
+)
+
+# 工作进程中的生成计划，由 _init_worker 设置
+_plan = None
+
+
+def _rng(seed, phase, index=0):
+    """阶段和块独立的随机数生成器（字符串种子与 PYTHONHASHSEED 无关）"""
+    return random.Random(f"{seed}:{phase}:{index}")
+
+
+@lru_cache(maxsize=None)
+def _zipf_weights(count, exponent=1.0):
+    """长尾分布的累计权重：第 n 个元素的权重为 1/n^exponent（各块共用，不要修改）"""
+    return list(
+        itertools.accumulate(1 / (rank + 1) ** exponent for rank in range(count))
+    )
+
+
+def _pick(rng, cum_weights):
+    """按累计权重选择一个下标"""
+    return bisect_left(cum_weights, rng.random() * cum_weights[-1])
+
+
+def _pick_distinct(rng, cum_weights, count):
+    """按累计权重选择不重复的下标"""
+    count = min(count, len(cum_weights))
+    chosen = set()
+    while len(chosen) < count:
+        chosen.add(_pick(rng, cum_weights))
+    return sorted(chosen)
+
+
+def _long_tail(rng, mean, cap):
+    """平均值约为 mean 的长尾计数（Pareto 分布）"""
+    if mean <= 0:
+        return 0
+    return min(int((rng.paretovariate(1.5) - 1) * mean / 2), cap)
+
+
+def _chunks(total, size):
+    return [
+        (index, start, min(start + size, total))
+        for index, start in enumerate(range(0, total, size))
+    ]
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """
+    临时关闭 auto_now / auto_now_add，bulk_create 时保留对象上设置的时间
+
+    生成的数据需要分布在一段时间内，否则所有记录的创建时间相同，
+    键集分页、按时间排序和统计都无法反映真实情况。
+    """
+    fields = [
+        field
+        for model in models
+        for field in model._meta.concrete_fields
+        if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _next_id(model):
+    return (model.objects.aggregate(value=Max("pk"))["value"] or 0) + 1
+
+
+def build_plan(counts, seed, chunk_size=CHUNK_SIZE):
+    """
+    生成计划：各表的起始ID、文章状态和评论数等跨块共享的数据
+
+    文章状态和评论数在这里一次生成，各块据此分配评论ID，与进程数无关。
+    """
+    counts = {**DEFAULTS, **counts}
+    rng = _rng(seed, "plan")
+    statuses = bytearray(
+        PUBLIC if roll < 0.9 else PRIVATE if roll < 0.95 else DRAFT
+        for roll in (rng.random() for _ in range(counts["articles"]))
+    )
+    comment_cap = max(1, counts["comments"] * LONG_TAIL_CAP)
+    comment_counts = [
+        _long_tail(rng, counts["comments"], comment_cap) if status == PUBLIC else 0
+        for status in statuses
+    ]
+    article_chunks = _chunks(counts["articles"], chunk_size)
+    comment_base = _next_id(Comment)
+    totals = [0, *itertools.accumulate(comment_counts)]
+    comment_offsets = [comment_base + totals[start] for _, start, _ in article_chunks]
+    now = timezone.now()
+    return {
+        "seed": seed,
+        "counts": counts,
+        "chunk_size": chunk_size,
+        "end": now,
+        "start": now - timedelta(days=counts["days"]),
+        "user_base": _next_id(get_user_model()),
+        "category_base": _next_id(Category),
+        "tag_base": _next_id(Tag),
+        "article_base": _next_id(Article),
+        "statuses": bytes(statuses),
+        "comment_counts": comment_counts,
+        "comment_offsets": comment_offsets,
+        "password": make_password("password"),
+    }
+
+
+def _moment(plan, position):
+    """时间范围内的某一时刻，position 取值 0~1"""
+    return plan["start"] + (plan["end"] - plan["start"]) * position
+
+
+def _user_weights(plan):
+    return _zipf_weights(plan["counts"]["users"], 0.8)
+
+
+def generate_taxonomy(plan):
+    """生成分类和标签（数量少，在主进程中写入）"""
+    counts = plan["counts"]
+    rng = _rng(plan["seed"], "taxonomy")
+    categories = [
+        Category(
+            pk=pk,
+            name=f"{rng.choice(WORDS)}{pk}",
+            slug=f"category-{pk}",
+            description=sentence(rng),
+        )
+        for pk in range(
+            plan["category_base"], plan["category_base"] + counts["categories"]
+        )
+    ]
+    tags = [
+        Tag(pk=pk, name=f"{rng.choice(WORDS)}{pk}", slug=f"tag-{pk}")
+        for pk in range(plan["tag_base"], plan["tag_base"] + counts["tags"])
+    ]
+    with transaction.atomic():
+        Category.objects.bulk_create(categories)
+        Tag.objects.bulk_create(tags)
+    return len(categories) + len(tags)
+
+
+def generate_users(index, start, stop):
+    """生成一块用户"""
+    plan = _plan
+    rng = _rng(plan["seed"], "users", index)
+    User = get_user_model()
+    users = []
+    for position in range(start, stop):
+        pk = plan["user_base"] + position
+        users.append(
+            User(
+                pk=pk,
+                username=f"user{pk}",
+                email=f"user{pk}@example.com",
+                password=plan["password"],
+                bio=sentence(rng) if rng.random() < 0.3 else "",
+                is_staff=position == 0,
+                date_joined=_moment(plan, position / plan["counts"]["users"] * 0.5),
+            )
+        )
+    User.objects.bulk_create(users)
+    return len(users)
+
+
+def generate_articles(index, start, stop):
+    """生成一块文章及其标签关联"""
+    plan = _plan
+    counts = plan["counts"]
+    rng = _rng(plan["seed"], "articles", index)
+    user_weights = _user_weights(plan)
+    tag_weights = _zipf_weights(counts["tags"])
+    step = 1 / max(1, counts["articles"])
+
+    articles, links = [], []
+    for position in range(start, stop):
+        pk = plan["article_base"] + position
+        status, visibility = STATUS_FIELDS[plan["statuses"][position]]
+        created = _moment(plan, (position + rng.random()) * step)
+        content = markdown_body(rng, rng.randint(2, 8))
+        articles.append(
+            Article(
+                pk=pk,
+                title=f"{rng.choice(WORDS)} {rng.choice(WORDS)} {sentence(rng, 2, 5)}",
+                slug=f"article-{pk}",
+                content=content,
+                author_id=plan["user_base"] + _pick(rng, user_weights),
+                category_id=plan["category_base"] + rng.randrange(counts["categories"]),
+                status=status,
+                visibility=visibility,
+                created_at=created,
+                updated_at=(
+                    created + timedelta(hours=rng.randint(1, 72))
+                    if rng.random() < 0.2
+                    else created
+                ),
+                published_at=created if status == "published" else None,
+                views_count=_long_tail(rng, 200, 200 * LONG_TAIL_CAP),
+                **summarize(content),
+            )
+        )
+        if counts["tags"]:
+            links.extend(
+                Article.tags.through(article_id=pk, tag_id=plan["tag_base"] + tag)
+                for tag in _pick_distinct(rng, tag_weights, rng.randint(1, 5))
+            )
+    with transaction.atomic():
+        Article.objects.bulk_create(articles)
+        Article.tags.through.objects.bulk_create(links)
+    return len(articles)
+
+
+def generate_interactions(index, start, stop):
+    """生成一块文章的评论（含嵌套回复）、点赞和收藏"""
+    plan = _plan
+    counts = plan["counts"]
+    rng = _rng(plan["seed"], "interactions", index)
+    user_weights = _user_weights(plan)
+    users = counts["users"]
+    step = 1 / max(1, counts["articles"])
+    comment_id = plan["comment_offsets"][index]
+
+    comments, likes, favorites = [], [], []
+    for position in range(start, stop):
+        if plan["statuses"][position] != PUBLIC:
+            continue
+        article_id = plan["article_base"] + position
+        published = _moment(plan, (position + 1) * step)
+        remaining = max(plan["end"] - published, timedelta(minutes=1))
+
+        thread = []
+        for _ in range(plan["comment_counts"][position]):
+            # 40% 的评论回复本文已有的评论，形成多层嵌套
+            parent = rng.choice(thread) if thread and rng.random() < 0.4 else None
+            created = published + remaining * rng.random() ** 2
+            if parent is not None:
+                created = max(created, parent.created_at + timedelta(seconds=1))
+            comment = Comment(
+                pk=comment_id,
+                content=sentence(rng, 3, 30),
+                author_id=plan["user_base"] + _pick(rng, user_weights),
+                article_id=article_id,
+                parent_id=parent.pk if parent is not None else None,
+                is_approved=rng.random() > 0.05,
+                created_at=created,
+                updated_at=created,
+            )
+            thread.append(comment)
+            comment_id += 1
+        comments.extend(thread)
+
+        for model, mean, target in (
+            (Like, counts["likes"], likes),
+            (Favorite, counts["favorites"], favorites),
+        ):
+            total = min(_long_tail(rng, mean, users), users)
+            target.extend(
+                model(
+                    user_id=plan["user_base"] + user,
+                    article_id=article_id,
+                    created_at=published + remaining * rng.random(),
+                )
+                for user in rng.sample(range(users), total)
+            )
+    with transaction.atomic():
+        Comment.objects.bulk_create(comments, batch_size=1000)
+        Like.objects.bulk_create(likes, batch_size=1000)
+        Favorite.objects.bulk_create(favorites, batch_size=1000)
+    return len(comments)
+
+
+def _log_target(rng, plan, article_weights):
+    """访问日志的路径、查询参数和状态码"""
+    roll = rng.random()
+    if roll < 0.6 and article_weights:
+        position = len(article_weights) - 1 - _pick(rng, article_weights)
+        status = plan["statuses"][position]
+        code = 200 if status == PUBLIC else rng.choice((302, 403, 404))
+        return f"/articles/article-{plan['article_base'] + position}/", {}, code
+    if roll < 0.7:
+        return "/", {}, 200
+    if roll < 0.8:
+        page = _long_tail(rng, 3, 500) + 1
+        return "/articles/", {"page": [str(page)]} if page > 1 else {}, 200
+    if roll < 0.85:
+        return "/users/search/", {"q": [rng.choice(WORDS)]}, 200
+    if roll < 0.95:
+        return "/api/v1/articles/", {}, 200
+    return "/api/v1/comments/", {}, rng.choice((200, 200, 401))
+
+
+def generate_access_logs(index, start, stop):
+    """生成一块访问日志"""
+    plan = _plan
+    counts = plan["counts"]
+    rng = _rng(plan["seed"], "access_logs", index)
+    user_weights = _user_weights(plan)
+    # 越新的文章访问越多：按从新到旧的顺序取长尾权重
+    article_weights = _zipf_weights(counts["articles"], 0.9)
+    step = 1 / max(1, counts["access_logs"])
+
+    logs = []
+    for position in range(start, stop):
+        path, params, code = _log_target(rng, plan, article_weights)
+        logged_in = rng.random() < 0.3
+        logs.append(
+            AccessLog(
+                path=path,
+                method="GET",
+                status_code=code,
+                user_id=(
+                    plan["user_base"] + _pick(rng, user_weights) if logged_in else None
+                ),
+                ip_address=f"10.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}",
+                user_agent=rng.choice(USER_AGENTS),
+                query_params=json.dumps(params) if params else "",
+                response_time=round(rng.lognormvariate(3.0, 0.8), 2),
+                timestamp=_moment(plan, (position + rng.random()) * step),
+            )
+        )
+    AccessLog.objects.bulk_create(logs, batch_size=1000)
+    return len(logs)
+
+
+def _init_worker(plan):
+    """工作进程初始化：保存计划，关闭从父进程继承的数据库连接"""
+    global _plan
+    import django
+
+    django.setup()
+    connections.close_all()
+    _plan = plan
+
+
+def _run_chunk(phase, index, start, stop):
+    with explicit_timestamps(Article, Comment, Like, Favorite):
+        return PHASES[phase](index, start, stop)
+
+
+PHASES = {
+    "users": generate_users,
+    "articles": generate_articles,
+    "interactions": generate_interactions,
+    "access_logs": generate_access_logs,
+}
+# 每个阶段的块范围对应的数量
+PHASE_TOTALS = {
+    "users": "users",
+    "articles": "articles",
+    "interactions": "articles",
+    "access_logs": "access_logs",
+}
+
+
+def generate(plan, workers=1, progress=None):
+    """
+    按计划生成数据集
+
+    Args:
+        plan: build_plan 返回的计划
+        workers: 并行进程数，为 1 时在当前进程中生成
+        progress: 每写完一块调用 progress(阶段, 已完成块数, 总块数, 写入数量)
+
+    Returns:
+        {阶段: 写入数量}
+    """
+    global _plan
+    _plan = plan
+    totals = {"taxonomy": generate_taxonomy(plan)}
+    pool = None
+    if workers > 1:
+        # 块之间没有依赖，阶段之间按顺序执行（评论依赖文章，文章依赖用户）
+        connections.close_all()
+        pool = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(plan,))
+    try:
+        for phase, count_name in PHASE_TOTALS.items():
+            chunks = _chunks(plan["counts"][count_name], plan["chunk_size"])
+            if pool is None:
+                results = (_run_chunk(phase, *chunk) for chunk in chunks)
+            else:
+                indexes, starts, stops = zip(*chunks) if chunks else ((), (), ())
+                results = pool.map(
+                    _run_chunk, itertools.repeat(phase), indexes, starts, stops
+                )
+            totals[phase] = 0
+            for done, written in enumerate(results, 1):
+                totals[phase] += written
+                if progress is not None:
+                    progress(phase, done, len(chunks), totals[phase])
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return totals
@@ -0,0 +1,137 @@
+"""
+运行性能基准并与基线比较
+
+在临时测试数据库（settings 中配置的 SQLite 或本地 MySQL）中生成数据集，
+请求全部网页和API接口，查询数量增加、耗时超出允许范围或缺少当前数据库的基线时
+以非零状态退出。
+
+用法：
+    python manage.py benchmark
+    python manage.py benchmark --only article_detail --only api_articles
+    python manage.py benchmark --no-time
+    python manage.py benchmark --update-baseline
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.runner import DiscoverRunner
+
+from utils.benchmarks.dataset import seed_dataset
+from utils.benchmarks.runner import (
+    BASELINE_PATH,
+    BenchmarkError,
+    benchmark_settings,
+    compare,
+    load_baseline,
+    run_scenarios,
+    save_baseline,
+)
+from utils.benchmarks.scenarios import SCENARIOS
+
+COLUMNS = ("queries", "warm_queries", "db_ms", "wall_ms", "warm_wall_ms")
+
+
+class Command(BaseCommand):
+    help = "在临时数据库中请求全部网页和API接口，记录查询数量和耗时并与基线比较"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scale", type=int, default=1, help="数据集规模倍数，默认 1"
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=5, help="每个场景冷、热请求各自的次数"
+        )
+        parser.add_argument(
+            "--only",
+            action="append",
+            choices=[scenario.name for scenario in SCENARIOS],
+            help="只运行指定场景，可重复指定",
+        )
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=1.5,
+            help="时间指标允许为基线的多少倍，默认 1.5",
+        )
+        parser.add_argument(
+            "--no-time",
+            action="store_true",
+            help="只比较查询数量（在与基线不同的机器上运行时使用）",
+        )
+        parser.add_argument(
+            "--baseline", default=str(BASELINE_PATH), help="基线文件路径"
+        )
+        parser.add_argument(
+            "--update-baseline",
+            action="store_true",
+            help="用本次结果更新当前数据库类型的基线",
+        )
+
+    def handle(self, *args, **options):
+        scale = max(1, options["scale"])
+        runner = DiscoverRunner(verbosity=0, interactive=False)
+        runner.setup_test_environment()
+        old_config = runner.setup_databases()
+        try:
+            with benchmark_settings():
+                data = seed_dataset(scale)
+                results = run_scenarios(
+                    data, max(1, options["repeat"]), options["only"]
+                )
+            vendor = connection.vendor
+        except BenchmarkError as exc:
+            raise CommandError(str(exc))
+        finally:
+            runner.teardown_databases(old_config)
+            runner.teardown_test_environment()
+
+        baseline = load_baseline(vendor, options["baseline"])
+        self._print_results(results, baseline["scenarios"] if baseline else {})
+
+        if options["update_baseline"]:
+            save_baseline(vendor, results, scale, options["baseline"])
+            self.stdout.write(self.style.SUCCESS(f"已更新 {vendor} 基线"))
+            return
+
+        if baseline is None:
+            raise CommandError(f"没有 {vendor} 基线，使用 --update-baseline 生成并提交")
+
+        check_time = not options["no_time"]
+        if check_time and baseline["scale"] != scale:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"基线的数据集规模为 {baseline['scale']}，只比较查询数量"
+                )
+            )
+            check_time = False
+        regressions = compare(
+            results, baseline["scenarios"], options["tolerance"], check_time
+        )
+        new = sorted(set(results) - set(baseline["scenarios"]))
+        if new:
+            self.stdout.write(self.style.WARNING(f"基线中没有的场景：{', '.join(new)}"))
+        if regressions:
+            for line in regressions:
+                self.stderr.write(line)
+            raise CommandError(f"{len(regressions)} 项指标超出基线")
+        self.stdout.write(self.style.SUCCESS(f"{len(results)} 个场景均未超出基线"))
+
+    def _print_results(self, results, baseline):
+        width = max(len(name) for name in results) if results else 10
+        self.stdout.write(
+            f"{'scenario':<{width}} " + " ".join(f"{column:>13}" for column in COLUMNS)
+        )
+        for name, result in results.items():
+            cells = []
+            for column in COLUMNS:
+                value = result[column]
+                cell = f"{value}" if isinstance(value, int) else f"{value:.1f}"
+                expected = baseline.get(name, {}).get(column)
+                if (
+                    expected is not None
+                    and isinstance(value, int)
+                    and value != expected
+                ):
+                    cell += f"({value - expected:+d})"
+                cells.append(f"{cell:>13}")
+            self.stdout.write(f"{name:<{width}} " + " ".join(cells))
@@ -0,0 +1,156 @@
+"""
+回放访问日志中的请求
+
+把一段时间内记录的 GET/HEAD 请求按原来的相对时间（或倍速）发送到正在运行的实例，
+按路由报告吞吐量、延迟分位数和错误率，并与日志中记录的响应时间比较。
+
+用法：
+    python manage.py replay_access_log http://127.0.0.1:8000
+    python manage.py replay_access_log http://127.0.0.1:8000 --minutes 30 --speed 10 --workers 32
+    python manage.py replay_access_log http://staging:8000 --since 2024-06-01T09:00 --until 2024-06-01T10:00 --speed 0
+"""
+
+import json
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from utils.benchmarks.replay import PERCENTILES, Replayer, logged_requests
+from utils.logs.models import AccessLog
+
+
+def _parse_time(value):
+    moment = parse_datetime(value)
+    if moment is None:
+        raise CommandError(f"无法解析时间：{value}")
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+class Command(BaseCommand):
+    help = (
+        "把访问日志中一段时间的请求回放到运行中的实例，按路由报告吞吐量、延迟和错误率"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("base_url", help="目标实例地址，如 http://127.0.0.1:8000")
+        parser.add_argument(
+            "--since", help="开始时间（ISO 8601），默认为 --until 之前 --minutes 分钟"
+        )
+        parser.add_argument(
+            "--until", help="结束时间（ISO 8601），默认为最后一条日志的时间"
+        )
+        parser.add_argument(
+            "--minutes",
+            type=int,
+            default=60,
+            help="未指定 --since 时回放的分钟数，默认 60",
+        )
+        parser.add_argument(
+            "--speed",
+            type=float,
+            default=1.0,
+            help="回放速度倍数，1 为保持原来的相对时间，0 为尽快发送，默认 1",
+        )
+        parser.add_argument(
+            "--workers", type=int, default=8, help="并发发送请求的线程数，默认 8"
+        )
+        parser.add_argument("--limit", type=int, help="最多回放的请求数")
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=10.0,
+            help="单个请求的超时时间（秒），默认 10",
+        )
+        parser.add_argument(
+            "--anonymous-only",
+            action="store_true",
+            help="只回放匿名用户的请求（登录用户的请求回放时没有会话）",
+        )
+        parser.add_argument(
+            "--header",
+            action="append",
+            default=[],
+            help="附加的请求头，如 'Authorization: Bearer <token>'，可重复指定",
+        )
+        parser.add_argument("--output", help="把结果以JSON格式写入文件")
+
+    def handle(self, *args, **options):
+        headers = {}
+        for header in options["header"]:
+            name, sep, value = header.partition(":")
+            if not sep:
+                raise CommandError(f"请求头格式应为 'Name: value'：{header}")
+            headers[name.strip()] = value.strip()
+
+        if options["until"]:
+            until = _parse_time(options["until"])
+        else:
+            latest = AccessLog.objects.aggregate(latest=Max("timestamp"))["latest"]
+            if latest is None:
+                raise CommandError("没有访问日志")
+            # 包含最后一条日志
+            until = latest + timedelta(microseconds=1)
+        if options["since"]:
+            since = _parse_time(options["since"])
+        else:
+            since = until - timedelta(minutes=options["minutes"])
+        if since >= until:
+            raise CommandError("开始时间应早于结束时间")
+
+        self.stdout.write(
+            f"回放 {since:%Y-%m-%d %H:%M:%S} ~ {until:%Y-%m-%d %H:%M:%S} 的请求到 "
+            f"{options['base_url']}（{options['speed'] or '不限'} 倍速，{options['workers']} 个线程）"
+        )
+        replayer = Replayer(
+            options["base_url"],
+            workers=options["workers"],
+            speed=options["speed"],
+            timeout=options["timeout"],
+            headers=headers,
+        )
+        replayer.run(
+            logged_requests(since, until, options["limit"], options["anonymous_only"])
+        )
+        report = replayer.report()
+        self._print_report(report)
+
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as output:
+                json.dump(report, output, ensure_ascii=False, indent=2)
+            self.stdout.write(f"结果已写入 {options['output']}")
+
+    def _print_report(self, report):
+        columns = ["count", "rps", "error_rate", "mismatched"]
+        for percent in PERCENTILES:
+            columns += [f"p{percent}_ms", f"logged_p{percent}_ms"]
+        rows = [("全部", report["total"]), *report["routes"].items()]
+        width = max(len(route) for route, _ in rows)
+        self.stdout.write(
+            f"{'route':<{width}} " + " ".join(f"{column:>14}" for column in columns)
+        )
+        for route, row in rows:
+            cells = []
+            for column in columns:
+                value = row[column]
+                if value is None:
+                    cell = "-"
+                elif column == "error_rate":
+                    cell = f"{value:.2%}"
+                else:
+                    cell = f"{value}"
+                cells.append(f"{cell:>14}")
+            self.stdout.write(f"{route:<{width}} " + " ".join(cells))
+
+        total = report["total"]
+        style = self.style.ERROR if total["errors"] else self.style.SUCCESS
+        self.stdout.write(
+            style(
+                f"共 {total['count']} 个请求，耗时 {report['elapsed']:.1f} 秒，"
+                f"{total['errors']} 个错误，最大发送延迟 {report['lag']:.2f} 秒"
+            )
+        )
@@ -0,0 +1,245 @@
+"""
+访问日志流量回放
+
+从 AccessLog 读取一段时间内的请求，按原来的相对时间（或 speed 倍速、或不等待）
+发送到正在运行的实例，用于按真实的请求组合验证容量和性能变化。
+
+- 只回放 GET/HEAD：日志中没有请求体，修改数据的请求无法也不应重放
+- 日志中没有会话，登录用户的请求以匿名身份（或 --header 指定的认证信息）发送
+- 请求按日志时间排序后由调度线程按时发出，多个工作线程并发发送；
+  工作线程全部忙碌时请求会晚于计划时间发出，报告中的 lag 为最大延迟
+- 按URL路由（而不是具体路径）汇总吞吐量、延迟分位数、错误率，
+  并与日志中记录的 response_time 分位数比较
+"""
+
+import json
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from urllib.parse import urlencode
+
+import requests
+from django.urls import Resolver404, resolve
+
+from utils.logs.models import AccessLog
+
+SAFE_METHODS = ("GET", "HEAD")
+PERCENTILES = (50, 90, 99)
+USER_AGENT = "blog-replay/1.0"
+
+
+@lru_cache(maxsize=10000)
+def route_of(path):
+    """请求路径对应的URL路由，如 /articles/<slug:article_slug>/"""
+    try:
+        match = resolve(path)
+    except Resolver404:
+        return "<unresolved>"
+    # DRF 路由器生成的是正则路由，去掉首尾的 ^ 和 $
+    return "/" + match.route.lstrip("^").rstrip("$")
+
+
+def percentile(values, percent):
+    """最近秩法分位数，values 需已排序"""
+    if not values:
+        return None
+    rank = max(1, -(-len(values) * percent // 100))
+    return values[min(rank, len(values)) - 1]
+
+
+def logged_requests(since, until, limit=None, anonymous_only=False):
+    """
+    按时间顺序读取时间范围内可以回放的请求
+
+    Returns:
+        (时间, 方法, 路径, 查询参数JSON, 状态码, 响应时间, 用户ID) 的迭代器
+    """
+    logs = AccessLog.objects.filter(
+        timestamp__gte=since, timestamp__lt=until, method__in=SAFE_METHODS
+    )
+    if anonymous_only:
+        logs = logs.filter(user__isnull=True)
+    logs = logs.order_by("timestamp", "id").values_list(
+        "timestamp",
+        "method",
+        "path",
+        "query_params",
+        "status_code",
+        "response_time",
+        "user_id",
+    )
+    if limit:
+        logs = logs[:limit]
+    return logs.iterator(chunk_size=2000)
+
+
+def _query_string(query_params):
+    """日志中的查询参数（dict(request.GET) 的JSON）还原为查询字符串"""
+    if not query_params:
+        return ""
+    try:
+        params = json.loads(query_params)
+    except ValueError:
+        return ""
+    return urlencode(params, doseq=True) if isinstance(params, dict) else ""
+
+
+class RouteStats:
+    """一个路由的回放结果"""
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.mismatched = 0
+        self.latencies = []
+        self.logged = []
+
+    def add(self, latency, status, logged_status, logged_time):
+        self.count += 1
+        if status is None or status >= 500:
+            self.errors += 1
+        elif logged_status is not None and status != logged_status:
+            self.mismatched += 1
+        if latency is not None:
+            self.latencies.append(latency)
+        if logged_time is not None:
+            self.logged.append(logged_time)
+
+    def merge(self, other):
+        self.count += other.count
+        self.errors += other.errors
+        self.mismatched += other.mismatched
+        self.latencies.extend(other.latencies)
+        self.logged.extend(other.logged)
+
+    def summary(self, elapsed):
+        latencies, logged = sorted(self.latencies), sorted(self.logged)
+        row = {
+            "count": self.count,
+            "rps": round(self.count / elapsed, 2) if elapsed > 0 else None,
+            "errors": self.errors,
+            "error_rate": round(self.errors / self.count, 4) if self.count else 0.0,
+            "mismatched": self.mismatched,
+        }
+        for percent in PERCENTILES:
+            value = percentile(latencies, percent)
+            expected = percentile(logged, percent)
+            row[f"p{percent}_ms"] = round(value, 2) if value is not None else None
+            row[f"logged_p{percent}_ms"] = (
+                round(expected, 2) if expected is not None else None
+            )
+        return row
+
+
+class Replayer:
+    """
+    回放请求并统计结果
+
+    Args:
+        base_url: 目标实例地址，如 http://127.0.0.1:8000
+        workers: 并发发送请求的线程数
+        speed: 回放速度倍数，1 为按原来的相对时间，0 为不等待尽快发送
+        timeout: 单个请求的超时时间（秒）
+        headers: 附加的请求头，如认证信息
+    """
+
+    def __init__(self, base_url, workers=8, speed=1.0, timeout=10.0, headers=None):
+        self.base_url = base_url.rstrip("/")
+        self.workers = max(1, workers)
+        self.speed = max(0.0, speed)
+        self.timeout = timeout
+        self.headers = {"User-Agent": USER_AGENT, **(headers or {})}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # 等待发送的请求数量上限，尽快回放时避免把整个时间段的请求放进队列
+        self._slots = threading.BoundedSemaphore(self.workers * 4)
+        self.routes = defaultdict(RouteStats)
+        self.lag = 0.0
+        self.elapsed = 0.0
+
+    def _session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+            session.headers.update(self.headers)
+        return session
+
+    def _send(self, method, path, query_params, logged_status, logged_time):
+        url = self.base_url + path
+        query = _query_string(query_params)
+        if query:
+            url = f"{url}?{query}"
+        start = time.perf_counter()
+        try:
+            response = self._session().request(
+                method, url, timeout=self.timeout, allow_redirects=False
+            )
+            # 读取完整响应体，计入传输时间
+            response.content
+            status = response.status_code
+            latency = (time.perf_counter() - start) * 1000
+        except requests.RequestException:
+            status = latency = None
+        finally:
+            self._slots.release()
+        with self._lock:
+            self.routes[route_of(path)].add(latency, status, logged_status, logged_time)
+
+    def run(self, entries):
+        """
+        回放请求，entries 为 logged_requests 返回的迭代器
+
+        Returns:
+            self，结果见 report()
+        """
+        start = time.perf_counter()
+        first = None
+        with ThreadPoolExecutor(self.workers) as pool:
+            for (
+                timestamp,
+                method,
+                path,
+                query_params,
+                status,
+                response_time,
+                _,
+            ) in entries:
+                if first is None:
+                    first = timestamp
+                if self.speed:
+                    due = (timestamp - first).total_seconds() / self.speed
+                    delay = due - (time.perf_counter() - start)
+                    if delay > 0:
+                        time.sleep(delay)
+                self._slots.acquire()
+                if self.speed:
+                    self.lag = max(self.lag, time.perf_counter() - start - due)
+                pool.submit(
+                    self._send, method, path, query_params, status, response_time
+                )
+        self.elapsed = time.perf_counter() - start
+        return self
+
+    def report(self):
+        """
+        回放结果
+
+        Returns:
+            {"elapsed", "lag", "total", "routes"}：total 和 routes 中每个路由包括
+            请求数、吞吐量、错误数和错误率（连接失败或5xx）、状态码与日志不同的请求数、
+            回放延迟和日志响应时间的分位数（毫秒）
+        """
+        total = RouteStats()
+        for stats in self.routes.values():
+            total.merge(stats)
+        routes = sorted(
+            self.routes.items(), key=lambda item: item[1].count, reverse=True
+        )
+        return {
+            "elapsed": round(self.elapsed, 3),
+            "lag": round(self.lag, 3),
+            "total": total.summary(self.elapsed),
+            "routes": {route: stats.summary(self.elapsed) for route, stats in routes},
+        }
@@ -0,0 +1,173 @@
+"""
+运行基准场景并与基线比较
+
+每个场景先清空缓存请求 repeat 次（冷请求），再不清空缓存请求 repeat 次（热请求），记录：
+
+- queries / warm_queries: 冷、热请求的最大查询数量
+- db_ms: 冷请求数据库时间的中位数（毫秒）
+- wall_ms / warm_wall_ms: 冷、热请求耗时的中位数（毫秒）
+
+查询数量与机器无关，超过基线即为回归；时间超过 基线 × tolerance + TIME_SLACK_MS 为回归。
+基线按数据库类型（sqlite、mysql）分别保存。
+"""
+
+import json
+import statistics
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from .scenarios import SCENARIOS
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+# 查询数量指标，增加即为回归
+QUERY_METRICS = ("queries", "warm_queries")
+# 时间指标（毫秒），按比例比较
+TIME_METRICS = ("db_ms", "wall_ms", "warm_wall_ms")
+# 时间至少增加这么多毫秒才视为回归，避免很快的请求因抖动报告回归
+TIME_SLACK_MS = 5.0
+# 依赖Celery的异步处理，基准中同步执行
+ASYNC_SETTINGS = ("AVATARS", "GITHUB_CLIENT", "RELATED_ARTICLES", "ACCESS_LOG_WRITER")
+ACCESS_LOG_MIDDLEWARE = "utils.logs.middleware.AccessLogMiddleware"
+
+
+class BenchmarkError(Exception):
+    """场景请求失败"""
+
+
+def benchmark_settings():
+    """
+    基准使用的设置
+
+    - 异步处理同步执行，不需要Celery和Redis
+    - 关闭匿名整页缓存，测量视图本身
+    - 不记录访问日志：生产环境中由后台线程批量写入，不在请求耗时内
+    - 使用独立的本地内存缓存，清空缓存不影响其他进程
+    """
+    return override_settings(
+        MIDDLEWARE=[
+            name for name in settings.MIDDLEWARE if name != ACCESS_LOG_MIDDLEWARE
+        ],
+        PAGE_CACHE={**getattr(settings, "PAGE_CACHE", {}), "ENABLED": False},
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                "LOCATION": "benchmarks",
+            }
+        },
+        **{
+            name: {**getattr(settings, name, {}), "ASYNC": False}
+            for name in ASYNC_SETTINGS
+        },
+    )
+
+
+def _request(client, url):
+    """请求一次，返回 (查询数量, 数据库时间, 耗时)"""
+    with CaptureQueriesContext(connection) as queries:
+        start = time.perf_counter()
+        response = client.get(url)
+        wall_ms = (time.perf_counter() - start) * 1000
+    if response.status_code != 200:
+        raise BenchmarkError(f"{url} 返回 {response.status_code}")
+    db_ms = sum(float(query["time"]) for query in queries.captured_queries) * 1000
+    return len(queries), db_ms, wall_ms
+
+
+def run_scenario(client, url, repeat=5):
+    """运行一个场景，返回指标"""
+    cold = []
+    for _ in range(repeat):
+        cache.clear()
+        cold.append(_request(client, url))
+    warm = [_request(client, url) for _ in range(repeat)]
+    return {
+        "queries": max(item[0] for item in cold),
+        "warm_queries": max(item[0] for item in warm),
+        "db_ms": round(statistics.median(item[1] for item in cold), 2),
+        "wall_ms": round(statistics.median(item[2] for item in cold), 2),
+        "warm_wall_ms": round(statistics.median(item[2] for item in warm), 2),
+    }
+
+
+def run_scenarios(data, repeat=5, names=None):
+    """
+    运行基准场景
+
+    Args:
+        data: seed_dataset 返回的数据
+        repeat: 冷、热请求各自的次数
+        names: 只运行这些场景，默认全部
+
+    Returns:
+        {场景名称: 指标}
+    """
+    clients = {"anonymous": Client(), "user": Client(), "staff": Client()}
+    clients["user"].force_login(data["user"])
+    clients["staff"].force_login(data["staff"])
+
+    results = {}
+    for scenario in SCENARIOS:
+        if names and scenario.name not in names:
+            continue
+        results[scenario.name] = run_scenario(
+            clients[scenario.role], scenario.url(data), repeat
+        )
+    return results
+
+
+def compare(results, baseline, tolerance=1.5, check_time=True):
+    """
+    与基线比较
+
+    Args:
+        results: run_scenarios 的结果
+        baseline: 基线中的场景指标
+        tolerance: 时间指标允许的倍数
+        check_time: 是否比较时间指标
+
+    Returns:
+        回归说明的列表，基线中没有的场景不比较
+    """
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        for metric in QUERY_METRICS:
+            if result[metric] > expected[metric]:
+                regressions.append(
+                    f"{name}: {metric} {expected[metric]} -> {result[metric]}"
+                )
+        if not check_time:
+            continue
+        for metric in TIME_METRICS:
+            if result[metric] > expected[metric] * tolerance + TIME_SLACK_MS:
+                regressions.append(
+                    f"{name}: {metric} {expected[metric]:.1f}ms -> {result[metric]:.1f}ms"
+                )
+    return regressions
+
+
+def load_baseline(vendor, path=BASELINE_PATH):
+    """读取某种数据库的基线，没有时返回 None"""
+    path = Path(path)
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8")).get(vendor)
+
+
+def save_baseline(vendor, results, scale, path=BASELINE_PATH):
+    """保存某种数据库的基线，保留其他数据库的基线"""
+    path = Path(path)
+    baselines = json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+    baselines[vendor] = {"scale": scale, "scenarios": results}
+    path.write_text(
+        json.dumps(baselines, ensure_ascii=False, indent=2, sort_keys=True) + "\n",
+        encoding="utf-8",
+    )
@@ -0,0 +1,128 @@
+"""
+基准场景：全部网页和 /api/v1/ 接口的 GET 请求
+
+每个场景给出名称、访问身份（anonymous / user / staff）和根据数据集生成URL的函数。
+新增页面或接口时在这里添加场景，并运行 benchmark --update-baseline 更新基线。
+"""
+
+from typing import Callable, NamedTuple
+
+from django.urls import reverse
+
+
+class Scenario(NamedTuple):
+    """一个基准请求"""
+
+    name: str
+    role: str
+    url: Callable[[dict], str]
+
+
+def _api(name, *args):
+    return lambda data: reverse(name, args=[arg(data) for arg in args])
+
+
+SCENARIOS = [
+    # 网页
+    Scenario("home", "anonymous", lambda data: reverse("home")),
+    Scenario(
+        "article_list", "anonymous", lambda data: reverse("articles:article_list")
+    ),
+    Scenario(
+        "article_list_page2",
+        "anonymous",
+        lambda data: reverse("articles:article_list") + "?page=2",
+    ),
+    Scenario(
+        "article_list_category",
+        "anonymous",
+        lambda data: reverse(
+            "articles:article_list_by_category", args=[data["category"].slug]
+        ),
+    ),
+    Scenario(
+        "article_list_tag",
+        "anonymous",
+        lambda data: reverse("articles:article_list_by_tag", args=[data["tag"].pk]),
+    ),
+    Scenario(
+        "article_detail",
+        "anonymous",
+        lambda data: data["article"].get_absolute_url(),
+    ),
+    Scenario(
+        "article_detail_user",
+        "user",
+        lambda data: data["article"].get_absolute_url(),
+    ),
+    Scenario(
+        "search",
+        "anonymous",
+        lambda data: reverse("users:search") + f"?q={data['query']}",
+    ),
+    Scenario(
+        "user_profile",
+        "user",
+        lambda data: reverse("users:profile", args=[data["user"].username]),
+    ),
+    Scenario("my_favorites", "user", lambda data: reverse("articles:my_favorites")),
+    Scenario(
+        "my_published", "user", lambda data: reverse("articles:my_published_articles")
+    ),
+    Scenario("my_drafts", "user", lambda data: reverse("articles:my_draft_articles")),
+    Scenario(
+        "review_comments", "staff", lambda data: reverse("comments:review_comments")
+    ),
+    Scenario("logs_dashboard", "staff", lambda data: reverse("logs:dashboard")),
+    # API
+    Scenario("api_root", "user", _api("api-root")),
+    Scenario("api_articles", "anonymous", _api("article-list")),
+    Scenario(
+        "api_articles_page2",
+        "anonymous",
+        lambda data: reverse("article-list") + "?page=2",
+    ),
+    Scenario(
+        "api_articles_cursor",
+        "anonymous",
+        lambda data: reverse("article-list") + "?cursor=",
+    ),
+    Scenario(
+        "api_articles_tag",
+        "anonymous",
+        lambda data: reverse("article-list") + f"?tag={data['tag'].slug}",
+    ),
+    Scenario("api_articles_user", "user", _api("article-list")),
+    Scenario(
+        "api_article_detail",
+        "anonymous",
+        _api("article-detail", lambda data: data["article"].slug),
+    ),
+    Scenario("api_my_articles", "user", _api("article-my-articles")),
+    Scenario("api_categories", "anonymous", _api("category-list")),
+    Scenario(
+        "api_category_detail",
+        "anonymous",
+        _api("category-detail", lambda data: data["category"].slug),
+    ),
+    Scenario("api_tags", "anonymous", _api("tag-list")),
+    Scenario(
+        "api_tag_detail", "anonymous", _api("tag-detail", lambda data: data["tag"].slug)
+    ),
+    Scenario(
+        "api_comments",
+        "anonymous",
+        lambda data: reverse("comment-list") + f"?article={data['article'].pk}",
+    ),
+    Scenario(
+        "api_comment_detail",
+        "anonymous",
+        _api("comment-detail", lambda data: data["comment"].pk),
+    ),
+    Scenario("api_comments_pending", "staff", _api("comment-pending")),
+    Scenario("api_users", "user", _api("user-list")),
+    Scenario(
+        "api_user_detail", "user", _api("user-detail", lambda data: data["user"].pk)
+    ),
+    Scenario("api_users_me", "user", _api("user-me")),
+]
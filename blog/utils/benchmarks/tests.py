@@ -0,0 +1,211 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.articles.models import Article
+from apps.comments.models import Comment
+from utils.logs.models import AccessLog
+
+from .dataset import seed_dataset
+from .replay import Replayer, logged_requests, percentile
+from .runner import benchmark_settings, compare, load_baseline, run_scenarios
+from .scenarios import SCENARIOS
+
+
+class BenchmarkTest(TestCase):
+    """性能基准测试：各场景的查询数量不超过基线"""
+
+    @classmethod
+    def setUpTestData(cls):
+        with benchmark_settings():
+            cls.data = seed_dataset()
+
+    def test_query_counts_within_baseline(self):
+        """查询数量不超过基线（时间指标由 benchmark 命令比较）"""
+        baseline = load_baseline(connection.vendor)
+        if baseline is None:
+            # benchmark 命令在缺少基线时失败，测试套件不因此失败
+            self.skipTest(
+                f"没有 {connection.vendor} 基线，未比较查询数量；"
+                "运行 python manage.py benchmark --update-baseline 生成并提交"
+            )
+        with benchmark_settings():
+            results = run_scenarios(self.data, repeat=1)
+        self.assertEqual(set(results), {scenario.name for scenario in SCENARIOS})
+        self.assertEqual(set(results), set(baseline["scenarios"]))
+        self.assertEqual(compare(results, baseline["scenarios"], check_time=False), [])
+
+    def test_compare(self):
+        """比较基线：查询数量增加即回归，时间超出倍数和余量才回归"""
+        baseline = {
+            "home": {
+                "queries": 4,
+                "warm_queries": 1,
+                "db_ms": 1.0,
+                "wall_ms": 20.0,
+                "warm_wall_ms": 5.0,
+            }
+        }
+        result = dict(baseline["home"], wall_ms=34.0, warm_wall_ms=12.0)
+        self.assertEqual(compare({"home": result, "new": result}, baseline), [])
+
+        result = dict(result, queries=5, wall_ms=36.0)
+        regressions = compare({"home": result}, baseline)
+        self.assertEqual(len(regressions), 2)
+        self.assertIn("queries 4 -> 5", regressions[0])
+        self.assertEqual(len(compare({"home": result}, baseline, check_time=False)), 1)
+
+
+class GenerateDatasetTest(TestCase):
+    """合成数据集生成命令测试"""
+
+    def _generate(self, seed=1):
+        call_command(
+            "generate_dataset",
+            users=20,
+            categories=3,
+            tags=10,
+            articles=60,
+            access_logs=500,
+            seed=seed,
+            chunk_size=25,
+            workers=1,
+            stdout=StringIO(),
+        )
+
+    def test_generate(self):
+        """按数量生成，评论嵌套在同一篇文章内，时间分布在一段时间内"""
+        self._generate()
+        self.assertEqual(Article.objects.count(), 60)
+        self.assertEqual(AccessLog.objects.count(), 500)
+        self.assertTrue(Comment.objects.filter(parent__isnull=False).exists())
+        self.assertFalse(
+            Comment.objects.filter(parent__isnull=False)
+            .exclude(parent__article_id=F("article_id"))
+            .exists()
+        )
+        self.assertFalse(
+            Comment.objects.exclude(
+                article__status="published", article__visibility="public"
+            ).exists()
+        )
+        first, last = Article.objects.order_by("created_at")[::59]
+        self.assertGreater((last.created_at - first.created_at).days, 300)
+        # 派生数据已重建
+        self.assertEqual(
+            Article.objects.filter(stats__isnull=False).count(), Article.objects.count()
+        )
+
+    def test_deterministic(self):
+        """同一种子生成相同的内容，追加生成时ID接在已有数据之后"""
+        self._generate(seed=3)
+        first = list(Article.objects.order_by("pk").values_list("title", "content"))
+        self._generate(seed=3)
+        articles = Article.objects.order_by("pk").values_list("title", "content")
+        self.assertEqual(list(articles[60:]), first)
+
+
+class StubSiteHandler(BaseHTTPRequestHandler):
+    """回放目标：/error/ 返回500，其他路径返回200"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.server.requests.append(self.path)
+        body = b"ok"
+        self.send_response(500 if self.path.startswith("/error/") else 200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class ReplayAccessLogTest(TestCase):
+    """访问日志回放测试"""
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubSiteHandler)
+        self.server.requests = []
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+
+        self.now = timezone.now().replace(microsecond=0)
+        logs = [
+            ("/", "GET", "", 200, 10.0),
+            ("/articles/", "GET", json.dumps({"page": ["2"], "q": ["a b"]}), 200, 30.0),
+            ("/articles/some-article/", "GET", "", 200, 20.0),
+            ("/articles/other-article/", "GET", "", 404, 5.0),
+            ("/error/", "GET", "", 200, 8.0),
+            ("/articles/create/", "POST", "", 302, 50.0),
+        ]
+        AccessLog.objects.bulk_create(
+            AccessLog(
+                path=path,
+                method=method,
+                query_params=query,
+                status_code=status,
+                response_time=response_time,
+                timestamp=self.now + timedelta(milliseconds=100 * index),
+            )
+            for index, (path, method, query, status, response_time) in enumerate(logs)
+        )
+
+    def test_replay_command(self):
+        """按路由汇总，只回放GET请求，查询参数原样发送"""
+        out = StringIO()
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, "report.json")
+            call_command(
+                "replay_access_log",
+                self.base_url,
+                speed=0,
+                workers=2,
+                output=output,
+                stdout=out,
+            )
+            with open(output, encoding="utf-8") as file:
+                report = json.load(file)
+
+        self.assertEqual(len(self.server.requests), 5)
+        self.assertIn("/articles/?page=2&q=a+b", self.server.requests)
+        self.assertEqual(report["total"]["count"], 5)
+        self.assertEqual(report["total"]["errors"], 1)
+        detail = report["routes"]["/articles/<slug:article_slug>/"]
+        self.assertEqual(detail["count"], 2)
+        # 日志中为404，回放时返回200
+        self.assertEqual(detail["mismatched"], 1)
+        self.assertEqual(detail["logged_p50_ms"], 5.0)
+        self.assertEqual(detail["logged_p99_ms"], 20.0)
+        self.assertIn("/articles/<slug:article_slug>/", out.getvalue())
+
+    def test_relative_timing(self):
+        """按倍速保持请求之间的相对时间"""
+        entries = logged_requests(self.now, self.now + timedelta(seconds=1))
+        start = time.perf_counter()
+        replayer = Replayer(self.base_url, workers=4, speed=2).run(entries)
+        # 第一个和最后一个GET请求相隔 400ms，2 倍速约 200ms
+        self.assertGreaterEqual(time.perf_counter() - start, 0.2)
+        self.assertEqual(replayer.report()["total"]["count"], 5)
+
+    def test_percentile(self):
+        self.assertIsNone(percentile([], 50))
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7], 90), 7)
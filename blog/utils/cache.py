@@ -0,0 +1,217 @@
+"""
+缓存辅助模块（cache-aside）
+
+生产环境的缓存为多个进程共享的Redis（见 settings.CACHES），这里提供统一的读写方式：
+
+- get_or_set: 读取缓存，未命中时计算并写入。临近过期时按概率提前重算
+  （probabilistic early expiration），且同一时间只有拿到锁的进程重算，
+  其他进程继续返回旧值，避免缓存同时失效时大量请求一起访问数据库。
+- 命名空间版本：键中带有命名空间的版本号，invalidate_namespace 使该命名空间下的
+  所有键一次性失效，无需逐个删除。
+- delete_on_commit: 立即删除并在事务提交后再删除一次，避免提交前的并发请求
+  把旧数据写回缓存。
+- safe_cache: 缓存不可用（如Redis宕机）时不抛出异常，读取视为未命中，写入和删除被忽略，
+  页面直接查询数据库，而不是返回500。上面的辅助函数都通过它访问缓存。
+  不可用期间的失效操作会丢失，缓存恢复后旧数据最多保留到各自的过期时间。
+"""
+
+import logging
+import math
+import random
+import time
+from typing import Callable, Hashable, TypeVar
+
+from django.core.cache import cache
+from django.db import transaction
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# 缓存不可用时缓存操作抛出的异常（Redis连接失败、超时等）
+CACHE_ERRORS = (RedisError, OSError)
+
+# 命名空间版本号的缓存键
+NAMESPACE_VERSION_KEY = "cache_ns_{}"
+# 重算锁的缓存键
+LOCK_KEY = "{}:lock"
+# 重算锁的超时时间（秒），计算异常中断时锁会自动释放
+LOCK_TIMEOUT = 30
+# 未命中且其他进程正在重算时，最多等待的时间（秒）
+LOCK_WAIT = 1.0
+LOCK_POLL_INTERVAL = 0.05
+# 过期后旧值继续保留的时间（秒），供重算期间的其他请求使用
+STALE_TTL = 60
+# 提前重算的力度，越大越早重算
+EARLY_EXPIRY_BETA = 1.0
+
+
+def _unavailable(operation, exc):
+    logger.warning("缓存不可用，%s 操作已跳过：%s", operation, exc)
+
+
+class FailSafeCache:
+    """
+    缓存不可用时不抛出异常的缓存
+
+    读取返回默认值（视为未命中），写入和删除被忽略，add 返回 False，
+    incr 抛出 ValueError（与键不存在时相同）。
+    """
+
+    def get(self, key, default=None):
+        try:
+            return cache.get(key, default)
+        except CACHE_ERRORS as exc:
+            _unavailable("get", exc)
+            return default
+
+    def get_many(self, keys):
+        try:
+            return cache.get_many(keys)
+        except CACHE_ERRORS as exc:
+            _unavailable("get_many", exc)
+            return {}
+
+    def set(self, key, value, timeout=None):
+        try:
+            cache.set(key, value, timeout)
+        except CACHE_ERRORS as exc:
+            _unavailable("set", exc)
+
+    def set_many(self, data, timeout=None):
+        try:
+            cache.set_many(data, timeout)
+        except CACHE_ERRORS as exc:
+            _unavailable("set_many", exc)
+
+    def add(self, key, value, timeout=None):
+        try:
+            return cache.add(key, value, timeout)
+        except CACHE_ERRORS as exc:
+            _unavailable("add", exc)
+            return False
+
+    def incr(self, key, delta=1):
+        try:
+            return cache.incr(key, delta)
+        except CACHE_ERRORS as exc:
+            _unavailable("incr", exc)
+            raise ValueError(f"缓存不可用，无法递增 {key}") from exc
+
+    def delete(self, key):
+        try:
+            cache.delete(key)
+        except CACHE_ERRORS as exc:
+            _unavailable("delete", exc)
+
+    def delete_many(self, keys):
+        try:
+            cache.delete_many(keys)
+        except CACHE_ERRORS as exc:
+            _unavailable("delete_many", exc)
+
+
+safe_cache = FailSafeCache()
+
+
+def namespace_version(namespace: str) -> int:
+    """读取命名空间的当前版本号"""
+    key = NAMESPACE_VERSION_KEY.format(namespace)
+    version = safe_cache.get(key)
+    if version is None:
+        # 版本号丢失（如缓存被清空）时以当前时间初始化，不会与旧版本重复
+        safe_cache.add(key, time.time_ns() // 1000, timeout=None)
+        version = safe_cache.get(key, 0)
+    return version
+
+
+def invalidate_namespace(namespace: str) -> None:
+    """使命名空间下的所有键失效"""
+    key = NAMESPACE_VERSION_KEY.format(namespace)
+    try:
+        safe_cache.incr(key)
+    except ValueError:
+        safe_cache.set(key, time.time_ns() // 1000, timeout=None)
+
+
+def namespaced_key(namespace: str, *parts: Hashable) -> str:
+    """生成带命名空间版本号的缓存键，如 comments:v3:42"""
+    suffix = ":".join(str(part) for part in parts)
+    return f"{namespace}:v{namespace_version(namespace)}:{suffix}"
+
+
+def _fresh(expires_at: float, delta: float, beta: float) -> bool:
+    """
+    判断缓存值是否可以继续使用
+
+    剩余时间越短、计算越耗时（delta），提前重算的概率越高。
+    """
+    return time.time() - delta * beta * math.log(1 - random.random()) < expires_at
+
+
+def _compute_and_set(key: str, compute: Callable[[], T], timeout: int) -> T:
+    start = time.time()
+    value = compute()
+    delta = time.time() - start
+    safe_cache.set(key, (value, time.time() + timeout, delta), timeout + STALE_TTL)
+    return value
+
+
+def get_or_set(
+    key: str,
+    compute: Callable[[], T],
+    timeout: int,
+    beta: float = EARLY_EXPIRY_BETA,
+) -> T:
+    """
+    读取缓存，未命中或临近过期时重新计算
+
+    Args:
+        key: 缓存键
+        compute: 计算缓存值的函数，返回值需要可以pickle
+        timeout: 缓存有效时间（秒）
+        beta: 提前重算的力度，0表示不提前重算
+
+    Returns:
+        缓存值或新计算的值，缓存不可用时直接计算
+    """
+    try:
+        entry = cache.get(key)
+    except CACHE_ERRORS as exc:
+        _unavailable("get_or_set", exc)
+        return compute()
+    if entry is not None:
+        value, expires_at, delta = entry
+        if _fresh(expires_at, delta, beta):
+            return value
+
+    lock_key = LOCK_KEY.format(key)
+    try:
+        locked = cache.add(lock_key, 1, LOCK_TIMEOUT)
+    except CACHE_ERRORS as exc:
+        _unavailable("get_or_set", exc)
+        return compute() if entry is None else entry[0]
+    if not locked:
+        if entry is not None:
+            # 其他进程正在重算，先返回旧值
+            return entry[0]
+        # 没有旧值时等待其他进程算完，超时后自行计算
+        deadline = time.time() + LOCK_WAIT
+        while time.time() < deadline:
+            time.sleep(LOCK_POLL_INTERVAL)
+            entry = safe_cache.get(key)
+            if entry is not None:
+                return entry[0]
+        return _compute_and_set(key, compute, timeout)
+
+    try:
+        return _compute_and_set(key, compute, timeout)
+    finally:
+        safe_cache.delete(lock_key)
+
+
+def delete_on_commit(*keys: str) -> None:
+    """删除缓存键，并在当前事务提交后再删除一次"""
+    safe_cache.delete_many(keys)
+    transaction.on_commit(lambda: safe_cache.delete_many(keys))
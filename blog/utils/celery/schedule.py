@@ -15,9 +15,19 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'utils.celery.tasks.cleanup_expired_tokens',
         'schedule': crontab(hour=3, minute=0),
     },
-    # 每小时处理一次文章浏览量
-    'process-article-views-hourly': {
+    # 每天凌晨3点半清理过期的请求剖析记录
+    'cleanup-request-profiles-daily': {
+        'task': 'utils.celery.tasks.cleanup_request_profiles',
+        'schedule': crontab(hour=3, minute=30),
+    },
+    # 每5分钟将缓冲的文章浏览量写回数据库
+    'process-article-views': {
         'task': 'utils.celery.tasks.process_article_views',
-        'schedule': crontab(minute=0),  # 每小时运行一次
+        'schedule': crontab(minute='*/5'),  # 每5分钟运行一次
+    },
+    # 每天凌晨4点全量重建相关文章索引
+    'rebuild-related-articles-daily': {
+        'task': 'utils.celery.tasks.rebuild_related_articles_task',
+        'schedule': crontab(hour=4, minute=0),
     },
 }
\ No newline at end of file
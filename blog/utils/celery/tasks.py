@@ -106,39 +106,98 @@ def cleanup_expired_tokens():
     return count
 
 
+@app.task
+def cleanup_request_profiles():
+    """删除超过保留天数的请求剖析记录"""
+    from utils.logs.profiler import cleanup_profiles
+
+    count = cleanup_profiles()
+    logger.info(f"清理请求剖析记录完成，已删除 {count} 条")
+    return count
+
+
 @app.task
 def process_article_views():
     """
     处理文章浏览量任务
-    可以定期将临时存储的浏览量数据更新到数据库
+    定期将计数缓存中累积的浏览量批量写回数据库，只处理有新增浏览量的文章
     """
-    from apps.articles.models import Article
-    from django.core.cache import cache
+    from apps.articles.counters import flush_views
 
     logger.info("开始处理文章浏览量数据")
     start_time = time.time()
 
-    # 获取所有文章ID
-    article_ids = Article.objects.values_list("id", flat=True)
-    updated_count = 0
+    # 取出缓冲的浏览量，使用一条批量UPDATE语句原子累加
+    updated_count = flush_views()
+
+    end_time = time.time()
+    logger.info(
+        f"文章浏览量处理完成，更新了 {updated_count} 篇文章，耗时: {end_time - start_time:.2f}秒"
+    )
+    return updated_count
+
+
+@app.task
+def update_related_articles_task(article_ids, rescore_only=False):
+    """
+    增量更新相关文章索引任务
+    文章的标签、分类、状态或可见性变化后提交，更新受影响文章的相关文章；
+    rescore_only 时只重新计算这些文章自己的相关文章（如它们列出的文章被删除）
+    """
+    from apps.articles.related import (
+        rescore_related_articles,
+        update_related_articles,
+    )
+
+    if rescore_only:
+        count = rescore_related_articles(article_ids)
+    else:
+        count = update_related_articles(article_ids)
+    logger.info(f"相关文章索引增量更新完成，更新了 {count} 篇文章")
+    return count
+
 
-    # 逐个处理每篇文章的缓存浏览量
-    for article_id in article_ids:
-        view_count_key = f"article_views_{article_id}"
-        cached_views = cache.get(view_count_key)
+@app.task
+def rebuild_related_articles_task():
+    """
+    全量重建相关文章索引任务
+    每天执行一次，修正增量更新未覆盖的变化（如标签被删除、标签权重变化）
+    """
+    from apps.articles.related import rebuild_related_articles
 
-        if cached_views:
-            # 将缓存的浏览量更新到数据库
-            article = Article.objects.get(id=article_id)
-            article.views += cached_views
-            article.save(update_fields=["views"])
+    logger.info("开始重建相关文章索引")
+    start_time = time.time()
 
-            # 重置缓存
-            cache.delete(view_count_key)
-            updated_count += 1
+    count = rebuild_related_articles()
 
     end_time = time.time()
     logger.info(
-        f"文章浏览量处理完成，更新了 {updated_count} 篇文章，耗时: {end_time - start_time:.2f}秒"
+        f"相关文章索引重建完成，写入 {count} 条记录，耗时: {end_time - start_time:.2f}秒"
     )
-    return updated_count
+    return count
+
+
+@app.task
+def process_avatar_task(user_id, previous_version=""):
+    """
+    处理用户头像任务
+    上传新头像后提交，裁剪原图并生成各尺寸的WebP和JPEG文件
+    """
+    from apps.users.avatars import process_avatar
+
+    version = process_avatar(user_id, previous_version)
+    logger.info(f"用户 {user_id} 的头像处理完成，版本: {version or '无'}")
+    return version
+
+
+@app.task
+def fetch_github_avatar_task(user_id, avatar_url):
+    """
+    下载GitHub头像任务
+    GitHub登录后提交，用户仍使用默认头像时下载GitHub头像并生成各尺寸文件
+    """
+    from utils.github_auth.client import import_github_avatar
+
+    updated = import_github_avatar(user_id, avatar_url)
+    logger.info(f"用户 {user_id} 的GitHub头像{'已更新' if updated else '未更新'}")
+    return updated
@@ -0,0 +1,248 @@
+"""
+GitHub API客户端
+
+OAuth回调中的令牌交换、用户信息请求和头像下载统一通过 GitHubClient 发出：
+
+- 每个进程共用一个 requests.Session，连接池复用到 github.com 和 api.github.com 的
+  TCP/TLS 连接，不再每次请求重新握手；fork 出的子进程重新创建。
+- 所有请求都有连接超时和读取超时（GITHUB_CLIENT 配置），GitHub 响应慢时不会一直占用
+  Web 进程；幂等的 GET 请求在连接失败或 502/503/504 时有限次重试。
+- 头像以流式方式下载，超过 MAX_AVATAR_BYTES 时立即中止，不把整个响应读入内存。
+
+头像下载和处理不在回调中进行：回调只调用 schedule_github_avatar，
+事务提交后交给Celery任务（fetch_github_avatar_task）下载并处理。
+
+OAUTH_URL 和 API_URL 可以配置，测试时指向本地的HTTP服务。
+"""
+
+import logging
+import os
+import threading
+import uuid
+
+import requests
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import Q
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+OPTIONS = {
+    "ASYNC": True,  # 头像通过Celery任务下载
+    "OAUTH_URL": "https://github.com/login/oauth",
+    "API_URL": "https://api.github.com",
+    "CONNECT_TIMEOUT": 3.05,  # 建立连接的超时（秒）
+    "READ_TIMEOUT": 10,  # 两次收到数据之间的超时（秒）
+    "POOL_SIZE": 10,  # 每个主机保留的连接数
+    "RETRIES": 2,  # GET 请求的重试次数
+    "MAX_AVATAR_BYTES": 2 * 1024 * 1024,  # 头像的最大字节数
+}
+# 流式下载每次读取的字节数
+CHUNK_SIZE = 64 * 1024
+
+
+def get_options():
+    return {**OPTIONS, **getattr(settings, "GITHUB_CLIENT", {})}
+
+
+class GitHubError(Exception):
+    """GitHub请求失败、超时或响应不符合要求"""
+
+
+def _build_session(options):
+    """创建带连接池和重试策略的会话"""
+    retry = Retry(
+        total=options["RETRIES"],
+        connect=options["RETRIES"],
+        read=0,
+        status=options["RETRIES"],
+        backoff_factor=0.3,
+        status_forcelist=(502, 503, 504),
+        # 授权码只能使用一次，POST 不重试
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=options["POOL_SIZE"],
+        pool_maxsize=options["POOL_SIZE"],
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"User-Agent": "Blog_OS", "Accept": "application/json"})
+    return session
+
+
+class GitHubClient:
+    """
+    GitHub API客户端
+
+    Args:
+        options: 覆盖 GITHUB_CLIENT 中的配置
+        session: 使用的会话，默认新建一个带连接池的会话
+    """
+
+    def __init__(self, options=None, session=None):
+        self.options = {**get_options(), **(options or {})}
+        self.session = session or _build_session(self.options)
+        self.timeout = (self.options["CONNECT_TIMEOUT"], self.options["READ_TIMEOUT"])
+
+    def _request(self, method, url, **kwargs):
+        try:
+            response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+        except requests.RequestException as e:
+            raise GitHubError(f"请求 {url} 失败: {e}") from e
+        if response.status_code != 200:
+            response.close()
+            raise GitHubError(f"请求 {url} 失败: HTTP {response.status_code}")
+        return response
+
+    def _json(self, method, url, **kwargs):
+        response = self._request(method, url, **kwargs)
+        try:
+            return response.json()
+        except ValueError as e:
+            raise GitHubError(f"{url} 返回的不是JSON") from e
+
+    def exchange_code(self, code, client_id, client_secret):
+        """
+        使用授权码换取访问令牌
+
+        Returns:
+            访问令牌
+        """
+        data = self._json(
+            "POST",
+            f"{self.options['OAUTH_URL']}/access_token",
+            data={
+                "client_id": client_id,
+                "client_secret": client_secret,
+                "code": code,
+            },
+        )
+        token = data.get("access_token") if isinstance(data, dict) else None
+        if not token:
+            raise GitHubError(f"GitHub访问令牌响应中没有access_token: {data}")
+        return token
+
+    def get_user(self, access_token):
+        """获取访问令牌对应的GitHub用户信息"""
+        return self._json(
+            "GET",
+            f"{self.options['API_URL']}/user",
+            headers={"Authorization": f"token {access_token}"},
+        )
+
+    def download_avatar(self, url, max_bytes=None):
+        """
+        流式下载头像，超过 max_bytes 时中止
+
+        Returns:
+            图片内容
+        """
+        max_bytes = max_bytes or self.options["MAX_AVATAR_BYTES"]
+        response = self._request("GET", url, stream=True, headers={"Accept": "image/*"})
+        with response:
+            content_type = response.headers.get("Content-Type", "")
+            if not content_type.startswith("image/"):
+                raise GitHubError(f"头像类型不正确: {content_type or '未知'}")
+            length = response.headers.get("Content-Length")
+            if length and length.isdigit() and int(length) > max_bytes:
+                raise GitHubError(f"头像过大: {length} 字节")
+            chunks = []
+            received = 0
+            try:
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    received += len(chunk)
+                    if received > max_bytes:
+                        raise GitHubError(f"头像超过 {max_bytes} 字节")
+                    chunks.append(chunk)
+            except requests.RequestException as e:
+                raise GitHubError(f"下载头像失败: {e}") from e
+        return b"".join(chunks)
+
+
+_lock = threading.Lock()
+_client = None
+
+
+def _reset_client():
+    global _client
+    _client = None
+
+
+if hasattr(os, "register_at_fork"):
+    # 子进程不能与父进程共用连接
+    os.register_at_fork(after_in_child=_reset_client)
+
+
+def get_client():
+    """返回进程内共用的客户端"""
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = GitHubClient()
+    return _client
+
+
+def import_github_avatar(user_id, avatar_url):
+    """
+    下载GitHub头像设为用户头像并处理
+
+    用户已有自定义头像时不覆盖；下载期间用户上传了头像时放弃下载的文件。
+
+    Returns:
+        是否更新了头像
+    """
+    from apps.users.avatars import DEFAULT_AVATAR, process_avatar
+    from apps.users.models import User
+
+    user = User.objects.filter(pk=user_id).only("avatar", "avatar_version").first()
+    if user is None or (user.avatar and user.avatar.name != DEFAULT_AVATAR):
+        return False
+    try:
+        data = get_client().download_avatar(avatar_url)
+    except GitHubError:
+        logger.exception("下载GitHub头像失败: user=%s", user_id)
+        return False
+
+    previous_version = user.avatar_version
+    # 随机文件名，避免冲突
+    user.avatar.save(
+        f"github_{user_id}_{uuid.uuid4().hex[:8]}.jpg", ContentFile(data), save=False
+    )
+    # 只在头像仍为默认时写入，不触发 post_save 信号
+    updated = (
+        User.objects.filter(pk=user_id)
+        .filter(Q(avatar__isnull=True) | Q(avatar__in=["", DEFAULT_AVATAR]))
+        .update(avatar=user.avatar.name, avatar_version="")
+    )
+    if not updated:
+        user.avatar.delete(save=False)
+        return False
+    process_avatar(user_id, previous_version)
+    return True
+
+
+def schedule_github_avatar(user_id, avatar_url):
+    """事务提交后下载GitHub头像，ASYNC 时交给Celery任务"""
+    if not avatar_url:
+        return
+
+    def dispatch():
+        if get_options()["ASYNC"]:
+            from utils.celery.tasks import fetch_github_avatar_task
+
+            try:
+                fetch_github_avatar_task.delay(user_id, avatar_url)
+                return
+            except Exception:
+                logger.exception("GitHub头像任务提交失败，改为同步下载")
+        import_github_avatar(user_id, avatar_url)
+
+    transaction.on_commit(dispatch)
@@ -10,15 +10,10 @@ from django.contrib.sites.models import Site
 from allauth.socialaccount.models import SocialApp
 from django.utils.http import urlencode
 from django.http import HttpResponseRedirect
-from django.core.files.base import ContentFile
-import requests
 import json
 import os
-import uuid
-from io import BytesIO
-from PIL import Image
 
-from apps.users.utils import crop_and_resize_image
+from .client import GitHubError, get_client, schedule_github_avatar
 
 
 def github_login(request):
@@ -168,36 +163,8 @@ def github_callback(request):
                 user = User.objects.get(username=username)
                 print(f"用户已存在: {username}")
 
-                # 为已存在的用户更新GitHub头像
-                try:
-                    # 获取GitHub头像URL
-                    avatar_url = github_user.get("avatar_url")
-                    if avatar_url:
-                        print(f"更新GitHub头像: {avatar_url}")
-                        # 下载头像
-                        avatar_response = requests.get(avatar_url)
-                        if avatar_response.status_code == 200:
-                            # 保存头像
-                            avatar_content = avatar_response.content
-                            # 使用PIL处理头像
-                            img_io = BytesIO(avatar_content)
-                            # 使用我们现有的裁剪和调整大小函数
-                            processed_image = crop_and_resize_image(img_io)
-
-                            # 如果用户已有自定义头像（不是默认头像），则不覆盖
-                            if (
-                                not user.avatar
-                                or user.avatar.name == "avatars/test.jpg"
-                            ):
-                                # 随机文件名，避免冲突
-                                image_name = (
-                                    f"github_{github_id}_{uuid.uuid4().hex[:8]}.jpg"
-                                )
-                                # 设置用户头像
-                                user.avatar.save(image_name, processed_image, save=True)
-                                print(f"已更新GitHub头像: {image_name}")
-                except Exception as e:
-                    print(f"更新GitHub头像失败: {str(e)}")
+                # 仍使用默认头像时，登录后在后台下载GitHub头像
+                schedule_github_avatar(user.pk, github_user.get("avatar_url"))
             except User.DoesNotExist:
                 # 创建新用户
                 user = User.objects.create_user(
@@ -209,34 +176,9 @@ def github_callback(request):
                 user.first_name = name
                 user.set_unusable_password()  # 设置为不可用的密码
 
-                # 设置GitHub头像
-                try:
-                    # 获取GitHub头像URL
-                    avatar_url = github_user.get("avatar_url")
-                    if avatar_url:
-                        print(f"下载GitHub头像: {avatar_url}")
-                        # 下载头像
-                        avatar_response = requests.get(avatar_url)
-                        if avatar_response.status_code == 200:
-                            # 保存头像
-                            avatar_content = avatar_response.content
-                            # 使用PIL处理头像
-                            img_io = BytesIO(avatar_content)
-                            # 使用我们现有的裁剪和调整大小函数
-                            processed_image = crop_and_resize_image(img_io)
-
-                            # 随机文件名，避免冲突
-                            image_name = (
-                                f"github_{github_id}_{uuid.uuid4().hex[:8]}.jpg"
-                            )
-                            # 设置用户头像
-                            user.avatar.save(image_name, processed_image, save=False)
-                            print(f"已设置GitHub头像: {image_name}")
-                except Exception as e:
-                    print(f"设置GitHub头像失败: {str(e)}")
-                    # 如果设置头像失败，将使用默认头像
-
                 user.save()
+                # 头像在后台下载和处理，不阻塞登录
+                schedule_github_avatar(user.pk, github_user.get("avatar_url"))
                 print(f"创建新用户: {username}, 名称: {name}, 邮箱: {email}")
 
             # 登录用户，指定使用ModelBackend
@@ -266,24 +208,8 @@ def get_github_user_info(access_token):
     使用访问令牌获取GitHub用户信息
     """
     try:
-        # 设置请求头
-        headers = {
-            "Authorization": f"token {access_token}",
-            "Accept": "application/json",
-        }
-
-        # 发送请求获取用户信息
-        response = requests.get("https://api.github.com/user", headers=headers)
-
-        # 检查响应状态
-        if response.status_code == 200:
-            user_data = response.json()
-            return user_data
-        else:
-            print(f"GitHub API请求失败: {response.status_code}")
-            print(f"Response: {response.text}")
-            return None
-    except Exception as e:
+        return get_client().get_user(access_token)
+    except GitHubError as e:
         print(f"获取GitHub用户信息错误: {str(e)}")
         return None
 
@@ -293,38 +219,8 @@ def get_github_access_token(code, client_id, client_secret):
     使用授权码获取GitHub访问令牌
     """
     try:
-        # 设置请求参数
-        params = {
-            "client_id": client_id,
-            "client_secret": client_secret,
-            "code": code,
-        }
-
-        # 设置请求头
-        headers = {
-            "Accept": "application/json",
-        }
-
-        # 发送请求获取访问令牌
-        response = requests.post(
-            "https://github.com/login/oauth/access_token",
-            params=params,
-            headers=headers,
-        )
-
-        # 检查响应状态
-        if response.status_code == 200:
-            data = response.json()
-            if "access_token" in data:
-                return data["access_token"]
-            else:
-                print(f"GitHub访问令牌响应中没有access_token: {data}")
-                return None
-        else:
-            print(f"GitHub访问令牌请求失败: {response.status_code}")
-            print(f"Response: {response.text}")
-            return None
-    except Exception as e:
+        return get_client().exchange_code(code, client_id, client_secret)
+    except GitHubError as e:
         print(f"获取GitHub访问令牌错误: {str(e)}")
         return None
 
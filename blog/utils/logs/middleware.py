@@ -1,7 +1,8 @@
 import time
 import json
+from django.utils import timezone
 from django.utils.deprecation import MiddlewareMixin
-from .models import AccessLog
+from .writer import get_writer
 
 
 class AccessLogMiddleware(MiddlewareMixin):
@@ -15,6 +16,8 @@ class AccessLogMiddleware(MiddlewareMixin):
     - 来源页面
     - 查询参数
     - 响应时间
+
+    日志记录交给 AccessLogWriter 异步批量写入，不占用请求的响应时间
     """
     
     def process_request(self, request):
@@ -30,7 +33,8 @@ class AccessLogMiddleware(MiddlewareMixin):
             response_time = None
         
         # 获取用户（如果已登录）
-        user = request.user if request.user.is_authenticated else None
+        user = getattr(request, 'user', None)
+        user_id = user.pk if user is not None and user.is_authenticated else None
         
         # 获取IP地址
         x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
@@ -49,19 +53,21 @@ class AccessLogMiddleware(MiddlewareMixin):
         if path.startswith('/static/') or path.startswith('/media/'):
             return response
         
-        # 创建访问日志记录
+        # 提交访问日志记录，由后台线程批量写入
         try:
-            AccessLog.objects.create(
-                path=path,
-                method=request.method,
-                status_code=response.status_code,
-                user=user,
-                ip_address=ip_address,
-                user_agent=request.META.get('HTTP_USER_AGENT', ''),
-                referer=request.META.get('HTTP_REFERER', ''),
-                query_params=json.dumps(query_params) if query_params else '',
-                response_time=response_time
-            )
+            get_writer().submit({
+                # 与字段长度保持一致，避免单条超长记录导致整批写入失败
+                'path': path[:255],
+                'method': request.method,
+                'status_code': response.status_code,
+                'user_id': user_id,
+                'ip_address': ip_address,
+                'user_agent': request.META.get('HTTP_USER_AGENT', ''),
+                'referer': request.META.get('HTTP_REFERER', '')[:255],
+                'query_params': json.dumps(query_params) if query_params else '',
+                'response_time': response_time,
+                'timestamp': timezone.now(),
+            })
         except Exception as e:
             # 记录日志失败不应影响正常响应
             print(f"记录访问日志失败: {e}")
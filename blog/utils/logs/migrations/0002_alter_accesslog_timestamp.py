@@ -0,0 +1,21 @@
+# Generated by Django 4.2.20 on 2026-10-18 19:20
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("logs", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="accesslog",
+            name="timestamp",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now, verbose_name="访问时间"
+            ),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 4.2.20 on 2026-10-18 20:49
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("logs", "0002_alter_accesslog_timestamp"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RequestProfile",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("view", models.CharField(max_length=255, verbose_name="视图")),
+                ("path", models.CharField(max_length=255, verbose_name="请求路径")),
+                ("method", models.CharField(max_length=10, verbose_name="请求方法")),
+                (
+                    "status_code",
+                    models.PositiveIntegerField(
+                        blank=True, null=True, verbose_name="状态码"
+                    ),
+                ),
+                ("duration", models.FloatField(verbose_name="耗时(ms)")),
+                ("samples", models.PositiveIntegerField(verbose_name="采样数")),
+                ("interval", models.FloatField(verbose_name="采样间隔(ms)")),
+                ("stacks", models.TextField(verbose_name="折叠调用栈")),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now, verbose_name="剖析时间"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "请求剖析",
+                "verbose_name_plural": "请求剖析",
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["created_at"], name="logs_reques_created_daf61b_idx"
+                    ),
+                    models.Index(
+                        fields=["view", "created_at"],
+                        name="logs_reques_view_454900_idx",
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 
@@ -31,7 +32,8 @@ class AccessLog(models.Model):
     response_time = models.FloatField(_("响应时间(ms)"), null=True, blank=True)
     
     # 时间信息
-    timestamp = models.DateTimeField(_("访问时间"), auto_now_add=True)
+    # 使用default而不是auto_now_add，保留请求发生时的时间而不是批量写入的时间
+    timestamp = models.DateTimeField(_("访问时间"), default=timezone.now)
     
     class Meta:
         verbose_name = _("访问日志")
@@ -47,3 +49,30 @@ class AccessLog(models.Model):
     def __str__(self):
         user_str = self.user.username if self.user else "匿名用户"
         return f"{user_str} - {self.method} {self.path} - {self.status_code} - {self.timestamp}"
+
+
+class RequestProfile(models.Model):
+    """采样剖析的一次请求（见 profiler.py），调用栈为火焰图工具使用的折叠格式"""
+
+    view = models.CharField(_("视图"), max_length=255)
+    path = models.CharField(_("请求路径"), max_length=255)
+    method = models.CharField(_("请求方法"), max_length=10)
+    status_code = models.PositiveIntegerField(_("状态码"), null=True, blank=True)
+    duration = models.FloatField(_("耗时(ms)"))
+    samples = models.PositiveIntegerField(_("采样数"))
+    interval = models.FloatField(_("采样间隔(ms)"))
+    # 每行为 "调用者;被调用者;... 采样数"，根在前，叶（正在执行的函数）在后
+    stacks = models.TextField(_("折叠调用栈"))
+    created_at = models.DateTimeField(_("剖析时间"), default=timezone.now)
+
+    class Meta:
+        verbose_name = _("请求剖析")
+        verbose_name_plural = _("请求剖析")
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["created_at"]),
+            models.Index(fields=["view", "created_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.view} {self.method} {self.path} - {self.duration:.1f}ms"
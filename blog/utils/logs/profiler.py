@@ -0,0 +1,295 @@
+"""
+采样请求剖析
+
+访问日志只记录响应时间，无法知道慢在哪里。开启 REQUEST_PROFILER 后，中间件按比例
+（或对指定路由的全部请求）在视图执行期间定时采集请求线程的调用栈：
+
+- 进程内只有一个后台采样线程，每隔 INTERVAL 秒读取所有正在剖析的请求线程的当前栈，
+  被剖析的请求本身不执行额外代码，也不像 cProfile 那样拦截每次函数调用
+- 每个请求的调用栈按折叠格式（"根;...;叶 采样数"）保存到 RequestProfile，
+  可以直接交给 flamegraph.pl、speedscope 等工具生成火焰图
+- 管理员在访问日志仪表盘旁的剖析页面按视图查看自身（叶）和累计（在栈中）采样最多的函数
+
+未开启时中间件在启动时被移除（MiddlewareNotUsed），没有任何开销；
+开启后未被抽中的请求只多一次随机数判断。
+"""
+
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_OPTIONS = {
+    # 是否开启剖析
+    "ENABLED": False,
+    # 剖析的请求比例
+    "SAMPLE_RATE": 0.01,
+    # 总是剖析的路由（URL名称，如 'articles:article_detail'，或视图路径）
+    "ROUTES": (),
+    # 采样间隔（秒）
+    "INTERVAL": 0.005,
+    # 保留的最大栈深度（从叶开始）
+    "MAX_DEPTH": 100,
+    # 剖析记录保留天数
+    "RETENTION_DAYS": 7,
+}
+
+
+def get_options():
+    return {**DEFAULT_OPTIONS, **getattr(settings, "REQUEST_PROFILER", {})}
+
+
+_frame_names = {}
+
+
+def _frame_name(frame):
+    """栈帧显示为 模块:函数（按代码对象缓存）"""
+    code = frame.f_code
+    name = _frame_names.get(code)
+    if name is None:
+        module = frame.f_globals.get("__name__", "?")
+        name = f"{module}:{getattr(code, 'co_qualname', code.co_name)}"
+        # 折叠格式中分号分隔栈帧、空格分隔采样数
+        name = _frame_names[code] = name.replace(";", ":").replace(" ", "_")
+    return name
+
+
+def collapse(frame, max_depth=DEFAULT_OPTIONS["MAX_DEPTH"]):
+    """把栈转换为折叠格式的一行：根在前，叶在后"""
+    names = []
+    while frame is not None and len(names) < max_depth:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class StackSampler:
+    """后台线程定时采集正在剖析的线程的调用栈"""
+
+    def __init__(self, interval, max_depth):
+        self.interval = interval
+        self.max_depth = max_depth
+        self._lock = threading.Lock()
+        self._targets = {}
+        self._thread = None
+
+    def start(self, thread_id):
+        """开始采集线程的调用栈"""
+        with self._lock:
+            self._targets[thread_id] = Counter()
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="request-profiler", daemon=True
+                )
+                self._thread.start()
+
+    def stop(self, thread_id):
+        """停止采集，返回 {折叠调用栈: 采样数}"""
+        with self._lock:
+            return self._targets.pop(thread_id, Counter())
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._targets:
+                    # 没有需要采集的线程时退出，下次 start 时重新创建
+                    self._thread = None
+                    return
+                thread_ids = list(self._targets)
+            frames = sys._current_frames()
+            stacks = {
+                thread_id: collapse(frames[thread_id], self.max_depth)
+                for thread_id in thread_ids
+                if thread_id in frames
+            }
+            del frames
+            with self._lock:
+                for thread_id, stack in stacks.items():
+                    counter = self._targets.get(thread_id)
+                    if counter is not None:
+                        counter[stack] += 1
+
+
+_sampler = None
+_sampler_lock = threading.Lock()
+
+
+def get_sampler():
+    """获取进程内共享的采样器"""
+    global _sampler
+    if _sampler is None:
+        with _sampler_lock:
+            if _sampler is None:
+                options = get_options()
+                _sampler = StackSampler(options["INTERVAL"], options["MAX_DEPTH"])
+    return _sampler
+
+
+def _reset_sampler():
+    global _sampler, _sampler_lock
+    _sampler = None
+    _sampler_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    # 采样线程不会复制到子进程
+    os.register_at_fork(after_in_child=_reset_sampler)
+
+
+def view_key(resolver_match, method):
+    """视图函数的路径，DRF视图集包括动作名，如 ArticleViewSet.list"""
+    func = resolver_match.func
+    cls = getattr(func, "cls", None) or getattr(func, "view_class", None)
+    if cls is None:
+        return f"{func.__module__}.{func.__qualname__}"
+    key = f"{cls.__module__}.{cls.__qualname__}"
+    action = (getattr(func, "actions", None) or {}).get(method.lower())
+    return f"{key}.{action}" if action else key
+
+
+class SamplingProfilerMiddleware:
+    """按比例或按路由剖析请求，结果保存到 RequestProfile"""
+
+    def __init__(self, get_response):
+        options = get_options()
+        if not options["ENABLED"]:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = float(options["SAMPLE_RATE"])
+        self.routes = frozenset(options["ROUTES"])
+        self.interval = float(options["INTERVAL"])
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        profile = getattr(request, "_profile", None)
+        if profile is not None:
+            self._finish(request, response, *profile)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        match = request.resolver_match
+        key = view_key(match, request.method)
+        if match.view_name not in self.routes and key not in self.routes:
+            if random.random() >= self.sample_rate:
+                return None
+        thread_id = threading.get_ident()
+        get_sampler().start(thread_id)
+        request._profile = (key, thread_id, time.perf_counter())
+        return None
+
+    def _finish(self, request, response, key, thread_id, start):
+        duration = (time.perf_counter() - start) * 1000
+        stacks = get_sampler().stop(thread_id)
+        if not stacks:
+            # 请求比采样间隔还短
+            return
+        from .models import RequestProfile
+
+        try:
+            RequestProfile.objects.create(
+                view=key[:255],
+                path=request.path[:255],
+                method=request.method,
+                status_code=response.status_code,
+                duration=duration,
+                samples=sum(stacks.values()),
+                interval=self.interval * 1000,
+                stacks="\n".join(
+                    f"{stack} {count}" for stack, count in stacks.most_common()
+                ),
+            )
+        except Exception:
+            # 保存剖析结果失败不应影响正常响应
+            logger.exception("保存请求剖析结果失败")
+
+
+def parse_stacks(text):
+    """解析折叠格式，返回 [(栈帧列表, 采样数)]"""
+    result = []
+    for line in text.splitlines():
+        stack, _, count = line.rpartition(" ")
+        if stack and count.isdigit():
+            result.append((stack.split(";"), int(count)))
+    return result
+
+
+def merge_stacks(profiles):
+    """合并多个剖析记录的调用栈，返回折叠格式文本"""
+    merged = Counter()
+    for profile in profiles:
+        for frames, count in parse_stacks(profile.stacks):
+            merged[";".join(frames)] += count
+    return "".join(f"{stack} {count}\n" for stack, count in merged.most_common())
+
+
+def summarize_profiles(profiles, top=20):
+    """
+    按视图汇总剖析记录
+
+    Args:
+        profiles: RequestProfile 列表
+        top: 每个视图列出的函数数量
+
+    Returns:
+        按总采样数从多到少排列的列表，每项包括 view、requests、samples、
+        avg_duration、max_duration，以及 self 和 cumulative 两个函数列表：
+        [(函数, 采样数, 占比)]。self 为函数正在执行（栈顶）的采样数，
+        cumulative 为函数在栈中（包括它调用的函数）的采样数
+    """
+    views = {}
+    for profile in profiles:
+        view = views.setdefault(
+            profile.view,
+            {
+                "view": profile.view,
+                "requests": 0,
+                "samples": 0,
+                "durations": [],
+                "self": Counter(),
+                "cumulative": Counter(),
+            },
+        )
+        view["requests"] += 1
+        view["durations"].append(profile.duration)
+        for frames, count in parse_stacks(profile.stacks):
+            view["samples"] += count
+            view["self"][frames[-1]] += count
+            # 递归调用的函数在一个栈中只计一次
+            for name in set(frames):
+                view["cumulative"][name] += count
+
+    summary = []
+    for view in sorted(views.values(), key=lambda item: item["samples"], reverse=True):
+        samples = view["samples"] or 1
+        durations = view.pop("durations")
+        view["avg_duration"] = sum(durations) / len(durations)
+        view["max_duration"] = max(durations)
+        for kind in ("self", "cumulative"):
+            view[kind] = [
+                (name, count, count / samples * 100)
+                for name, count in view[kind].most_common(top)
+            ]
+        summary.append(view)
+    return summary
+
+
+def cleanup_profiles(days=None):
+    """删除超过保留天数的剖析记录，返回删除数量"""
+    from .models import RequestProfile
+
+    days = get_options()["RETENTION_DAYS"] if days is None else days
+    deleted, _ = RequestProfile.objects.filter(
+        created_at__lt=timezone.now() - timedelta(days=days)
+    ).delete()
+    return deleted
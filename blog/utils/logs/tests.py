@@ -0,0 +1,275 @@
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.response import Response
+
+from . import profiler
+from .models import AccessLog, RequestProfile
+from .writer import AccessLogWriter, get_dropped_total
+
+User = get_user_model()
+
+
+class AccessLogWriterTest(TestCase):
+    """访问日志批量写入器测试"""
+
+    def setUp(self):
+        cache.clear()
+
+    def make_record(self, path="/"):
+        return {"ip_address": "127.0.0.1", "path": path, "method": "GET"}
+
+    def test_sync_writer_writes_immediately(self):
+        """同步模式下提交即写入"""
+        writer = AccessLogWriter({"ASYNC": False})
+        self.assertTrue(writer.submit(self.make_record("/sync/")))
+        self.assertTrue(AccessLog.objects.filter(path="/sync/").exists())
+        self.assertEqual(writer.stats()["written"], 1)
+
+    def test_flush_writes_in_batches(self):
+        """flush按批量大小写入队列中的记录"""
+        writer = AccessLogWriter({"BATCH_SIZE": 2})
+        with mock.patch.object(writer, "_ensure_started"):
+            for i in range(5):
+                writer.submit(self.make_record(f"/batch/{i}/"))
+        self.assertEqual(AccessLog.objects.count(), 0)
+
+        with mock.patch.object(writer, "_write", wraps=writer._write) as write:
+            writer.flush()
+        self.assertEqual([len(c.args[0]) for c in write.call_args_list], [2, 2, 1])
+        self.assertEqual(AccessLog.objects.count(), 5)
+
+    def test_full_queue_drops_and_reports(self):
+        """队列已满时丢弃记录，并累加到共享计数"""
+        writer = AccessLogWriter({"QUEUE_SIZE": 2, "OVERLOAD_THRESHOLD": 1})
+        with mock.patch.object(writer, "_ensure_started"):
+            results = [writer.submit(self.make_record()) for _ in range(4)]
+        self.assertEqual(results, [True, True, False, False])
+        self.assertEqual(writer.stats()["dropped"], 2)
+
+        writer.flush()
+        self.assertEqual(AccessLog.objects.count(), 2)
+        self.assertEqual(get_dropped_total(), 2)
+
+    def test_overload_sampling(self):
+        """队列使用率超过阈值后按比例采样"""
+        writer = AccessLogWriter(
+            {"QUEUE_SIZE": 10, "OVERLOAD_THRESHOLD": 0.5, "OVERLOAD_SAMPLE_RATE": 0}
+        )
+        with mock.patch.object(writer, "_ensure_started"):
+            accepted = sum(writer.submit(self.make_record()) for _ in range(10))
+        self.assertEqual(accepted, 5)
+        self.assertEqual(writer.stats()["dropped"], 5)
+
+    def test_write_failure_is_swallowed(self):
+        """写入数据库失败不抛出异常"""
+        writer = AccessLogWriter({"ASYNC": False})
+        with mock.patch.object(
+            AccessLog.objects, "bulk_create", side_effect=Exception("db down")
+        ):
+            writer.submit(self.make_record())
+        self.assertEqual(writer.stats()["failed"], 1)
+
+    def test_middleware_records_request(self):
+        """中间件记录普通页面请求"""
+        self.client.get(reverse("home"), HTTP_REFERER="http://example.com/")
+        log = AccessLog.objects.get(path=reverse("home"))
+        self.assertEqual(log.referer, "http://example.com/")
+        self.assertIsNone(log.user_id)
+
+    def test_dashboard_shows_writer_stats(self):
+        """仪表盘展示写入器状态"""
+        User.objects.create_superuser("admin", "admin@example.com", "password")
+        self.client.login(username="admin", password="password")
+        response = self.client.get(reverse("logs:dashboard"))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("writer_stats", response.context)
+
+    def test_dashboard_cursor_pagination(self):
+        """仪表盘使用游标分页，带page参数时使用页码分页"""
+        AccessLog.objects.bulk_create(
+            [AccessLog(ip_address="127.0.0.1", path=f"/{i}/") for i in range(25)]
+        )
+        User.objects.create_superuser("admin", "admin@example.com", "password")
+        self.client.login(username="admin", password="password")
+        url = reverse("logs:dashboard")
+
+        logs = self.client.get(url).context["logs"]
+        self.assertIsNone(logs.paginator)
+        self.assertTrue(logs.has_next())
+        first = [log.pk for log in logs]
+
+        logs = self.client.get(f"{url}?{logs.next_query}").context["logs"]
+        self.assertFalse(set(first) & {log.pk for log in logs})
+
+        logs = self.client.get(url, {"page": 2}).context["logs"]
+        self.assertEqual(logs.number, 2)
+
+
+def busy_wait(seconds):
+    """在被剖析的线程中占用CPU"""
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+PROFILER = {"ENABLED": True, "SAMPLE_RATE": 0, "ROUTES": ["home"], "INTERVAL": 0.001}
+
+
+@override_settings(REQUEST_PROFILER=PROFILER)
+class RequestProfilerTest(TestCase):
+    """采样请求剖析测试"""
+
+    def setUp(self):
+        cache.clear()
+        # 采样器按设置创建，每个测试使用新的采样器
+        profiler._reset_sampler()
+        self.addCleanup(profiler._reset_sampler)
+
+    def test_disabled_middleware_not_used(self):
+        """未开启时中间件不加载"""
+        with override_settings(REQUEST_PROFILER={"ENABLED": False}):
+            with self.assertRaises(MiddlewareNotUsed):
+                profiler.SamplingProfilerMiddleware(lambda request: None)
+
+    def test_sampler_collects_stacks(self):
+        """采样器记录被剖析线程的调用栈，根在前、叶在后"""
+        sampler = profiler.get_sampler()
+        result = {}
+
+        def target():
+            sampler.start(threading.get_ident())
+            busy_wait(0.05)
+            result.update(sampler.stop(threading.get_ident()))
+
+        thread = threading.Thread(target=target)
+        thread.start()
+        thread.join()
+        self.assertGreater(sum(result.values()), 5)
+        stack = max(result, key=result.get).split(";")
+        self.assertEqual(stack[-1], "utils.logs.tests:busy_wait")
+        self.assertIn(
+            "utils.logs.tests:RequestProfilerTest.test_sampler_collects_stacks.<locals>.target",
+            stack,
+        )
+
+    def test_middleware_profiles_chosen_routes(self):
+        """指定路由的请求全部剖析，其他请求按比例（这里为0）剖析"""
+        with mock.patch("apps.articles.views.render", side_effect=self._slow_render):
+            self.client.get(reverse("home"))
+        self.client.get(reverse("articles:article_list"))
+
+        profile = RequestProfile.objects.get()
+        self.assertEqual(profile.view, "apps.articles.views.home")
+        self.assertEqual(profile.path, reverse("home"))
+        self.assertEqual(profile.status_code, 200)
+        self.assertGreater(profile.samples, 0)
+        self.assertIn("utils.logs.tests:busy_wait", profile.stacks)
+
+    def _slow_render(self, *args, **kwargs):
+        from django.shortcuts import render
+
+        busy_wait(0.03)
+        return render(*args, **kwargs)
+
+    def test_view_key_for_viewset_action(self):
+        """DRF视图集按动作区分"""
+        with override_settings(
+            REQUEST_PROFILER={
+                **PROFILER,
+                "ROUTES": ["article-list"],
+                "INTERVAL": 0.0005,
+            }
+        ):
+            with mock.patch(
+                "utils.api.views.article_views.ArticleViewSet.list",
+                side_effect=self._slow_list,
+            ):
+                self.client.get(reverse("article-list"))
+        self.assertEqual(
+            RequestProfile.objects.get().view,
+            "utils.api.views.article_views.ArticleViewSet.list",
+        )
+
+    def _slow_list(self, request, *args, **kwargs):
+        busy_wait(0.03)
+        return Response([])
+
+    def test_summarize_profiles(self):
+        """自身采样按栈顶函数统计，累计采样中递归函数只计一次"""
+        profiles = [
+            RequestProfile(view="v", duration=10, stacks="a;b;c 3\na;b 1"),
+            RequestProfile(view="v", duration=30, stacks="a;d;d 4"),
+            RequestProfile(view="w", duration=5, stacks="a;e 1"),
+        ]
+        summary = profiler.summarize_profiles(profiles)
+        self.assertEqual([view["view"] for view in summary], ["v", "w"])
+        view = summary[0]
+        self.assertEqual(view["requests"], 2)
+        self.assertEqual(view["samples"], 8)
+        self.assertEqual(view["avg_duration"], 20)
+        self.assertEqual(view["self"][0], ("d", 4, 50.0))
+        self.assertEqual(
+            dict((name, count) for name, count, _ in view["cumulative"])["d"], 4
+        )
+        self.assertEqual(view["cumulative"][0][:2], ("a", 8))
+
+    def test_profiles_page(self):
+        """管理员查看剖析报告和下载折叠调用栈"""
+        RequestProfile.objects.create(
+            view="apps.articles.views.home",
+            path="/",
+            method="GET",
+            duration=12.5,
+            samples=5,
+            interval=5,
+            stacks="django:handler;apps.articles.views:home 5",
+        )
+        url = reverse("logs:profiles")
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+        User.objects.create_superuser("admin", "admin@example.com", "password")
+        self.client.login(username="admin", password="password")
+        response = self.client.get(url)
+        self.assertContains(response, "apps.articles.views:home")
+        self.assertEqual(response.context["views"][0]["samples"], 5)
+
+        response = self.client.get(
+            reverse("logs:profile_stacks"), {"view": "apps.articles.views.home"}
+        )
+        self.assertEqual(
+            response.content.decode(), "django:handler;apps.articles.views:home 5\n"
+        )
+
+    def test_cleanup_profiles(self):
+        """删除超过保留天数的记录"""
+        old = RequestProfile.objects.create(
+            view="v",
+            path="/",
+            method="GET",
+            duration=1,
+            samples=1,
+            interval=5,
+            stacks="a 1",
+        )
+        RequestProfile.objects.filter(pk=old.pk).update(
+            created_at=old.created_at - timedelta(days=8)
+        )
+        RequestProfile.objects.create(
+            view="v",
+            path="/",
+            method="GET",
+            duration=1,
+            samples=1,
+            interval=5,
+            stacks="a 1",
+        )
+        self.assertEqual(profiler.cleanup_profiles(), 1)
+        self.assertEqual(RequestProfile.objects.count(), 1)
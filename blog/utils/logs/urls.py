@@ -5,5 +5,7 @@ app_name = 'logs'
 
 urlpatterns = [
     path('dashboard/', views.access_log_dashboard, name='dashboard'),
+    path('profiles/', views.request_profiles, name='profiles'),
+    path('profiles/stacks/', views.request_profile_stacks, name='profile_stacks'),
     path('apply-migrations/', views.apply_migrations, name='apply_migrations'),
 ]
@@ -1,11 +1,25 @@
+from datetime import timedelta
+
 from django.shortcuts import render, redirect
 from django.contrib.admin.views.decorators import staff_member_required
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from django.http import HttpResponse
 from django.db import connections
+from django.db.models import Count
 from django.db.migrations.executor import MigrationExecutor
-from .models import AccessLog
+from utils.cache import get_or_set
+from utils.pagination import paginate
+from .models import AccessLog, RequestProfile
+from .profiler import get_options as get_profiler_options, merge_stacks, summarize_profiles
+from .writer import get_writer, get_dropped_total
+
+# 仪表盘汇总统计的缓存键和有效时间（秒）
+DASHBOARD_STATS_CACHE_KEY = 'access_log_dashboard_stats'
+DASHBOARD_STATS_CACHE_TIMEOUT = 60
+# 剖析页面汇总的最近记录数和时间范围选项（小时）
+PROFILE_LIMIT = 1000
+PROFILE_HOURS = (1, 6, 24, 24 * 7)
 
 
 def apply_migrations(request):
@@ -40,43 +54,107 @@ def apply_migrations(request):
         return HttpResponse(f"应用迁移时出错：{e}")
 
 
+def build_dashboard_stats():
+    """计算访问日志的汇总统计"""
+    total_logs = AccessLog.objects.count()
+    total_users = AccessLog.objects.filter(user__isnull=False).values('user').distinct().count()
+    total_anonymous = AccessLog.objects.filter(user__isnull=True).count()
+
+    # 状态码统计，一次分组查询
+    status_stats = dict(
+        AccessLog.objects.filter(status_code__isnull=False)
+        .exclude(status_code=0)
+        .order_by()
+        .values('status_code')
+        .annotate(count=Count('id'))
+        .values_list('status_code', 'count')
+    )
+    return {
+        'total_logs': total_logs,
+        'total_users': total_users,
+        'total_anonymous': total_anonymous,
+        'status_stats': status_stats,
+    }
+
+
 @staff_member_required
 def access_log_dashboard(request):
     """访问日志仪表盘，仅管理员可见"""
     # 获取所有日志
-    logs = AccessLog.objects.all()
+    logs = AccessLog.objects.select_related('user')
 
-    # 分页
-    paginator = Paginator(logs, 20)  # 每页显示20条日志
-    page = request.GET.get('page')
-    try:
-        logs = paginator.page(page)
-    except PageNotAnInteger:
-        logs = paginator.page(1)
-    except EmptyPage:
-        logs = paginator.page(paginator.num_pages)
+    # 日志表持续增长，使用按(访问时间, ID)的键集分页，避免深分页的OFFSET扫描；
+    # 带page参数时仍按页码分页
+    logs = paginate(request, logs, ('-timestamp', '-id'), per_page=20)
 
-    # 统计信息
-    total_logs = AccessLog.objects.count()
-    total_users = AccessLog.objects.filter(user__isnull=False).values('user').distinct().count()
-    total_anonymous = AccessLog.objects.filter(user__isnull=True).count()
+    # 统计信息需要扫描整个日志表，缓存一段时间
+    stats = get_or_set(
+        DASHBOARD_STATS_CACHE_KEY, build_dashboard_stats, DASHBOARD_STATS_CACHE_TIMEOUT
+    )
 
-    # 状态码统计
-    status_codes = AccessLog.objects.values('status_code').distinct()
-    status_stats = {}
-    for code in status_codes:
-        code_value = code['status_code']
-        if code_value:
-            count = AccessLog.objects.filter(status_code=code_value).count()
-            status_stats[code_value] = count
+    # 异步写入器状态，丢弃数为所有进程的累计值
+    writer_stats = get_writer().stats()
+    writer_stats['dropped_total'] = get_dropped_total()
 
     context = {
         'logs': logs,
-        'total_logs': total_logs,
-        'total_users': total_users,
-        'total_anonymous': total_anonymous,
-        'status_stats': status_stats,
+        'writer_stats': writer_stats,
+        **stats,
         'title': _('访问日志仪表盘'),
     }
 
     return render(request, 'logs/dashboard.html', context)
+
+
+def _recent_profiles(request):
+    """时间范围内最近的剖析记录，返回 (查询集, 小时数)"""
+    try:
+        hours = int(request.GET.get('hours', 24))
+    except ValueError:
+        hours = 24
+    if hours not in PROFILE_HOURS:
+        hours = 24
+    profiles = RequestProfile.objects.filter(
+        created_at__gte=timezone.now() - timedelta(hours=hours)
+    )
+    view = request.GET.get('view')
+    if view:
+        profiles = profiles.filter(view=view)
+    return profiles, hours
+
+
+@staff_member_required
+def request_profiles(request):
+    """请求剖析报告：按视图列出自身和累计采样最多的函数，仅管理员可见"""
+    profiles, hours = _recent_profiles(request)
+    # 只汇总最近的记录，页面耗时与记录总数无关
+    profiles = list(profiles.order_by('-created_at')[:PROFILE_LIMIT])
+    views = summarize_profiles(profiles)
+    for view in views:
+        view['tables'] = (
+            ('self', _('自身采样最多的函数'), view['self']),
+            ('cumulative', _('累计采样最多的函数（包括其调用的函数）'), view['cumulative']),
+        )
+
+    context = {
+        'views': views,
+        'profile_count': len(profiles),
+        'profile_limit': PROFILE_LIMIT,
+        'hours': hours,
+        'hour_choices': PROFILE_HOURS,
+        'selected_view': request.GET.get('view', ''),
+        'options': get_profiler_options(),
+        'title': _('请求剖析'),
+    }
+    return render(request, 'logs/profiles.html', context)
+
+
+@staff_member_required
+def request_profile_stacks(request):
+    """下载合并后的折叠调用栈，可直接用 flamegraph.pl 或 speedscope 打开"""
+    profiles, hours = _recent_profiles(request)
+    profiles = profiles.order_by('-created_at').only('stacks')[:PROFILE_LIMIT]
+    response = HttpResponse(merge_stacks(profiles), content_type='text/plain; charset=utf-8')
+    response['Content-Disposition'] = 'attachment; filename="stacks.folded"'
+    return response
+
@@ -0,0 +1,232 @@
+"""
+访问日志异步批量写入器
+
+中间件只把日志记录放入进程内的有界队列，由后台线程按批量大小或时间间隔
+使用 bulk_create 写入数据库，日志写入不再占用请求的响应时间。
+
+队列使用率超过阈值时按比例采样，队列已满时直接丢弃，保证日志记录
+永远不会阻塞或影响正常请求；丢弃的记录数会累加到共享缓存中，
+在访问日志仪表盘上展示。
+"""
+
+import atexit
+import logging
+import os
+import queue
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+
+from utils.cache import safe_cache
+
+logger = logging.getLogger(__name__)
+
+# 所有进程累计丢弃记录数的缓存键
+DROPPED_TOTAL_KEY = "access_log_dropped_total"
+
+DEFAULT_OPTIONS = {
+    # 是否使用后台线程异步写入，关闭时在请求中同步写入
+    "ASYNC": True,
+    # 队列最大长度
+    "QUEUE_SIZE": 10000,
+    # 每批写入的最大记录数
+    "BATCH_SIZE": 200,
+    # 批量写入的最长间隔（秒）
+    "FLUSH_INTERVAL": 2.0,
+    # 队列使用率超过该比例时视为过载，开始采样
+    "OVERLOAD_THRESHOLD": 0.8,
+    # 过载时保留记录的比例
+    "OVERLOAD_SAMPLE_RATE": 0.1,
+}
+
+
+class AccessLogWriter:
+    """访问日志批量写入器"""
+
+    def __init__(self, options=None):
+        self.options = {**DEFAULT_OPTIONS, **(options or {})}
+        self.batch_size = max(1, int(self.options["BATCH_SIZE"]))
+        self.flush_interval = float(self.options["FLUSH_INTERVAL"])
+        self.queue_size = max(1, int(self.options["QUEUE_SIZE"]))
+        self.high_water = int(
+            self.queue_size * float(self.options["OVERLOAD_THRESHOLD"])
+        )
+        self.sample_rate = float(self.options["OVERLOAD_SAMPLE_RATE"])
+        self.is_async = bool(self.options["ASYNC"])
+
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        """初始化队列和后台线程状态（fork之后在子进程中重新初始化）"""
+        self._pid = os.getpid()
+        self._queue = queue.Queue(maxsize=self.queue_size)
+        self._stop_event = threading.Event()
+        self._thread = None
+        self.written_count = 0
+        self.failed_count = 0
+        self.dropped_count = 0
+        self._reported_dropped = 0
+
+    def submit(self, record):
+        """
+        提交一条访问日志记录
+
+        Args:
+            record: AccessLog 字段字典
+
+        Returns:
+            bool: 记录是否被接受
+        """
+        if not self.is_async:
+            self._write([record])
+            return True
+
+        self._ensure_started()
+
+        # 过载时按比例采样，减轻数据库压力
+        if (
+            self._queue.qsize() >= self.high_water
+            and random.random() >= self.sample_rate
+        ):
+            self._drop()
+            return False
+
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self._drop()
+            return False
+        return True
+
+    def flush(self):
+        """在当前线程中写入队列中剩余的全部记录"""
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+            if len(batch) >= self.batch_size:
+                self._write(batch)
+                batch = []
+        if batch:
+            self._write(batch)
+        self._report_dropped()
+
+    def stop(self, timeout=5):
+        """停止后台线程并写入剩余记录"""
+        self._stop_event.set()
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            thread.join(timeout)
+        self.flush()
+
+    def stats(self):
+        """返回当前进程写入器的运行状态"""
+        return {
+            "queued": self._queue.qsize(),
+            "queue_size": self.queue_size,
+            "written": self.written_count,
+            "failed": self.failed_count,
+            "dropped": self.dropped_count,
+        }
+
+    def _ensure_started(self):
+        """按需启动后台写入线程"""
+        if self._pid != os.getpid():
+            # 进程被fork后，线程不会被继承，需要重新初始化
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._reset()
+
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop_event.clear()
+                self._thread = threading.Thread(
+                    target=self._run, name="access-log-writer", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        """后台线程主循环"""
+        while not self._stop_event.is_set():
+            batch = self._collect()
+            if batch:
+                self._write(batch)
+            self._report_dropped()
+
+    def _collect(self):
+        """收集一批记录，达到批量大小或超过时间间隔即返回"""
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        """批量写入数据库，失败时只记录错误"""
+        from .models import AccessLog
+
+        try:
+            AccessLog.objects.bulk_create(
+                [AccessLog(**record) for record in batch], batch_size=self.batch_size
+            )
+            self.written_count += len(batch)
+        except Exception:
+            self.failed_count += len(batch)
+            logger.exception("批量写入访问日志失败，丢弃 %s 条记录", len(batch))
+        finally:
+            if self.is_async:
+                close_old_connections()
+
+    def _drop(self):
+        """记录一次丢弃"""
+        with self._lock:
+            self.dropped_count += 1
+
+    def _report_dropped(self):
+        """把新增的丢弃数累加到共享缓存，供仪表盘展示"""
+        delta = self.dropped_count - self._reported_dropped
+        if delta <= 0:
+            return
+        self._reported_dropped += delta
+        logger.warning("访问日志队列过载，已丢弃 %s 条记录", delta)
+        try:
+            if not cache.add(DROPPED_TOTAL_KEY, delta, timeout=None):
+                cache.incr(DROPPED_TOTAL_KEY, delta)
+        except Exception:
+            logger.exception("更新访问日志丢弃计数失败")
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer():
+    """获取进程内共享的访问日志写入器"""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = AccessLogWriter(getattr(settings, "ACCESS_LOG_WRITER", None))
+                atexit.register(_writer.stop)
+    return _writer
+
+
+def get_dropped_total():
+    """获取所有进程累计丢弃的记录数"""
+    return safe_cache.get(DROPPED_TOTAL_KEY, 0)
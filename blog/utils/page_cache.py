@@ -0,0 +1,166 @@
+"""
+匿名用户整页缓存
+
+只缓存没有登录状态的请求：GET/HEAD、没有会话Cookie、没有消息Cookie、
+没有 Authorization 请求头。这样的请求一定是匿名用户，缓存命中时不读取会话，
+也不查询数据库。响应设置了Cookie（会话、CSRF）时不缓存，避免把某个访问者的
+状态发给其他人。
+
+缓存键由请求路径和查询参数决定。每个页面带有若干标签（命名空间，见 utils/cache.py），
+缓存时记录各标签的版本号，读取时版本号有变化即视为失效；数据变化时调用
+invalidate_page_tags 递增标签版本，无需知道哪些页面用到了它。
+
+视图可以通过 add_page_tags 追加读取数据后才知道的标签（如文章ID），
+通过 set_page_meta 保存命中时需要的数据（如统计浏览量的文章ID）。
+"""
+
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+
+from .cache import invalidate_namespace, namespace_version, safe_cache
+
+OPTIONS = {
+    "ENABLED": True,
+    "TIMEOUT": 60 * 10,  # 依赖标签失效，过期时间只作为兜底
+}
+# 页面缓存键
+PAGE_KEY = "page:{}"
+# 命中时还原的响应头
+CACHED_HEADERS = (
+    "Content-Type",
+    "Content-Language",
+    "ETag",
+    "Last-Modified",
+    "Cache-Control",
+    "Vary",
+)
+
+
+def get_options():
+    return {**OPTIONS, **getattr(settings, "PAGE_CACHE", {})}
+
+
+def is_anonymous_request(request):
+    """请求没有任何登录状态，可以使用整页缓存"""
+    if request.method not in ("GET", "HEAD"):
+        return False
+    cookies = request.COOKIES
+    if settings.SESSION_COOKIE_NAME in cookies or CookieStorage.cookie_name in cookies:
+        return False
+    return "HTTP_AUTHORIZATION" not in request.META
+
+
+def page_key(request):
+    digest = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return PAGE_KEY.format(digest)
+
+
+def _tag_versions(tags):
+    return {tag: namespace_version(tag) for tag in tags}
+
+
+def add_page_tags(request, *tags):
+    """
+    为当前页面追加缓存标签
+
+    标签的版本号在调用时记录，应在读取对应数据之前（或刚读取后）调用，
+    渲染期间数据发生变化时缓存的页面会立即失效。
+    """
+    versions = getattr(request, "_page_cache_tags", None)
+    if versions is not None:
+        versions.update(_tag_versions(tags))
+
+
+def set_page_meta(request, **meta):
+    """保存缓存命中时需要的数据"""
+    request._page_cache_meta = {**getattr(request, "_page_cache_meta", {}), **meta}
+
+
+def invalidate_page_tags(*tags):
+    """使带有这些标签的页面失效，事务提交后再失效一次"""
+
+    def invalidate():
+        for tag in tags:
+            invalidate_namespace(tag)
+
+    invalidate()
+    transaction.on_commit(invalidate)
+
+
+def _cacheable(request, response):
+    if response.status_code != 200 or response.streaming or response.cookies:
+        return False
+    # 渲染时使用了CSRF令牌或修改了会话，响应会设置Cookie
+    if request.META.get("CSRF_COOKIE_NEEDS_UPDATE"):
+        return False
+    session = getattr(request, "session", None)
+    return session is None or not session.modified
+
+
+def _restore(request, entry):
+    """从缓存数据还原响应，验证器匹配时返回304"""
+    headers = entry["headers"]
+    response = get_conditional_response(
+        request,
+        etag=headers.get("ETag"),
+        last_modified=parse_http_date_safe(headers.get("Last-Modified", "")),
+    )
+    if response is None:
+        response = HttpResponse(entry["content"], status=entry["status"])
+    for name, value in headers.items():
+        response.headers[name] = value
+    return response
+
+
+def cache_anonymous_page(*tags, timeout=None, on_hit=None):
+    """
+    匿名用户整页缓存装饰器
+
+    Args:
+        tags: 页面的缓存标签
+        timeout: 缓存时间（秒），默认使用 PAGE_CACHE["TIMEOUT"]
+        on_hit: 缓存命中时调用的函数 on_hit(request, meta)，如统计浏览量
+    """
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            options = get_options()
+            if not options["ENABLED"] or not is_anonymous_request(request):
+                return view_func(request, *args, **kwargs)
+
+            key = page_key(request)
+            entry = safe_cache.get(key)
+            if entry is not None and _tag_versions(entry["tags"]) == entry["tags"]:
+                if on_hit is not None:
+                    on_hit(request, entry["meta"])
+                return _restore(request, entry)
+
+            # 在视图读取数据之前记录标签版本号
+            request._page_cache_tags = _tag_versions(tags)
+            response = view_func(request, *args, **kwargs)
+            if _cacheable(request, response):
+                entry = {
+                    "tags": request._page_cache_tags,
+                    "meta": getattr(request, "_page_cache_meta", {}),
+                    "status": response.status_code,
+                    "content": response.content,
+                    "headers": {
+                        name: response[name]
+                        for name in CACHED_HEADERS
+                        if response.has_header(name)
+                    },
+                }
+                safe_cache.set(key, entry, timeout or options["TIMEOUT"])
+            return response
+
+        return wrapper
+
+    return decorator
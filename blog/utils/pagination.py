@@ -0,0 +1,239 @@
+"""
+键集（游标）分页
+
+OFFSET 分页在翻到靠后的页面时需要扫描并丢弃前面的所有行，还要额外执行一次
+COUNT(*)。键集分页记住当前页最后一行的排序键（如 (published_at, id)），
+下一页直接用 WHERE 条件从该位置继续读取，查询代价与页码无关。
+
+游标是对排序键编码后的不透明字符串，排序字段不能为空，最后一个字段必须唯一（通常为 id）。
+URL 中带有 page 参数时仍使用原来的页码分页，保证已有链接可用。
+"""
+
+import base64
+import binascii
+import json
+
+from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.db.models import Q
+
+# 游标方向：向后翻页 / 向前翻页
+NEXT = "n"
+PREVIOUS = "p"
+
+
+class InvalidCursor(ValueError):
+    """游标无法解析"""
+
+
+def encode_cursor(position, direction=NEXT):
+    """把排序键编码为不透明的游标字符串"""
+    payload = json.dumps({"p": position, "d": direction}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """
+    解析游标字符串
+
+    Returns:
+        (position, direction) 元组
+
+    Raises:
+        InvalidCursor: 游标格式错误
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        position, direction = data["p"], data["d"]
+    except (binascii.Error, UnicodeDecodeError, ValueError, KeyError, TypeError):
+        raise InvalidCursor(cursor)
+    if direction not in (NEXT, PREVIOUS) or not isinstance(position, list):
+        raise InvalidCursor(cursor)
+    return position, direction
+
+
+def _field_names(ordering):
+    return [name.lstrip("-") for name in ordering]
+
+
+def _position_of(obj, ordering):
+    """取出对象的排序键，转换为可以JSON序列化的值"""
+    position = []
+    for name in _field_names(ordering):
+        value = getattr(obj, name)
+        position.append(value.isoformat() if hasattr(value, "isoformat") else value)
+    return position
+
+
+def _parse_position(model, ordering, position):
+    """把游标中的排序键转换回字段对应的Python类型"""
+    names = _field_names(ordering)
+    if len(position) != len(names):
+        raise InvalidCursor(position)
+    try:
+        return [
+            model._meta.get_field(name).to_python(value)
+            for name, value in zip(names, position)
+        ]
+    except Exception:
+        raise InvalidCursor(position)
+
+
+def _after(ordering, values, reverse=False):
+    """
+    构造“排在该位置之后”的过滤条件
+
+    对 (a, b) 降序：a < va OR (a = va AND b < vb)
+    """
+    condition = Q()
+    equal = {}
+    for name, value in zip(ordering, values):
+        field = name.lstrip("-")
+        descending = name.startswith("-") != reverse
+        lookup = "lt" if descending else "gt"
+        condition |= Q(**equal, **{f"{field}__{lookup}": value})
+        equal[field] = value
+    return condition
+
+
+def _reverse(ordering):
+    return [name[1:] if name.startswith("-") else f"-{name}" for name in ordering]
+
+
+class CursorPage:
+    """
+    键集分页的一页结果，提供与 django Page 相近的接口
+
+    paginator 为 None，模板可据此区分游标分页和页码分页。
+    """
+
+    paginator = None
+
+    def __init__(self, object_list, ordering, has_next, has_previous, count=None):
+        self.object_list = object_list
+        self.ordering = ordering
+        self._has_next = has_next
+        self._has_previous = has_previous
+        # 未统计总数时为None
+        self.count = count
+        self.next_query = ""
+        self.previous_query = ""
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if not self._has_next or not self.object_list:
+            return None
+        return encode_cursor(_position_of(self.object_list[-1], self.ordering), NEXT)
+
+    @property
+    def previous_cursor(self):
+        if not self._has_previous or not self.object_list:
+            return None
+        return encode_cursor(_position_of(self.object_list[0], self.ordering), PREVIOUS)
+
+
+def keyset_page(queryset, ordering, cursor=None, per_page=10, with_count=False):
+    """
+    读取一页键集分页结果
+
+    Args:
+        queryset: 查询集
+        ordering: 排序字段序列，如 ("-published_at", "-id")
+        cursor: 游标字符串，为空时读取第一页
+        per_page: 每页数量
+        with_count: 是否统计总数
+
+    Returns:
+        CursorPage
+
+    Raises:
+        InvalidCursor: 游标格式错误
+    """
+    ordering = list(ordering)
+    direction = NEXT
+    filtered = queryset
+    if cursor:
+        position, direction = decode_cursor(cursor)
+        values = _parse_position(queryset.model, ordering, position)
+        filtered = queryset.filter(
+            _after(ordering, values, reverse=direction == PREVIOUS)
+        )
+
+    if direction == PREVIOUS:
+        rows = list(filtered.order_by(*_reverse(ordering))[: per_page + 1])
+        has_previous = len(rows) > per_page
+        object_list = rows[:per_page][::-1]
+        has_next = True
+    else:
+        rows = list(filtered.order_by(*ordering)[: per_page + 1])
+        has_next = len(rows) > per_page
+        object_list = rows[:per_page]
+        has_previous = bool(cursor)
+
+    count = queryset.count() if with_count else None
+    return CursorPage(object_list, ordering, has_next, has_previous, count)
+
+
+def paginate(
+    request,
+    queryset,
+    ordering,
+    per_page=10,
+    with_count=False,
+    page_param="page",
+    cursor_param="cursor",
+):
+    """
+    视图使用的分页入口
+
+    请求带有 page 参数时使用原来的页码分页（返回 django Page），
+    否则使用键集分页（返回 CursorPage，并生成翻页链接的查询字符串）。
+    无效的游标按第一页处理。
+    """
+    queryset = queryset.order_by(*ordering)
+    if page_param in request.GET:
+        paginator = Paginator(queryset, per_page)
+        try:
+            return paginator.page(request.GET.get(page_param))
+        except PageNotAnInteger:
+            return paginator.page(1)
+        except EmptyPage:
+            return paginator.page(paginator.num_pages)
+
+    try:
+        page = keyset_page(
+            queryset, ordering, request.GET.get(cursor_param), per_page, with_count
+        )
+    except InvalidCursor:
+        page = keyset_page(queryset, ordering, None, per_page, with_count)
+
+    for attr, cursor in (
+        ("next_query", page.next_cursor),
+        ("previous_query", page.previous_cursor),
+    ):
+        if cursor:
+            params = request.GET.copy()
+            params[cursor_param] = cursor
+            setattr(page, attr, params.urlencode())
+    return page
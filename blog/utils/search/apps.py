@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+from django.utils.translation import gettext_lazy as _
+
+
+class SearchConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "utils.search"
+    verbose_name = _("全文搜索")
+
+    def ready(self):
+        # 注册信号处理器
+        from . import signals  # noqa: F401
@@ -0,0 +1,161 @@
+"""
+搜索索引维护模块
+
+文章按标题、标签、正文建立索引，用户按用户名、姓名、个人简介建立索引。
+词项权重 = 1 + ln(各字段出现次数 × 字段权重之和)，标题和用户名权重最高。
+"""
+
+import math
+from collections import Counter
+
+from django.db import transaction
+
+from .models import SearchDocument, SearchPosting
+from .tokenizer import index_terms
+
+# 文章各字段的权重
+ARTICLE_FIELD_WEIGHTS = {"title": 3, "tags": 2, "content": 1}
+# 用户各字段的权重
+USER_FIELD_WEIGHTS = {"username": 3, "name": 2, "bio": 1}
+# 批量写入索引项的数量
+BULK_SIZE = 1000
+
+
+def build_weights(fields, field_weights):
+    """
+    计算词项权重
+
+    Args:
+        fields: {字段名: 文本}
+        field_weights: {字段名: 字段权重}
+
+    Returns:
+        {词项: 权重}
+    """
+    weighted = Counter()
+    for name, text in fields.items():
+        factor = field_weights[name]
+        for term, count in index_terms(text).items():
+            weighted[term] += count * factor
+    return {term: 1 + math.log(total) for term, total in weighted.items()}
+
+
+def article_fields(article):
+    """提取文章的索引字段"""
+    return {
+        "title": article.title,
+        "tags": " ".join(tag.name for tag in article.tags.all()),
+        "content": article.content,
+    }
+
+
+def user_fields(user):
+    """提取用户的索引字段"""
+    return {
+        "username": user.username,
+        "name": f"{user.first_name} {user.last_name}",
+        "bio": user.bio or "",
+    }
+
+
+def article_document(article):
+    """文章对应的搜索文档属性"""
+    return {
+        "owner_id": article.author_id,
+        "is_public": article.status == "published" and article.visibility == "public",
+        "is_published": article.status == "published",
+    }
+
+
+def _write(kind, object_id, attrs, weights):
+    """替换单个对象的文档和索引项"""
+    with transaction.atomic():
+        document, _created = SearchDocument.objects.update_or_create(  # type: ignore
+            kind=kind, object_id=object_id, defaults=attrs
+        )
+        document.postings.all().delete()
+        SearchPosting.objects.bulk_create(  # type: ignore
+            [
+                SearchPosting(document=document, term=term, weight=weight)
+                for term, weight in weights.items()
+            ],
+            batch_size=BULK_SIZE,
+        )
+    return document
+
+
+def index_article(article):
+    """建立或更新文章索引"""
+    weights = build_weights(article_fields(article), ARTICLE_FIELD_WEIGHTS)
+    return _write("article", article.pk, article_document(article), weights)
+
+
+def index_user(user):
+    """建立或更新用户索引"""
+    weights = build_weights(user_fields(user), USER_FIELD_WEIGHTS)
+    return _write("user", user.pk, {}, weights)
+
+
+def remove_document(kind, object_id):
+    """删除对象的索引"""
+    SearchDocument.objects.filter(kind=kind, object_id=object_id).delete()  # type: ignore
+
+
+def rebuild_index(kind, objects, batch_size=200):
+    """
+    重建某一类对象的全部索引
+
+    Args:
+        kind: "article" 或 "user"
+        objects: 待索引对象的可迭代集合，文章应预加载 tags
+        batch_size: 每批写入的对象数量
+
+    Returns:
+        索引的对象数量
+    """
+    if kind == "article":
+        fields, field_weights, attrs = (
+            article_fields,
+            ARTICLE_FIELD_WEIGHTS,
+            article_document,
+        )
+    else:
+        fields, field_weights, attrs = user_fields, USER_FIELD_WEIGHTS, lambda obj: {}
+
+    SearchDocument.objects.filter(kind=kind).delete()  # type: ignore
+    total = 0
+    batch = []
+    for obj in objects:
+        batch.append(obj)
+        if len(batch) >= batch_size:
+            total += _bulk_write(kind, batch, fields, field_weights, attrs)
+            batch = []
+    if batch:
+        total += _bulk_write(kind, batch, fields, field_weights, attrs)
+    return total
+
+
+def _bulk_write(kind, objects, fields, field_weights, attrs):
+    """批量写入一批对象的文档和索引项"""
+    with transaction.atomic():
+        documents = SearchDocument.objects.bulk_create(  # type: ignore
+            [
+                SearchDocument(kind=kind, object_id=obj.pk, **attrs(obj))
+                for obj in objects
+            ]
+        )
+        # 部分数据库的 bulk_create 不返回主键，重新查询
+        ids = dict(
+            SearchDocument.objects.filter(  # type: ignore
+                kind=kind, object_id__in=[obj.pk for obj in objects]
+            ).values_list("object_id", "id")
+        )
+        postings = []
+        for obj in objects:
+            weights = build_weights(fields(obj), field_weights)
+            postings.extend(
+                SearchPosting(document_id=ids[obj.pk], term=term, weight=weight)
+                for term, weight in weights.items()
+            )
+        SearchPosting.objects.bulk_create(postings, batch_size=BULK_SIZE)  # type: ignore
+    return len(documents)
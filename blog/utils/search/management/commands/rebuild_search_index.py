@@ -0,0 +1,49 @@
+"""
+重建全文搜索索引
+
+用法：
+    python manage.py rebuild_search_index
+    python manage.py rebuild_search_index --kind article
+"""
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from apps.articles.models import Article
+from utils.search.indexer import rebuild_index
+
+KIND_LABELS = {"article": "篇文章", "user": "个用户"}
+
+
+class Command(BaseCommand):
+    help = "为已有的文章和用户重建全文搜索索引"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--kind",
+            choices=["article", "user"],
+            action="append",
+            help="只重建指定类型的索引，可重复指定，默认全部重建",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=200,
+            help="每批写入的对象数量",
+        )
+
+    def handle(self, *args, **options):
+        kinds = options["kind"] or ["article", "user"]
+        batch_size = max(1, options["batch_size"])
+
+        for kind in kinds:
+            if kind == "article":
+                objects = Article.objects.prefetch_related("tags").order_by("pk")  # type: ignore
+            else:
+                objects = get_user_model().objects.order_by("pk")
+            total = rebuild_index(
+                kind, objects.iterator(chunk_size=batch_size), batch_size=batch_size
+            )
+            self.stdout.write(f"已索引 {total} {KIND_LABELS[kind]}")
+
+        self.stdout.write(self.style.SUCCESS("搜索索引重建完成"))
@@ -0,0 +1,108 @@
+# Generated by Django 4.2.20 on 2026-10-18 19:32
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchDocument",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[("article", "文章"), ("user", "用户")],
+                        max_length=20,
+                        verbose_name="类型",
+                    ),
+                ),
+                ("object_id", models.PositiveIntegerField(verbose_name="对象ID")),
+                (
+                    "owner_id",
+                    models.PositiveIntegerField(
+                        blank=True, null=True, verbose_name="所有者ID"
+                    ),
+                ),
+                (
+                    "is_public",
+                    models.BooleanField(default=True, verbose_name="是否公开"),
+                ),
+                (
+                    "is_published",
+                    models.BooleanField(default=True, verbose_name="是否已发布"),
+                ),
+                (
+                    "indexed_at",
+                    models.DateTimeField(auto_now=True, verbose_name="索引时间"),
+                ),
+            ],
+            options={
+                "verbose_name": "搜索文档",
+                "verbose_name_plural": "搜索文档",
+            },
+        ),
+        migrations.CreateModel(
+            name="SearchPosting",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("term", models.CharField(max_length=64, verbose_name="词项")),
+                ("weight", models.FloatField(verbose_name="权重")),
+                (
+                    "document",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="postings",
+                        to="search.searchdocument",
+                        verbose_name="文档",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "索引项",
+                "verbose_name_plural": "索引项",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="searchdocument",
+            index=models.Index(
+                fields=["kind", "is_public"], name="search_kind_public_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="searchdocument",
+            index=models.Index(
+                fields=["kind", "owner_id"], name="search_kind_owner_idx"
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name="searchdocument",
+            unique_together={("kind", "object_id")},
+        ),
+        migrations.AlterUniqueTogether(
+            name="searchposting",
+            unique_together={("term", "document")},
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.20 on 2026-10-18 21:36
+
+from django.db import migrations
+
+import utils.search.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("search", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="searchposting",
+            name="term",
+            field=utils.search.models.TermField(max_length=64, verbose_name="词项"),
+        ),
+    ]
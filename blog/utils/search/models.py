@@ -0,0 +1,67 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class SearchDocument(models.Model):
+    """搜索文档模型，每篇文章或每个用户对应一条记录"""
+
+    KIND_CHOICES = (
+        ("article", _("文章")),
+        ("user", _("用户")),
+    )
+
+    kind = models.CharField(_("类型"), max_length=20, choices=KIND_CHOICES)
+    object_id = models.PositiveIntegerField(_("对象ID"))
+    # 冗余保存可见性相关字段，搜索时无需关联原表过滤
+    owner_id = models.PositiveIntegerField(_("所有者ID"), null=True, blank=True)
+    is_public = models.BooleanField(_("是否公开"), default=True)
+    is_published = models.BooleanField(_("是否已发布"), default=True)
+    indexed_at = models.DateTimeField(_("索引时间"), auto_now=True)
+
+    class Meta:
+        verbose_name = _("搜索文档")
+        verbose_name_plural = _("搜索文档")
+        unique_together = ("kind", "object_id")
+        indexes = [
+            models.Index(fields=["kind", "is_public"], name="search_kind_public_idx"),
+            models.Index(fields=["kind", "owner_id"], name="search_kind_owner_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}:{self.object_id}"
+
+
+class TermField(models.CharField):
+    """
+    词项字段
+
+    MySQL 默认排序规则忽略重音（"cafe" 与 "café" 相等），与分词器区分的词项不一致，
+    会使 (term, document) 唯一约束冲突，因此在 MySQL 上使用二进制排序规则。
+    """
+
+    def db_parameters(self, connection):
+        params = super().db_parameters(connection)
+        if connection.vendor == "mysql" and not self.db_collation:
+            params["collation"] = "utf8mb4_bin"
+        return params
+
+
+class SearchPosting(models.Model):
+    """倒排索引项，记录词项在文档中的权重"""
+
+    document = models.ForeignKey(
+        SearchDocument,
+        on_delete=models.CASCADE,
+        related_name="postings",
+        verbose_name=_("文档"),
+    )
+    term = TermField(_("词项"), max_length=64)
+    weight = models.FloatField(_("权重"))
+
+    class Meta:
+        verbose_name = _("索引项")
+        verbose_name_plural = _("索引项")
+        unique_together = ("term", "document")
+
+    def __str__(self):
+        return f"{self.term} -> {self.document}"
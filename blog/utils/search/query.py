@@ -0,0 +1,221 @@
+"""
+搜索查询模块
+
+查询词项全部命中的文档才会返回，按 BM25 形式的逆文档频率加权的词项权重之和排序，
+排序和分页都在数据库中完成。
+"""
+
+import math
+import re
+
+from django.contrib.auth import get_user_model
+from django.db.models import Case, Count, F, FloatField, Q, Sum, Value, When
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import SearchDocument, SearchPosting
+from .tokenizer import normalize, query_terms
+
+# 高亮摘要的默认长度（字符）
+EXCERPT_LENGTH = 120
+
+
+def ranked_documents(kind, query, documents=None):
+    """
+    按相关度排序的命中文档
+
+    Args:
+        kind: "article" 或 "user"
+        query: 查询文本
+        documents: 可选的 SearchDocument 查询集，用于按可见性过滤
+
+    Returns:
+        values 查询集，每行包含 object_id 和 score，按相关度降序
+    """
+    terms = query_terms(query)
+    postings = SearchPosting.objects.filter(  # type: ignore
+        document__kind=kind, term__in=terms
+    )
+    if not terms:
+        return postings.none().values(object_id=F("document__object_id"))
+
+    # 任一词项没有出现在任何文档中时，直接返回空结果
+    frequencies = dict(
+        postings.order_by()
+        .values("term")
+        .annotate(n=Count("id"))
+        .values_list("term", "n")
+    )
+    if len(frequencies) < len(terms):
+        return postings.none().values(object_id=F("document__object_id"))
+
+    total = SearchDocument.objects.filter(kind=kind).count()  # type: ignore
+    idf = {
+        term: math.log(1 + (total - n + 0.5) / (n + 0.5))
+        for term, n in frequencies.items()
+    }
+
+    if documents is not None:
+        postings = postings.filter(document__in=documents)
+    return (
+        postings.values(object_id=F("document__object_id"))
+        .annotate(
+            matched=Count("term"),
+            score=Sum(
+                Case(
+                    *[
+                        When(term=term, then=F("weight") * Value(w))
+                        for term, w in idf.items()
+                    ],
+                    default=Value(0.0),
+                    output_field=FloatField(),
+                )
+            ),
+        )
+        .filter(matched=len(terms))
+        .order_by("-score", "object_id")
+    )
+
+
+def ranked_ids(kind, query, documents=None, limit=None):
+    """返回按相关度排序的对象ID列表"""
+    ranked = ranked_documents(kind, query, documents).values_list(
+        "object_id", flat=True
+    )
+    if limit is not None:
+        ranked = ranked[:limit]
+    return list(ranked)
+
+
+class SearchResults:
+    """
+    搜索结果序列，可直接交给 Paginator 分页
+
+    切片时只查询当前页的对象，并按相关度顺序返回。
+    """
+
+    def __init__(self, ranked, queryset, decorate=None):
+        self.ranked = ranked
+        self.queryset = queryset
+        self.decorate = decorate
+        self._count = None
+
+    def count(self):
+        if self._count is None:
+            self._count = self.ranked.count()
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            return self[key : key + 1][0]
+        ids = [row["object_id"] for row in self.ranked[key]]
+        objects = self.queryset.in_bulk(ids)
+        results = [objects[pk] for pk in ids if pk in objects]
+        if self.decorate is not None:
+            for obj in results:
+                self.decorate(obj)
+        return results
+
+
+def _plain_text(text):
+    """去掉HTML标签和常见的Markdown符号"""
+    text = re.sub(r"<[^>]+>", " ", text or "")
+    text = re.sub(r"!?\[([^\]]*)\]\([^)]*\)", r"\1", text)
+    text = re.sub(r"[#*_`>~|]+", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _highlight_pattern(query):
+    """查询中的关键词（原始片段优先，其次为切分后的词项），长的优先匹配"""
+    words = set(normalize(query).split()) | set(query_terms(query))
+    words = sorted((w for w in words if w), key=len, reverse=True)
+    if not words:
+        return None
+    return re.compile("|".join(re.escape(w) for w in words), re.IGNORECASE)
+
+
+def highlight(text, query, length=EXCERPT_LENGTH):
+    """
+    截取包含关键词的摘要并用 <mark> 标记关键词
+
+    Args:
+        text: 原文（可以是Markdown）
+        query: 查询文本
+        length: 摘要长度，为None时不截取
+
+    Returns:
+        转义后的安全HTML
+    """
+    text = _plain_text(text)
+    pattern = _highlight_pattern(query)
+    # 全角半角统一后长度可能变化，只在长度不变时按统一后的文本定位
+    folded = normalize(text)
+    searchable = folded if len(folded) == len(text) else text
+
+    start = 0
+    match = pattern.search(searchable) if pattern else None
+    if length is not None:
+        if match and match.start() > length // 3:
+            start = match.start() - length // 3
+        end = start + length
+        prefix = "..." if start > 0 else ""
+        suffix = "..." if end < len(text) else ""
+        text, searchable = text[start:end], searchable[start:end]
+    else:
+        prefix = suffix = ""
+
+    parts = []
+    position = 0
+    if pattern:
+        for m in pattern.finditer(searchable):
+            parts.append(escape(text[position : m.start()]))
+            parts.append(f"<mark>{escape(text[m.start() : m.end()])}</mark>")
+            position = m.end()
+    parts.append(escape(text[position:]))
+    return mark_safe(prefix + "".join(parts) + suffix)
+
+
+def search_articles(query, user=None):
+    """
+    搜索已发布且公开的文章，登录用户还能搜到自己已发布的私密文章
+
+    Returns:
+        SearchResults，文章带有 title_highlight 和 content_highlight 属性
+    """
+    from apps.articles.models import Article
+
+    visible = Q(is_public=True)
+    if user is not None and user.is_authenticated:
+        visible |= Q(owner_id=user.pk, is_published=True)
+    documents = SearchDocument.objects.filter(visible, kind="article")  # type: ignore
+
+    def decorate(article):
+        article.title_highlight = highlight(article.title, query, length=None)
+        article.content_highlight = highlight(article.content, query)
+
+    return SearchResults(
+        ranked_documents("article", query, documents),
+        Article.objects.select_related("author", "category").prefetch_related(  # type: ignore
+            "tags"
+        ),
+        decorate,
+    )
+
+
+def search_users(query):
+    """
+    搜索用户
+
+    Returns:
+        SearchResults，用户带有 bio_highlight 属性
+    """
+
+    def decorate(user):
+        user.bio_highlight = highlight(user.bio, query, length=100)
+
+    return SearchResults(
+        ranked_documents("user", query), get_user_model().objects.all(), decorate
+    )
@@ -0,0 +1,88 @@
+"""
+搜索应用信号处理
+
+文章、标签和用户变化时增量更新搜索索引。
+"""
+
+from django.contrib.auth import get_user_model
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from apps.articles.models import Article, Tag
+
+from .indexer import index_article, index_user, remove_document
+
+User = get_user_model()
+
+# 影响索引内容或可见性的字段
+ARTICLE_INDEX_FIELDS = {"title", "content", "status", "visibility", "author"}
+USER_INDEX_FIELDS = {"username", "first_name", "last_name", "bio"}
+
+
+def _reindex_articles(article_ids):
+    for article in Article.objects.filter(pk__in=article_ids).prefetch_related(  # type: ignore
+        "tags"
+    ):
+        index_article(article)
+
+
+@receiver(post_save, sender=Article)
+def article_saved(sender, instance, update_fields=None, **kwargs):
+    # 只更新了浏览量、slug等无关字段时无需重建索引
+    if update_fields is not None and not ARTICLE_INDEX_FIELDS & set(update_fields):
+        return
+    index_article(instance)
+
+
+@receiver(post_delete, sender=Article)
+def article_deleted(sender, instance, **kwargs):
+    remove_document("article", instance.pk)
+
+
+@receiver(m2m_changed, sender=Article.tags.through)
+def article_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == "pre_clear":
+        # 从标签一侧清空时 post_clear 不提供文章ID，先记录关联的文章
+        instance._search_article_ids = list(
+            instance.articles.values_list("pk", flat=True)
+        )
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        index_article(instance)
+    elif action == "post_clear":
+        _reindex_articles(getattr(instance, "_search_article_ids", []))
+    else:
+        _reindex_articles(pk_set)
+
+
+@receiver(post_save, sender=Tag)
+def tag_saved(sender, instance, created, update_fields=None, **kwargs):
+    # 标签改名后重建关联文章的索引
+    if update_fields is not None and "name" not in update_fields:
+        return
+    if not created:
+        _reindex_articles(instance.articles.values_list("pk", flat=True))
+
+
+@receiver(pre_delete, sender=Tag)
+def tag_deleting(sender, instance, **kwargs):
+    instance._search_article_ids = list(instance.articles.values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=Tag)
+def tag_deleted(sender, instance, **kwargs):
+    _reindex_articles(getattr(instance, "_search_article_ids", []))
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, update_fields=None, **kwargs):
+    # 登录时只更新 last_login，无需重建索引
+    if update_fields is not None and not USER_INDEX_FIELDS & set(update_fields):
+        return
+    index_user(instance)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    remove_document("user", instance.pk)
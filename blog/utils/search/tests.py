@@ -0,0 +1,192 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from apps.articles.models import Article, Tag
+from utils.api.filters import IndexedSearchFilter
+
+from .models import SearchDocument, SearchPosting
+from .query import highlight, ranked_ids, search_articles
+from .tokenizer import index_terms, query_terms
+
+User = get_user_model()
+
+
+class TokenizerTest(TestCase):
+    """分词测试"""
+
+    def test_chinese_bigrams(self):
+        """汉字切分为单字和二元词项，查询只使用二元词项"""
+        terms = index_terms("博客系统")
+        self.assertIn("博客", terms)
+        self.assertIn("系统", terms)
+        self.assertIn("博", terms)
+        self.assertEqual(query_terms("博客系统"), ["博客", "客系", "系统"])
+        self.assertEqual(query_terms("博"), ["博"])
+
+    def test_mixed_text(self):
+        """中英文混排，统一大小写和全角"""
+        self.assertEqual(query_terms("Django博客 ＡＰＩ"), ["django", "博客", "api"])
+
+    def test_accented_terms_distinct(self):
+        """重音不同的词项是不同的词项，MySQL 上词项列使用二进制排序规则"""
+        self.assertIn("cafe", index_terms("cafe café"))
+        self.assertIn("café", index_terms("cafe café"))
+        field = SearchPosting._meta.get_field("term")
+        self.assertIsNone(field.db_parameters(connection)["collation"])
+        with mock.patch.object(connection, "vendor", "mysql"):
+            self.assertEqual(
+                field.db_parameters(connection)["collation"], "utf8mb4_bin"
+            )
+
+
+class SearchIndexTest(TestCase):
+    """全文搜索索引测试"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="searcher", email="search@example.com", password="testpassword"
+        )
+        self.other = User.objects.create_user(
+            username="writer",
+            email="writer@example.com",
+            password="testpassword",
+            bio="喜欢写Python教程",
+        )
+        self.article = Article.objects.create(
+            title="Django入门",
+            content="介绍如何使用Python搭建博客系统",
+            author=self.other,
+            status="published",
+            visibility="public",
+        )
+
+    def create_article(self, **kwargs):
+        data = {
+            "content": "正文",
+            "author": self.other,
+            "status": "published",
+            "visibility": "public",
+        }
+        data.update(kwargs)
+        return Article.objects.create(**data)
+
+    def test_indexed_on_save(self):
+        """保存文章时建立索引，内容修改后更新"""
+        self.assertEqual(ranked_ids("article", "博客系统"), [self.article.pk])
+        self.article.content = "全新的内容"
+        self.article.save()
+        self.assertEqual(ranked_ids("article", "博客系统"), [])
+        self.assertEqual(ranked_ids("article", "全新"), [self.article.pk])
+
+    def test_views_update_does_not_reindex(self):
+        """只更新浏览量时不重建索引"""
+        document = SearchDocument.objects.get(kind="article", object_id=self.article.pk)
+        self.article.views_count = 5
+        self.article.save(update_fields=["views_count"])
+        self.assertEqual(
+            SearchDocument.objects.get(pk=document.pk).indexed_at, document.indexed_at
+        )
+
+    def test_tags_indexed(self):
+        """文章标签变化和标签改名时更新索引"""
+        tag = Tag.objects.create(name="后端开发", slug="backend")
+        self.article.tags.add(tag)
+        self.assertEqual(ranked_ids("article", "后端"), [self.article.pk])
+
+        tag.name = "运维"
+        tag.save()
+        self.assertEqual(ranked_ids("article", "后端"), [])
+        self.assertEqual(ranked_ids("article", "运维"), [self.article.pk])
+
+        tag.delete()
+        self.assertEqual(ranked_ids("article", "运维"), [])
+
+    def test_delete_removes_document(self):
+        """删除文章时删除索引"""
+        self.article.delete()
+        self.assertFalse(SearchDocument.objects.filter(kind="article").exists())
+        self.assertFalse(SearchPosting.objects.filter(term="博客").exists())
+
+    def test_title_match_ranks_first(self):
+        """标题命中的文章排在正文命中之前"""
+        body = self.create_article(title="其他", content="顺便提到了缓存")
+        title = self.create_article(title="缓存设计", content="正文")
+        self.assertEqual(ranked_ids("article", "缓存"), [title.pk, body.pk])
+
+    def test_all_terms_required(self):
+        """所有词项都命中才返回"""
+        self.assertEqual(ranked_ids("article", "django 缓存"), [])
+        self.assertEqual(ranked_ids("article", "django 博客"), [self.article.pk])
+
+    def test_visibility(self):
+        """私密文章只对作者可见，草稿不可见"""
+        private = self.create_article(
+            title="私密博客", visibility="private", author=self.user
+        )
+        self.create_article(title="草稿博客", status="draft", author=self.user)
+
+        anonymous = list(search_articles("博客")[0:10])
+        self.assertEqual([a.pk for a in anonymous], [self.article.pk])
+
+        own = {a.pk for a in search_articles("博客", self.user)[0:10]}
+        self.assertEqual(own, {self.article.pk, private.pk})
+
+    def test_highlight(self):
+        """高亮关键词并转义HTML"""
+        html = highlight("<b>Django</b> 入门 & 博客系统", "博客 django")
+        self.assertIn("<mark>Django</mark>", html)
+        self.assertIn("<mark>博客</mark>", html)
+        self.assertIn("&amp;", html)
+        self.assertNotIn("<b>", html)
+
+    def test_search_page(self):
+        """搜索页面返回高亮的文章和用户"""
+        response = self.client.get(reverse("users:search"), {"q": "Python"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["articles"].paginator.count, 1)
+        self.assertEqual(response.context["authors"].paginator.count, 1)
+        self.assertContains(response, "<mark>Python</mark>")
+
+    def test_api_search(self):
+        """文章API的search参数使用全文索引并按相关度排序"""
+        other = self.create_article(title="Python技巧", content="正文")
+        response = self.client.get(reverse("article-list"), {"search": "python"})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        results = data["results"] if isinstance(data, dict) else data
+        self.assertEqual([a["id"] for a in results], [other.pk, self.article.pk])
+
+    def test_api_search_limit_counts_visible_only(self):
+        """不可见的命中不占用API搜索的结果数量上限"""
+        self.create_article(title="Python草稿", status="draft")
+        self.create_article(title="Python私密", visibility="private")
+        visible = self.create_article(title="Python公开")
+        with mock.patch.object(IndexedSearchFilter, "max_results", 2):
+            response = self.client.get(reverse("article-list"), {"search": "python"})
+        data = response.json()
+        results = data["results"] if isinstance(data, dict) else data
+        self.assertEqual(
+            sorted(a["id"] for a in results), sorted([visible.pk, self.article.pk])
+        )
+
+    def test_api_search_ranks_once(self):
+        """API搜索每个请求只执行一次排序查询"""
+        with mock.patch("utils.api.filters.ranked_ids", wraps=ranked_ids) as ranked:
+            response = self.client.get(reverse("article-list"), {"search": "python"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(ranked.call_count, 1)
+
+    def test_rebuild_command(self):
+        """重建命令为已有数据建立索引"""
+        SearchDocument.objects.all().delete()
+        out = StringIO()
+        call_command("rebuild_search_index", stdout=out)
+        self.assertIn("已索引 1 篇文章", out.getvalue())
+        self.assertEqual(ranked_ids("article", "博客"), [self.article.pk])
+        self.assertEqual(ranked_ids("user", "python"), [self.other.pk])
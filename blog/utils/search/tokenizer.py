@@ -0,0 +1,67 @@
+"""
+搜索分词模块
+
+中文没有空格分隔，这里对连续的汉字使用二元切分（bigram），
+同时保留单字，保证单字查询也能命中；其他语言按字母数字连续串切分。
+查询时汉字只使用二元词项（单字查询除外），要求所有词项都命中，
+效果接近子串匹配。
+"""
+
+import re
+import unicodedata
+from collections import Counter
+
+# 词项最大长度，与 SearchPosting.term 字段长度一致
+MAX_TERM_LENGTH = 64
+
+# CJK统一表意文字、扩展A区和兼容表意文字
+_CJK = "\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff"
+_TOKEN_RE = re.compile(rf"[{_CJK}]+|[^\W_{_CJK}]+")
+_CJK_RE = re.compile(rf"[{_CJK}]")
+
+
+def normalize(text):
+    """统一全角半角和大小写"""
+    return unicodedata.normalize("NFKC", text or "").casefold()
+
+
+def _split(text):
+    """切分出连续的汉字串和字母数字串"""
+    return _TOKEN_RE.findall(normalize(text))
+
+
+def _bigrams(run):
+    return [run[i : i + 2] for i in range(len(run) - 1)]
+
+
+def index_terms(text):
+    """
+    切分待索引的文本
+
+    Returns:
+        Counter，词项到出现次数的映射
+    """
+    terms = Counter()
+    for token in _split(text):
+        if _CJK_RE.match(token):
+            terms.update(token)
+            terms.update(_bigrams(token))
+        else:
+            terms[token[:MAX_TERM_LENGTH]] += 1
+    return terms
+
+
+def query_terms(text):
+    """
+    切分查询文本
+
+    Returns:
+        去重后的词项列表，保持出现顺序
+    """
+    terms = []
+    for token in _split(text):
+        if _CJK_RE.match(token):
+            terms.extend(_bigrams(token) if len(token) > 1 else [token])
+        else:
+            terms.append(token[:MAX_TERM_LENGTH])
+    return list(dict.fromkeys(terms))
@@ -0,0 +1,128 @@
+"""
+敏感词匹配模块
+
+使用 Aho–Corasick 自动机一次扫描文本找出所有敏感词及其位置，耗时只与文本长度和
+命中数量有关，与敏感词数量无关。
+
+自动机由 SensitiveWord 表构建并缓存在进程内。敏感词变化时（见 signals.py）
+递增共享缓存中的命名空间版本号，各进程在下次匹配时发现版本变化后重新构建。
+"""
+
+import threading
+from collections import deque
+from typing import NamedTuple
+
+from utils.cache import namespace_version
+
+# 敏感词版本号使用的缓存命名空间
+CACHE_NAMESPACE = "sensitive_words"
+
+
+class Match(NamedTuple):
+    """一次命中：敏感词及其在文本中的位置 text[start:end]"""
+
+    word: str
+    start: int
+    end: int
+
+
+class AhoCorasick:
+    """
+    Aho–Corasick 多模式匹配自动机
+
+    节点用整数编号，goto[node] 为 {字符: 子节点}，fail[node] 为失败指针，
+    outputs[node] 为在该节点结束的所有敏感词（包括沿失败指针可达的后缀词）。
+    """
+
+    def __init__(self, words):
+        self.goto = [{}]
+        self.fail = [0]
+        self.outputs = [()]
+        for word in sorted(set(filter(None, words))):
+            self._add(word)
+        self._link()
+
+    def _add(self, word):
+        node = 0
+        for char in word:
+            child = self.goto[node].get(char)
+            if child is None:
+                child = len(self.goto)
+                self.goto[node][char] = child
+                self.goto.append({})
+                self.fail.append(0)
+                self.outputs.append(())
+            node = child
+        self.outputs[node] = (word,)
+
+    def _link(self):
+        """按广度优先顺序计算失败指针，并合并后缀词的输出"""
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                state = self.fail[node]
+                while state and char not in self.goto[state]:
+                    state = self.fail[state]
+                self.fail[child] = self.goto[state].get(char, 0)
+                self.outputs[child] += self.outputs[self.fail[child]]
+                queue.append(child)
+
+    def finditer(self, text):
+        """按结束位置顺序返回所有命中（包括互相重叠的命中）"""
+        goto, fail, outputs = self.goto, self.fail, self.outputs
+        node = 0
+        for index, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for word in outputs[node]:
+                yield Match(word, index + 1 - len(word), index + 1)
+
+    def search(self, text):
+        """返回所有命中的列表"""
+        return list(self.finditer(text or ""))
+
+    def contains(self, text):
+        """文本是否包含任一敏感词，找到第一个即返回"""
+        return next(self.finditer(text or ""), None) is not None
+
+
+_matcher = None
+_matcher_version = None
+_lock = threading.Lock()
+
+
+def get_matcher():
+    """
+    获取当前敏感词的自动机
+
+    每次调用读取一次缓存中的版本号，版本未变化时直接使用进程内已构建的自动机。
+    """
+    global _matcher, _matcher_version
+    version = namespace_version(CACHE_NAMESPACE)
+    if _matcher is not None and _matcher_version == version:
+        return _matcher
+    with _lock:
+        if _matcher is None or _matcher_version != version:
+            from .models import SensitiveWord
+
+            words = SensitiveWord.objects.values_list("word", flat=True)  # type: ignore
+            _matcher = AhoCorasick(words)
+            _matcher_version = version
+    return _matcher
+
+
+def find_sensitive_words(text):
+    """
+    查找文本中的敏感词
+
+    Returns:
+        Match 列表，按结束位置排序
+    """
+    return get_matcher().search(text)
+
+
+def contains_sensitive_words(text):
+    """文本是否包含敏感词"""
+    return get_matcher().contains(text)
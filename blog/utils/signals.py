@@ -0,0 +1,21 @@
+"""
+工具应用信号处理
+
+敏感词变化时递增版本号，使各进程重新构建敏感词自动机。
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import invalidate_namespace
+from .models import SensitiveWord
+from .sensitive import CACHE_NAMESPACE
+
+
+@receiver(post_save, sender=SensitiveWord)
+@receiver(post_delete, sender=SensitiveWord)
+def sensitive_words_changed(sender, **kwargs):
+    invalidate_namespace(CACHE_NAMESPACE)
+    # 事务提交前其他进程可能已按旧数据重建，提交后再递增一次
+    transaction.on_commit(lambda: invalidate_namespace(CACHE_NAMESPACE))
@@ -0,0 +1,98 @@
+"""
+slug分配模块
+
+在第一次 INSERT 之前生成不会冲突的slug，创建文章或标签只需一次写入，
+不再先插入再用主键 UPDATE slug，也不需要 exists() 探测和重试。
+
+slug 由两部分组成：标题 slugify 后的前缀（中文等 slugify 后为空的标题没有前缀）
+和一个唯一后缀。后缀是 base36 编码的整数：
+
+    毫秒时间戳（41位） | 进程节点号（16位） | 进程内序号（10位）
+
+同一进程内由时间戳和序号保证不重复（每毫秒最多1024个），不同进程的节点号
+在进程启动（或 fork）时随机生成，同一毫秒内两个进程节点号相同的概率为 1/65536，
+此时序号也必须相同才会冲突。数据库中 slug 的唯一约束作为最后的保护。
+"""
+
+import os
+import secrets
+import threading
+import time
+
+from django.utils.text import slugify
+
+# 时间戳的起点（2024-01-01 UTC，毫秒）
+EPOCH_MS = 1704067200000
+NODE_BITS = 16
+SEQUENCE_BITS = 10
+# 后缀最长13个字符，前缀与后缀之间用 - 连接
+SUFFIX_LENGTH = 13
+
+_ALPHABET = "0123456789abcdefghijklmnopqrstuvwxyz"
+_SEQUENCE_MASK = (1 << SEQUENCE_BITS) - 1
+
+_lock = threading.Lock()
+_node = 0
+# 上次分配使用的时间戳和序号
+_last_ms = 0
+_sequence = 0
+
+
+def _reseed():
+    """重新生成进程节点号，fork 出的子进程不能沿用父进程的节点号"""
+    global _node, _last_ms, _sequence
+    _node = secrets.randbits(NODE_BITS)
+    _last_ms = _sequence = 0
+
+
+_reseed()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reseed)
+
+
+def _base36(number):
+    digits = []
+    while number:
+        number, remainder = divmod(number, 36)
+        digits.append(_ALPHABET[remainder])
+    return "".join(reversed(digits)) or "0"
+
+
+def _next_id():
+    """生成进程内递增、进程间不重复的整数"""
+    global _last_ms, _sequence
+    with _lock:
+        now = int(time.time() * 1000) - EPOCH_MS
+        if now > _last_ms:
+            _last_ms, _sequence = now, 0
+        else:
+            # 同一毫秒或时钟回拨：沿用上次的时间戳，序号用尽时借用下一毫秒
+            _sequence += 1
+            if _sequence > _SEQUENCE_MASK:
+                _last_ms, _sequence = _last_ms + 1, 0
+        return (
+            (_last_ms << (NODE_BITS + SEQUENCE_BITS))
+            | (_node << SEQUENCE_BITS)
+            | _sequence
+        )
+
+
+def unique_suffix():
+    """生成一个唯一后缀"""
+    return _base36(_next_id())
+
+
+def allocate_slug(text, max_length=50):
+    """
+    根据文本生成唯一的slug
+
+    Args:
+        text: 标题或名称
+        max_length: slug 的最大长度，与模型字段一致
+
+    Returns:
+        如 "hello-world-1a2b3c4d5e6f7"，slugify 为空时只有后缀
+    """
+    suffix = unique_suffix()
+    prefix = slugify(text or "")[: max_length - len(suffix) - 1].strip("-")
+    return f"{prefix}-{suffix}" if prefix else suffix
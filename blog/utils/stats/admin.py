@@ -0,0 +1,39 @@
+from django.contrib import admin
+
+from .models import ArticleStats, DailyStats, UserActivity
+
+
+@admin.register(ArticleStats)
+class ArticleStatsAdmin(admin.ModelAdmin):
+    list_display = (
+        "article",
+        "views_count",
+        "likes_count",
+        "favorites_count",
+        "comments_count",
+        "last_updated",
+    )
+    search_fields = ("article__title",)
+    raw_id_fields = ("article",)
+    readonly_fields = ("last_updated",)
+
+
+@admin.register(DailyStats)
+class DailyStatsAdmin(admin.ModelAdmin):
+    list_display = (
+        "date",
+        "total_views",
+        "total_likes",
+        "total_favorites",
+        "total_comments",
+        "active_users",
+        "new_articles",
+    )
+    date_hierarchy = "date"
+
+
+@admin.register(UserActivity)
+class UserActivityAdmin(admin.ModelAdmin):
+    list_display = ("user", "activity_type", "activity_date", "weight")
+    list_filter = ("activity_type", "activity_date")
+    search_fields = ("user__username",)
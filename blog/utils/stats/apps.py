@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+from django.utils.translation import gettext_lazy as _
+
+
+class StatsConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "utils.stats"
+    verbose_name = _("统计数据")
+
+    def ready(self):
+        # 注册信号处理器
+        from . import signals  # noqa: F401
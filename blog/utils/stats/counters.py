@@ -0,0 +1,171 @@
+"""
+文章统计计数维护模块
+
+点赞、收藏、评论的新增和删除通过信号调用 adjust_count，
+对 ArticleStats 中对应的计数执行 F() 原子增减，不再逐篇执行 COUNT 查询。
+统计行不存在或计数出现偏差（如批量 update/delete 绕过了信号）时，
+使用 reconcile_articles 按实际数据重新计算。
+"""
+
+import logging
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# 维护的计数字段
+COUNT_FIELDS = ("views_count", "likes_count", "favorites_count", "comments_count")
+# 重新计算时每批处理的文章数量
+RECONCILE_BATCH_SIZE = 500
+
+
+def adjust_count(article_id, field, delta):
+    """
+    原子地调整单篇文章的某项计数
+
+    Args:
+        article_id: 文章ID
+        field: 计数字段名
+        delta: 增量，可以为负数
+    """
+    from .models import ArticleStats
+
+    if not delta:
+        return
+    queryset = ArticleStats.objects.filter(article_id=article_id)  # type: ignore
+    if delta < 0:
+        # 无符号字段不能减为负数，计数不足时说明已有偏差，交给重新计算处理
+        queryset = queryset.filter(**{f"{field}__gte": -delta})
+    if queryset.update(**{field: F(field) + delta}):
+        return
+    if delta < 0 and not ArticleStats.objects.filter(article_id=article_id).exists():  # type: ignore
+        # 统计行不存在（如正随文章一起删除）时，减少计数无需处理
+        return
+    # 统计行不存在或计数已偏差，按实际数据重新计算这篇文章
+    reconcile_articles([article_id])
+
+
+def get_count(article_id, field):
+    """
+    读取单篇文章的某项计数，统计行不存在时先按实际数据创建
+
+    Args:
+        article_id: 文章ID
+        field: 计数字段名
+
+    Returns:
+        计数值
+    """
+    from .models import ArticleStats
+
+    queryset = ArticleStats.objects.filter(article_id=article_id)  # type: ignore
+    value = queryset.values_list(field, flat=True).first()
+    if value is None:
+        reconcile_articles([article_id])
+        value = queryset.values_list(field, flat=True).first()
+    return value or 0
+
+
+def compute_counts(article_ids):
+    """
+    按实际数据计算一批文章的统计计数
+
+    Args:
+        article_ids: 文章ID列表
+
+    Returns:
+        {article_id: {字段名: 计数}} 字典，不存在的文章不会出现在结果中
+    """
+    from apps.articles.models import Article, Favorite, Like
+    from apps.comments.models import Comment
+
+    counts = {
+        article_id: {
+            "views_count": views_count,
+            "likes_count": 0,
+            "favorites_count": 0,
+            "comments_count": 0,
+        }
+        for article_id, views_count in Article.objects.filter(  # type: ignore
+            pk__in=article_ids
+        ).values_list("id", "views_count")
+    }
+
+    sources = (
+        ("likes_count", Like.objects.all()),  # type: ignore
+        ("favorites_count", Favorite.objects.all()),  # type: ignore
+        ("comments_count", Comment.objects.filter(is_approved=True)),  # type: ignore
+    )
+    for field, queryset in sources:
+        rows = (
+            queryset.filter(article_id__in=list(counts))
+            .order_by()
+            .values("article_id")
+            .annotate(total=Count("id"))
+        )
+        for row in rows:
+            counts[row["article_id"]][field] = row["total"]
+    return counts
+
+
+def reconcile_articles(article_ids=None, batch_size=RECONCILE_BATCH_SIZE):
+    """
+    按实际数据重新计算文章统计，修正计数偏差并补齐缺失的统计行
+
+    Args:
+        article_ids: 文章ID列表，为None时处理所有文章
+        batch_size: 每批处理的文章数量
+
+    Returns:
+        (created, updated) 新建和修正的统计行数量
+    """
+    from apps.articles.models import Article
+
+    from .models import ArticleStats
+
+    if article_ids is None:
+        article_ids = Article.objects.order_by("pk").values_list(  # type: ignore
+            "pk", flat=True
+        )
+    article_ids = list(article_ids)
+
+    created = updated = 0
+    for start in range(0, len(article_ids), batch_size):
+        counts = compute_counts(article_ids[start : start + batch_size])
+        existing = {
+            stats.article_id: stats
+            for stats in ArticleStats.objects.filter(  # type: ignore
+                article_id__in=list(counts)
+            )
+        }
+
+        now = timezone.now()
+        changed = []
+        missing = []
+        for article_id, values in counts.items():
+            stats = existing.get(article_id)
+            if stats is None:
+                missing.append(ArticleStats(article_id=article_id, **values))
+            elif any(getattr(stats, f) != v for f, v in values.items()):
+                for field, value in values.items():
+                    setattr(stats, field, value)
+                # bulk_update 不会触发 auto_now，需要手动设置
+                stats.last_updated = now
+                changed.append(stats)
+
+        if changed:
+            ArticleStats.objects.bulk_update(  # type: ignore
+                changed, list(COUNT_FIELDS) + ["last_updated"]
+            )
+            updated += len(changed)
+        for stats in missing:
+            # 逐条创建，并发请求已创建同一统计行时忽略
+            try:
+                with transaction.atomic():
+                    stats.save()
+                created += 1
+            except IntegrityError:
+                logger.info("文章 %s 的统计行已被并发创建", stats.article_id)
+    return created, updated
@@ -0,0 +1,38 @@
+"""
+重新计算文章统计计数
+
+用法：
+    python manage.py reconcile_article_stats
+    python manage.py reconcile_article_stats --article 1 --article 2
+"""
+
+from django.core.management.base import BaseCommand
+
+from utils.stats.counters import RECONCILE_BATCH_SIZE, reconcile_articles
+
+
+class Command(BaseCommand):
+    help = "按点赞、收藏、评论和浏览数据重新计算文章统计，修正计数偏差"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--article",
+            type=int,
+            action="append",
+            dest="article_ids",
+            help="只处理指定ID的文章，可重复指定",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=RECONCILE_BATCH_SIZE,
+            help="每批处理的文章数量",
+        )
+
+    def handle(self, *args, **options):
+        created, updated = reconcile_articles(
+            options["article_ids"], batch_size=max(1, options["batch_size"])
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"统计计数已更新：新建 {created} 条，修正 {updated} 条")
+        )
@@ -0,0 +1,57 @@
+from django.db import migrations
+from django.db.models import Count
+
+
+def backfill_article_stats(apps, schema_editor):
+    """为已有文章按实际数据创建统计行"""
+    Article = apps.get_model("articles", "Article")
+    Like = apps.get_model("articles", "Like")
+    Favorite = apps.get_model("articles", "Favorite")
+    Comment = apps.get_model("comments", "Comment")
+    ArticleStats = apps.get_model("stats", "ArticleStats")
+
+    def count_by_article(queryset):
+        return dict(
+            queryset.order_by()
+            .values("article_id")
+            .annotate(total=Count("id"))
+            .values_list("article_id", "total")
+        )
+
+    likes = count_by_article(Like.objects.all())
+    favorites = count_by_article(Favorite.objects.all())
+    comments = count_by_article(Comment.objects.filter(is_approved=True))
+    existing = set(ArticleStats.objects.values_list("article_id", flat=True))
+
+    ArticleStats.objects.bulk_create(
+        [
+            ArticleStats(
+                article_id=article_id,
+                views_count=views_count,
+                likes_count=likes.get(article_id, 0),
+                favorites_count=favorites.get(article_id, 0),
+                comments_count=comments.get(article_id, 0),
+            )
+            for article_id, views_count in Article.objects.values_list(
+                "id", "views_count"
+            )
+            if article_id not in existing
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("stats", "0001_initial"),
+        ("articles", "0006_articlerender"),
+        (
+            "comments",
+            "0002_alter_comment_created_at_alter_comment_is_approved_and_more",
+        ),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_article_stats, migrations.RunPython.noop),
+    ]
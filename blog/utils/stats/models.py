@@ -0,0 +1,99 @@
+from django.db import models
+from django.conf import settings
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+
+class DailyStats(models.Model):
+    """每日站点统计模型"""
+
+    date = models.DateField(_("日期"), unique=True, db_index=True)
+    total_views = models.PositiveIntegerField(_("总浏览量"), default=0)
+    total_likes = models.PositiveIntegerField(_("总点赞数"), default=0)
+    total_favorites = models.PositiveIntegerField(_("总收藏数"), default=0)
+    total_comments = models.PositiveIntegerField(_("总评论数"), default=0)
+    active_users = models.PositiveIntegerField(_("活跃用户数"), default=0)
+    new_articles = models.PositiveIntegerField(_("新文章数"), default=0)
+
+    class Meta:
+        verbose_name = _("每日统计")
+        verbose_name_plural = _("每日统计")
+        ordering = ["-date"]
+
+    def __str__(self):
+        return str(self.date)
+
+
+class UserActivity(models.Model):
+    """用户活跃度模型"""
+
+    ACTIVITY_CHOICES = (
+        ("login", _("登录")),
+        ("like_favorite", _("点赞/收藏")),
+        ("post_comment", _("发布/评论")),
+    )
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="activities",
+        verbose_name=_("用户"),
+    )
+    activity_type = models.CharField(
+        _("活动类型"), max_length=20, choices=ACTIVITY_CHOICES, db_index=True
+    )
+    activity_date = models.DateField(_("活动日期"), default=timezone.now, db_index=True)
+    weight = models.PositiveSmallIntegerField(
+        _("权重"), default=1, help_text=_("登录权重1，点赞/收藏权重2，发文章/评论权重3")
+    )
+    created_at = models.DateTimeField(_("创建时间"), auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("用户活跃度")
+        verbose_name_plural = _("用户活跃度")
+        ordering = ["-activity_date", "-created_at"]
+        unique_together = ("user", "activity_date", "activity_type")
+        indexes = [
+            models.Index(fields=["activity_date"], name="activity_date_idx"),
+            models.Index(
+                fields=["user", "activity_date"], name="user_activity_date_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{str(self.user)} {self.activity_date} {self.activity_type}"
+
+
+class ArticleStats(models.Model):
+    """
+    文章统计模型
+
+    保存文章的点赞、收藏、评论（已审核）和浏览数量，由信号增量维护，
+    列表页和API直接读取，避免逐篇执行COUNT查询。
+    """
+
+    article = models.OneToOneField(
+        "articles.Article",
+        on_delete=models.CASCADE,
+        related_name="stats",
+        verbose_name=_("文章"),
+    )
+    views_count = models.PositiveIntegerField(_("浏览量"), default=0)
+    likes_count = models.PositiveIntegerField(_("点赞数"), default=0)
+    favorites_count = models.PositiveIntegerField(_("收藏数"), default=0)
+    comments_count = models.PositiveIntegerField(_("评论数"), default=0)
+    last_updated = models.DateTimeField(_("最后更新时间"), auto_now=True)
+
+    class Meta:
+        verbose_name = _("文章统计")
+        verbose_name_plural = _("文章统计")
+        ordering = ["-views_count"]
+        indexes = [
+            models.Index(fields=["-views_count"], name="views_count_idx"),
+            models.Index(fields=["-likes_count"], name="likes_count_idx"),
+            models.Index(fields=["-favorites_count"], name="favorites_count_idx"),
+            models.Index(fields=["-comments_count"], name="comments_count_idx"),
+        ]
+
+    def __str__(self):
+        return f"{str(self.article)} 的统计"
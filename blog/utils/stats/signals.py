@@ -0,0 +1,81 @@
+"""
+统计应用信号处理
+
+点赞、收藏和评论变化时增量维护 ArticleStats 中的计数。
+"""
+
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from apps.articles.models import Article, Favorite, Like
+from apps.comments.models import Comment
+
+from .counters import adjust_count, reconcile_articles
+from .models import ArticleStats
+
+
+def _deleted_with_article(origin):
+    """判断是否由删除文章级联触发，此时统计行会一起删除，无需维护计数"""
+    return isinstance(origin, Article) or getattr(origin, "model", None) is Article
+
+
+@receiver(post_save, sender=Article)
+def create_article_stats(sender, instance, created, **kwargs):
+    """新建文章时创建统计行"""
+    if created:
+        ArticleStats.objects.get_or_create(article=instance)  # type: ignore
+
+
+@receiver(post_save, sender=Like)
+def like_created(sender, instance, created, **kwargs):
+    if created:
+        adjust_count(instance.article_id, "likes_count", 1)
+
+
+@receiver(post_delete, sender=Like)
+def like_deleted(sender, instance, origin=None, **kwargs):
+    if not _deleted_with_article(origin):
+        adjust_count(instance.article_id, "likes_count", -1)
+
+
+@receiver(post_save, sender=Favorite)
+def favorite_created(sender, instance, created, **kwargs):
+    if created:
+        adjust_count(instance.article_id, "favorites_count", 1)
+
+
+@receiver(post_delete, sender=Favorite)
+def favorite_deleted(sender, instance, origin=None, **kwargs):
+    if not _deleted_with_article(origin):
+        adjust_count(instance.article_id, "favorites_count", -1)
+
+
+@receiver(post_init, sender=Comment)
+def remember_comment_approval(sender, instance, **kwargs):
+    """记录评论加载时的审核状态，用于判断保存时审核状态是否变化"""
+    # 审核字段被延迟加载时不读取，避免每个实例额外查询一次
+    instance._stats_approved = instance.__dict__.get("is_approved")
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    """只统计已审核通过的评论，审核状态变化时调整计数"""
+    was_approved = False if created else instance._stats_approved
+    if was_approved is None:
+        # 加载时未读取审核状态，无法判断是否变化，直接重新计算
+        reconcile_articles([instance.article_id])
+    elif instance.is_approved != was_approved:
+        adjust_count(
+            instance.article_id, "comments_count", 1 if instance.is_approved else -1
+        )
+    instance._stats_approved = instance.is_approved
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, origin=None, **kwargs):
+    if _deleted_with_article(origin):
+        return
+    if instance._stats_approved is None:
+        reconcile_articles([instance.article_id])
+    elif instance._stats_approved:
+        adjust_count(instance.article_id, "comments_count", -1)
@@ -0,0 +1,171 @@
+from io import StringIO
+
+from django.contrib.admin.sites import site
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.articles.counters import flush_views, record_view
+from apps.articles.models import Article, Favorite, Like
+from apps.comments.admin import CommentAdmin
+from apps.comments.models import Comment
+
+from .counters import reconcile_articles
+from .models import ArticleStats
+
+User = get_user_model()
+
+
+class ArticleStatsTest(TestCase):
+    """文章统计计数测试"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="statsuser", email="stats@example.com", password="testpassword"
+        )
+        self.other = User.objects.create_user(
+            username="otheruser", email="other@example.com", password="testpassword"
+        )
+        self.article = Article.objects.create(
+            title="统计测试文章",
+            content="统计测试内容",
+            author=self.user,
+            status="published",
+            visibility="public",
+        )
+
+    def stats(self):
+        return ArticleStats.objects.get(article=self.article)
+
+    def test_stats_created_with_article(self):
+        """新建文章时创建统计行"""
+        stats = self.stats()
+        self.assertEqual(stats.likes_count, 0)
+        self.assertEqual(stats.comments_count, 0)
+
+    def test_like_and_favorite_counts(self):
+        """点赞、收藏的新增和删除增量更新计数"""
+        like = Like.objects.create(user=self.user, article=self.article)
+        Like.objects.create(user=self.other, article=self.article)
+        Favorite.objects.create(user=self.user, article=self.article)
+        self.assertEqual(self.stats().likes_count, 2)
+        self.assertEqual(self.stats().favorites_count, 1)
+
+        like.delete()
+        self.assertEqual(self.stats().likes_count, 1)
+
+    def test_only_approved_comments_counted(self):
+        """只统计审核通过的评论，审核状态变化时调整计数"""
+        comment = Comment.objects.create(
+            content="待审核评论", author=self.other, article=self.article
+        )
+        self.assertEqual(self.stats().comments_count, 0)
+
+        comment = Comment.objects.get(pk=comment.pk)
+        comment.is_approved = True
+        comment.save()
+        Comment.objects.create(
+            content="已通过评论",
+            author=self.other,
+            article=self.article,
+            is_approved=True,
+        )
+        self.assertEqual(self.stats().comments_count, 2)
+
+        Comment.objects.get(pk=comment.pk).delete()
+        self.assertEqual(self.stats().comments_count, 1)
+
+    def test_admin_bulk_approve_reconciles(self):
+        """后台批量审核绕过信号，审核后重新计算评论数"""
+        Comment.objects.create(content="评论", author=self.other, article=self.article)
+        admin = CommentAdmin(Comment, site)
+        request = RequestFactory().post("/")
+        admin.approve_comments(request, Comment.objects.all())
+        self.assertEqual(self.stats().comments_count, 1)
+
+        admin.disapprove_comments(request, Comment.objects.all())
+        self.assertEqual(self.stats().comments_count, 0)
+
+    def test_missing_row_created_on_change(self):
+        """统计行缺失时按实际数据补齐"""
+        Like.objects.create(user=self.other, article=self.article)
+        ArticleStats.objects.all().delete()
+
+        Like.objects.create(user=self.user, article=self.article)
+        self.assertEqual(self.stats().likes_count, 2)
+
+    def test_reconcile_command_fixes_drift(self):
+        """重新计算命令修正计数偏差"""
+        Like.objects.create(user=self.user, article=self.article)
+        ArticleStats.objects.filter(article=self.article).update(
+            likes_count=10, comments_count=3
+        )
+        out = StringIO()
+        call_command("reconcile_article_stats", stdout=out)
+        self.assertIn("修正 1 条", out.getvalue())
+        stats = self.stats()
+        self.assertEqual(stats.likes_count, 1)
+        self.assertEqual(stats.comments_count, 0)
+        self.assertEqual(reconcile_articles(), (0, 0))
+
+    def test_delete_article_with_likes(self):
+        """删除文章时级联删除点赞不会重建统计行"""
+        Like.objects.create(user=self.user, article=self.article)
+        Comment.objects.create(
+            content="评论", author=self.other, article=self.article, is_approved=True
+        )
+        self.article.delete()
+        self.assertFalse(ArticleStats.objects.exists())
+
+    def test_flush_views_updates_stats(self):
+        """浏览量写回时同步统计中的浏览量"""
+        record_view(self.article.pk, 3)
+        flush_views()
+        self.assertEqual(self.stats().views_count, 3)
+
+    def test_toggle_like_returns_stats_count(self):
+        """点赞接口返回统计计数"""
+        Like.objects.create(user=self.other, article=self.article)
+        self.client.login(username="statsuser", password="testpassword")
+        response = self.client.post(
+            reverse("articles:toggle_like", args=[self.article.slug]),
+            HTTP_X_REQUESTED_WITH="XMLHttpRequest",
+        )
+        self.assertEqual(response.json()["likes_count"], 2)
+
+    def test_list_queries_do_not_grow_with_articles(self):
+        """文章列表页的查询数量不随文章数量增长"""
+        url = reverse("articles:article_list")
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as before:
+            self.client.get(url)
+
+        for i in range(5):
+            article = Article.objects.create(
+                title=f"文章{i}",
+                content="内容",
+                author=self.user,
+                status="published",
+                visibility="public",
+            )
+            Like.objects.create(user=self.other, article=article)
+
+        # 新建文章使侧边栏汇总失效，先重新生成缓存
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as after:
+            response = self.client.get(url)
+        self.assertContains(response, "文章4")
+        self.assertEqual(len(after.captured_queries), len(before.captured_queries))
+
+    def test_api_serializer_reads_stats(self):
+        """文章API返回统计计数"""
+        Favorite.objects.create(user=self.other, article=self.article)
+        response = self.client.get(reverse("article-detail", args=[self.article.slug]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["favorites_count"], 1)
+        self.assertEqual(response.json()["likes_count"], 0)
@@ -1,3 +1,355 @@
-from django.test import TestCase
+import json
+import shutil
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from .cache import (
+    LOCK_KEY,
+    get_or_set,
+    invalidate_namespace,
+    namespaced_key,
+    safe_cache,
+)
+from .github_auth import client as github_client
+from .github_auth.client import GitHubClient, GitHubError, import_github_avatar
+from .models import SensitiveWord
+from .sensitive import (
+    AhoCorasick,
+    Match,
+    contains_sensitive_words,
+    find_sensitive_words,
+)
+from .slugs import allocate_slug, unique_suffix
+
+
+class CacheHelperTest(TestCase):
+    """缓存辅助函数测试"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_get_or_set_caches_value(self):
+        """未命中时计算并缓存，命中时不再计算"""
+        compute = mock.Mock(return_value={"a": 1})
+        self.assertEqual(get_or_set("key", compute, 60), {"a": 1})
+        self.assertEqual(get_or_set("key", compute, 60), {"a": 1})
+        self.assertEqual(compute.call_count, 1)
+
+    def test_expired_value_recomputed(self):
+        """过期后重新计算"""
+        get_or_set("key", lambda: 1, 60)
+        with mock.patch("utils.cache.time.time", return_value=time.time() + 61):
+            self.assertEqual(get_or_set("key", lambda: 2, 60), 2)
+
+    def test_stale_value_served_while_locked(self):
+        """其他进程正在重算时返回旧值"""
+        get_or_set("key", lambda: 1, 60)
+        cache.add(LOCK_KEY.format("key"), 1)
+        compute = mock.Mock(return_value=2)
+        with mock.patch("utils.cache.time.time", return_value=time.time() + 61):
+            self.assertEqual(get_or_set("key", compute, 60), 1)
+        compute.assert_not_called()
+
+    def test_early_expiry(self):
+        """临近过期时按概率提前重算"""
+        get_or_set("key", lambda: 1, 60)
+        # random() 接近1时 -log(1 - random()) 很大，提前重算
+        with mock.patch("utils.cache.random.random", return_value=0.999999):
+            cache.set("key", (1, time.time() + 1, 0.1), 60)
+            self.assertEqual(get_or_set("key", lambda: 2, 60), 2)
+
+    def test_namespace_invalidation(self):
+        """命名空间失效后键发生变化"""
+        key = namespaced_key("articles", 1)
+        self.assertEqual(namespaced_key("articles", 1), key)
+        invalidate_namespace("articles")
+        self.assertNotEqual(namespaced_key("articles", 1), key)
+
+        # 版本号丢失后也不会回到旧版本
+        cache.clear()
+        self.assertNotEqual(namespaced_key("articles", 1), key)
+
+
+@override_settings(PAGE_CACHE={"ENABLED": True})
+class CacheUnavailableTest(TestCase):
+    """缓存不可用（Redis宕机）时直接计算，页面正常返回"""
+
+    def setUp(self):
+        from apps.articles.models import Article
+
+        cache.clear()
+        user = get_user_model().objects.create_user(
+            username="writer", email="writer@example.com", password="testpassword"
+        )
+        self.article = Article.objects.create(
+            title="缓存宕机",
+            content="正文",
+            author=user,
+            status="published",
+            visibility="public",
+        )
+        self.article.comments.create(content="评论", author=user, is_approved=True)
+        for name in (
+            "get",
+            "get_many",
+            "set",
+            "set_many",
+            "add",
+            "incr",
+            "delete",
+            "delete_many",
+        ):
+            patcher = mock.patch.object(
+                cache, name, side_effect=RedisConnectionError("redis down")
+            )
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_helpers_degrade(self):
+        """读取视为未命中，写入和失效被忽略"""
+        with self.assertLogs("utils.cache", "WARNING"):
+            self.assertEqual(get_or_set("key", lambda: 1, 60), 1)
+            self.assertEqual(safe_cache.get_many(["a"]), {})
+            self.assertFalse(safe_cache.add("a", 1))
+            invalidate_namespace("articles")
+            namespaced_key("articles", 1)
+
+    def test_pages_render(self):
+        """首页、列表、详情和API不返回500"""
+        for url in (
+            reverse("home"),
+            reverse("articles:article_list"),
+            reverse("articles:article_detail", args=[self.article.slug]),
+            reverse("article-list"),
+        ):
+            with self.subTest(url=url), self.assertLogs("utils.cache", "WARNING"):
+                self.assertEqual(self.client.get(url).status_code, 200)
+
+
+class SensitiveWordMatcherTest(TestCase):
+    """敏感词自动机测试"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_overlapping_matches(self):
+        """一次扫描返回所有命中及位置，包括重叠和互为后缀的敏感词"""
+        matcher = AhoCorasick(["he", "she", "his", "hers"])
+        self.assertEqual(
+            matcher.search("ushers"),
+            [Match("she", 1, 4), Match("he", 2, 4), Match("hers", 2, 6)],
+        )
+        self.assertTrue(matcher.contains("this"))
+        self.assertFalse(matcher.contains("world"))
+        self.assertEqual(AhoCorasick([]).search("任意文本"), [])
+
+    def test_chinese_words(self):
+        """中文敏感词"""
+        matcher = AhoCorasick(["赌博", "博彩", "彩票"])
+        self.assertEqual(
+            [m.word for m in matcher.search("网络赌博彩票")], ["赌博", "博彩", "彩票"]
+        )
+
+    def test_matcher_cached_and_rebuilt(self):
+        """自动机在进程内缓存，敏感词变化后重建"""
+        SensitiveWord.objects.create(word="广告")
+        self.assertTrue(contains_sensitive_words("这是广告"))
+        with self.assertNumQueries(0):
+            find_sensitive_words("这是广告")
+
+        SensitiveWord.objects.create(word="垃圾")
+        self.assertEqual(
+            [m.word for m in find_sensitive_words("垃圾广告")], ["垃圾", "广告"]
+        )
+
+        SensitiveWord.objects.filter(word="广告").delete()
+        self.assertFalse(contains_sensitive_words("这是广告"))
+
+
+class SlugAllocatorTest(TestCase):
+    """唯一slug分配测试"""
+
+    def test_suffix_unique_and_short(self):
+        suffixes = [unique_suffix() for _ in range(5000)]
+        self.assertEqual(len(set(suffixes)), 5000)
+        self.assertTrue(all(len(suffix) <= 13 for suffix in suffixes))
+
+    def test_suffix_unique_when_clock_stalls(self):
+        """时钟停止或回拨时序号继续递增，不会重复"""
+        with mock.patch("utils.slugs.time.time", return_value=1.8e9):
+            suffixes = {unique_suffix() for _ in range(3000)}
+        self.assertEqual(len(suffixes), 3000)
+
+    def test_allocate_slug(self):
+        self.assertTrue(allocate_slug("Hello World").startswith("hello-world-"))
+        self.assertTrue(allocate_slug("中文标题").isalnum())
+        self.assertLessEqual(len(allocate_slug("x" * 100, max_length=50)), 50)
+
+
+def _png(size=(64, 64)):
+    output = BytesIO()
+    Image.new("RGB", size, (30, 120, 200)).save(output, format="PNG")
+    return output.getvalue()
+
+
+class StubGitHubHandler(BaseHTTPRequestHandler):
+    """模拟GitHub的本地HTTP服务"""
+
+    protocol_version = "HTTP/1.1"
+    avatar = _png()
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, body, content_type="application/json", length=True):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        if length:
+            self.send_header("Content-Length", str(len(body)))
+        else:
+            self.send_header("Connection", "close")
+            self.close_connection = True
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # 客户端超过大小限制后断开
+            pass
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.server.requests.append((self.path, self.client_address[1]))
+        self._send(json.dumps({"access_token": "token-1"}).encode())
+
+    def do_GET(self):
+        self.server.requests.append((self.path, self.client_address[1]))
+        base = f"http://127.0.0.1:{self.server.server_port}"
+        if self.path == "/api/user":
+            if self.headers.get("Authorization") != "token token-1":
+                self.send_response(401)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            user = {"id": 42, "login": "octocat", "avatar_url": f"{base}/avatar.png"}
+            self._send(json.dumps(user).encode())
+        elif self.path == "/avatar.png":
+            self._send(self.avatar, "image/png")
+        elif self.path == "/large.png":
+            self._send(b"0" * 4096, "image/png")
+        elif self.path == "/stream.png":
+            # 没有 Content-Length，只能在读取时限制大小
+            self._send(b"0" * 4096, "image/png", length=False)
+        elif self.path == "/page.html":
+            self._send(b"<html></html>", "text/html")
+        elif self.path == "/slow.png":
+            time.sleep(1)
+            self._send(self.avatar, "image/png")
+        else:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+
+class GitHubClientTest(TestCase):
+    """GitHub客户端测试（使用本地HTTP服务）"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubGitHubHandler)
+        cls.server.requests = []
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base = f"http://127.0.0.1:{cls.server.server_port}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.server.requests.clear()
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(
+            MEDIA_ROOT=self.media_root,
+            GITHUB_CLIENT={
+                "ASYNC": False,
+                "OAUTH_URL": f"{self.base}/login/oauth",
+                "API_URL": f"{self.base}/api",
+                "READ_TIMEOUT": 0.3,
+                "MAX_AVATAR_BYTES": 1024 * 1024,
+            },
+        )
+        self.settings_override.enable()
+        # 共用客户端在创建时读取配置
+        github_client._reset_client()
+
+    def tearDown(self):
+        github_client._reset_client()
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def test_requests_reuse_connection(self):
+        """令牌交换和用户信息请求复用同一个连接"""
+        client = GitHubClient()
+        self.assertEqual(client.exchange_code("code", "id", "secret"), "token-1")
+        self.assertEqual(client.get_user("token-1")["login"], "octocat")
+        ports = {port for _, port in self.server.requests}
+        self.assertEqual(len(ports), 1)
+
+        with self.assertRaises(GitHubError):
+            client.get_user("wrong")
+
+    def test_avatar_download_limits(self):
+        """头像超过大小限制、类型不对或读取超时时中止"""
+        client = GitHubClient()
+        self.assertEqual(
+            client.download_avatar(f"{self.base}/avatar.png"), StubGitHubHandler.avatar
+        )
+        for path in ("/large.png", "/stream.png"):
+            with self.assertRaisesMessage(GitHubError, "头像"):
+                client.download_avatar(f"{self.base}{path}", max_bytes=1024)
+        with self.assertRaisesMessage(GitHubError, "头像类型不正确"):
+            client.download_avatar(f"{self.base}/page.html")
+
+        started = time.monotonic()
+        with self.assertRaises(GitHubError):
+            client.download_avatar(f"{self.base}/slow.png")
+        self.assertLess(time.monotonic() - started, 1)
+
+    def test_callback_defers_avatar(self):
+        """回调登录后立即返回，头像在事务提交后下载和处理"""
+        with (
+            override_settings(
+                GITHUB_CLIENT={**github_client.get_options(), "ASYNC": True}
+            ),
+            mock.patch("utils.celery.tasks.fetch_github_avatar_task.delay") as delay,
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            response = self.client.get("/accounts/github/callback", {"code": "abc"})
+        self.assertRedirects(response, "/", fetch_redirect_response=False)
+        user = get_user_model().objects.get(username="github_42")
+        self.assertEqual(int(self.client.session["_auth_user_id"]), user.pk)
+        delay.assert_called_once_with(user.pk, f"{self.base}/avatar.png")
+        self.assertNotIn("/avatar.png", [path for path, _ in self.server.requests])
+
+        # 任务执行：下载头像并生成各尺寸文件
+        self.assertTrue(import_github_avatar(user.pk, f"{self.base}/avatar.png"))
+        user.refresh_from_db()
+        self.assertTrue(user.avatar.name.startswith("avatars/github_"))
+        self.assertTrue(user.avatar_version)
+
+        # 已有自定义头像时不覆盖
+        self.assertFalse(import_github_avatar(user.pk, f"{self.base}/avatar.png"))